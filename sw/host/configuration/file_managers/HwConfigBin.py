@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+# @title      Binary hardware configuration file
+# @file       HwConfigBin.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Versioned binary container of the hardware configuration
+#
+# @details
+# All fields are little-endian.
+#
+#   Header (64 bytes)
+#       magic           8s      b"HHCFGBIN"
+#       version         u16     HWCFG_BIN_VERSION
+#       nb_sections     u16
+#       nb_nrn          u32
+#       nb_hhparam      u32
+#       nb_ionrate      u32
+#       depth_ionrate   u32
+#       depth_synrate   u32
+#       nb_syn          u32     synapses stored (type other than none)
+#       dt              f64     time step (ms)
+#       sw_ver          16s     software version (ASCII, zero padded)
+#       crc32           u32     of previous header bytes
+#
+#   Sections (in this order), each a 24 bytes record followed by data
+#       tag             4s
+#       dtype           4s      numpy type string ("<f4", "<u4", "|u1")
+#       count           u64     number of elements
+#       crc32           u32     of data
+#       reserved        u32
+#
+#       HHPR  <f4  [nb_nrn, nb_hhparam]     HH parameters
+#       PSYN  <f4  [nb_psyn]                synaptic parameters
+#       IONR  <f4  [nb_ionrate, depth, 4]   m_rates1, m_rates2, h_rates1, h_rates2
+#       SYNR  <f4  [3, depth_synrate]       Bv, Tv, Sn GABAb
+#       SSRC  <u4  [nb_syn]                 source neuron of synapses
+#       SDST  <u4  [nb_syn]                 destination neuron of synapses
+#       STYP  |u1  [nb_syn]                 receptor (TSYN_ID of target application)
+#       SWGT  <f4  [nb_syn]                 weight
+#
+# Values are stored in single precision as parsed (stof) by the target
+# application from the text format. Synapses are stored sparse, sorted by
+# destination then source.
+#
+# > **17 Oct 2026** : file creation
+
+import os
+import zlib
+import numpy as np
+
+from configuration.file_managers.HwConfigFile import HwConfigFile
+from configuration.synapses.SynTable            import SynTable
+
+HWCFG_BIN_MAGIC     = b"HHCFGBIN"
+HWCFG_BIN_VERSION   = 1
+HWCFG_BIN_EXT       = ".bin"
+
+HWCFG_BIN_HEADER    = np.dtype([("magic", "S8"), ("version", "<u2"), ("nb_sections", "<u2"),
+                                ("nb_nrn", "<u4"), ("nb_hhparam", "<u4"), ("nb_ionrate", "<u4"),
+                                ("depth_ionrate", "<u4"), ("depth_synrate", "<u4"), ("nb_syn", "<u4"),
+                                ("dt", "<f8"), ("sw_ver", "S16"), ("crc32", "<u4")])
+HWCFG_BIN_SECTION   = np.dtype([("tag", "S4"), ("dtype", "S4"), ("count", "<u8"), ("crc32", "<u4"), ("reserved", "<u4")])
+HWCFG_BIN_SECTIONS  = ["HHPR", "PSYN", "IONR", "SYNR", "SSRC", "SDST", "STYP", "SWGT"]
+
+# Receptor codes of synapses (TSYN_ID of target application)
+HWCFG_BIN_TSYN      = {"ampa": 0, "nmda": 1, "gabaa": 2, "gabab": 3}
+
+def write_hwconfig_bin(hwconfig:HwConfigFile, fpath:str) -> None:
+    """Write hardware configuration in binary format
+
+    :param HwConfigFile hwconfig: Hardware configuration
+    :param str fpath: Path of binary configuration file
+    """
+    nb_nrn  = hwconfig.nb_nrn
+    syn     = hwconfig.syn
+    unknown = np.setdiff1d(syn.tsyn, list(HWCFG_BIN_TSYN))
+    if len(unknown) > 0:
+        raise ValueError("Unknown synapse types: {}".format(", ".join(map(str, unknown))))
+    sw_ver  = str(hwconfig.sw_ver).encode("ascii")
+    if len(sw_ver) > HWCFG_BIN_HEADER["sw_ver"].itemsize:
+        raise ValueError("Software version longer than {} characters: {}".format(HWCFG_BIN_HEADER["sw_ver"].itemsize, hwconfig.sw_ver))
+    codes   = np.zeros(syn.getNnz(), dtype=np.uint8)
+    for (syn_type, code) in HWCFG_BIN_TSYN.items():
+        codes[syn.tsyn == syn_type] = code
+
+    ionrates = np.stack([np.asarray(hwconfig.m_rates1), np.asarray(hwconfig.m_rates2),
+                         np.asarray(hwconfig.h_rates1), np.asarray(hwconfig.h_rates2)], axis=-1)
+    sections = {
+        "HHPR"  : np.asarray(hwconfig.HH_param, dtype="<f4").reshape(nb_nrn, hwconfig.nb_hhparam),
+        "PSYN"  : np.asarray(hwconfig.psyn, dtype="<f4"),
+        "IONR"  : ionrates.astype("<f4").reshape(hwconfig.nb_ionrate, hwconfig.depth_ionrate, 4),
+        "SYNR"  : np.asarray(hwconfig.synrates, dtype="<f4").reshape(3, hwconfig.depth_synrate),
+        "SSRC"  : syn.src.astype("<u4"),
+        "SDST"  : syn.dest.astype("<u4"),
+        "STYP"  : codes,
+        "SWGT"  : syn.wsyn.astype("<f4"),
+    }
+
+    header = np.zeros(1, dtype=HWCFG_BIN_HEADER)
+    header["magic"]         = HWCFG_BIN_MAGIC
+    header["version"]       = HWCFG_BIN_VERSION
+    header["nb_sections"]   = len(sections)
+    header["nb_nrn"]        = nb_nrn
+    header["nb_hhparam"]    = hwconfig.nb_hhparam
+    header["nb_ionrate"]    = hwconfig.nb_ionrate
+    header["depth_ionrate"] = hwconfig.depth_ionrate
+    header["depth_synrate"] = hwconfig.depth_synrate
+    header["nb_syn"]        = syn.getNnz()
+    header["dt"]            = hwconfig.dt
+    header["sw_ver"]        = sw_ver
+    header["crc32"]         = zlib.crc32(header.tobytes()[:HWCFG_BIN_HEADER.fields["crc32"][1]])
+
+    with open(fpath, "wb") as f:
+        f.write(header.tobytes())
+        for tag in HWCFG_BIN_SECTIONS:
+            data    = np.ascontiguousarray(sections[tag])
+            record  = np.zeros(1, dtype=HWCFG_BIN_SECTION)
+            record["tag"]   = tag.encode("ascii")
+            record["dtype"] = data.dtype.str.encode("ascii")
+            record["count"] = data.size
+            record["crc32"] = zlib.crc32(data.tobytes())
+            f.write(record.tobytes())
+            f.write(data.tobytes())
+
+    print("Hardware configuration file saved at: " + fpath)
+
+def read_hwconfig_bin(fpath:str) -> HwConfigFile:
+    """Read hardware configuration in binary format
+
+    :param str fpath: Path of binary configuration file
+    :returns: Hardware configuration
+    """
+    with open(fpath, "rb") as f:
+        buf = f.read()
+
+    # Header
+    if len(buf) < HWCFG_BIN_HEADER.itemsize:
+        raise ValueError("Truncated binary configuration header: {}".format(fpath))
+    header = np.frombuffer(buf, dtype=HWCFG_BIN_HEADER, count=1)[0]
+    if header["magic"] != HWCFG_BIN_MAGIC:
+        raise ValueError("Not a binary hardware configuration file: {}".format(fpath))
+    if zlib.crc32(buf[:HWCFG_BIN_HEADER.fields["crc32"][1]]) != header["crc32"]:
+        raise ValueError("Checksum mismatch of binary configuration header: {}".format(fpath))
+    if header["version"] != HWCFG_BIN_VERSION:
+        raise ValueError("Unsupported binary configuration version {} (expected {})".format(header["version"], HWCFG_BIN_VERSION))
+
+    # Sections
+    sections    = {}
+    offs        = HWCFG_BIN_HEADER.itemsize
+    for _ in range(header["nb_sections"]):
+        if offs + HWCFG_BIN_SECTION.itemsize > len(buf):
+            raise ValueError("Truncated binary configuration file: {}".format(fpath))
+        record  = np.frombuffer(buf, dtype=HWCFG_BIN_SECTION, count=1, offset=offs)[0]
+        offs   += HWCFG_BIN_SECTION.itemsize
+        tag     = record["tag"].decode("ascii")
+        dtype   = np.dtype(record["dtype"].decode("ascii"))
+        size    = int(record["count"])*dtype.itemsize
+        if offs + size > len(buf):
+            raise ValueError("Truncated section {} of binary configuration file: {}".format(tag, fpath))
+        if zlib.crc32(buf[offs:offs+size]) != record["crc32"]:
+            raise ValueError("Checksum mismatch of section {} of binary configuration file: {}".format(tag, fpath))
+        sections[tag]   = np.frombuffer(buf, dtype=dtype, count=int(record["count"]), offset=offs)
+        offs           += size
+
+    missing = [tag for tag in HWCFG_BIN_SECTIONS if tag not in sections]
+    if missing:
+        raise ValueError("Missing sections {} of binary configuration file: {}".format(", ".join(missing), fpath))
+
+    nb_nrn  = int(header["nb_nrn"])
+    hwcfg   = HwConfigFile(header["sw_ver"].decode("ascii"), nb_nrn)
+    hwcfg.dt            = float(header["dt"])
+    hwcfg.nb_hhparam    = int(header["nb_hhparam"])
+    hwcfg.nb_ionrate    = int(header["nb_ionrate"])
+    hwcfg.depth_ionrate = int(header["depth_ionrate"])
+    hwcfg.depth_synrate = int(header["depth_synrate"])
+
+    hwcfg.HH_param  = sections["HHPR"].astype(np.float64).reshape(nb_nrn, hwcfg.nb_hhparam)
+    hwcfg.psyn      = sections["PSYN"].astype(np.float64)
+    ionrates        = sections["IONR"].astype(np.float64).reshape(hwcfg.nb_ionrate, hwcfg.depth_ionrate, 4)
+    [hwcfg.m_rates1, hwcfg.m_rates2, hwcfg.h_rates1, hwcfg.h_rates2] = np.moveaxis(ionrates, 2, 0)
+    hwcfg.synrates  = sections["SYNR"].astype(np.float64).reshape(3, hwcfg.depth_synrate)
+
+    # Synapses
+    nb_syn = int(header["nb_syn"])
+    for tag in ["SSRC", "SDST", "STYP", "SWGT"]:
+        if len(sections[tag]) != nb_syn:
+            raise ValueError("Section {} holds {} synapses instead of {}: {}".format(tag, len(sections[tag]), nb_syn, fpath))
+    for tag in ["SSRC", "SDST"]:
+        if nb_syn > 0 and sections[tag].max() >= nb_nrn:
+            raise ValueError("Neuron of section {} out of {} neurons: {}".format(tag, nb_nrn, fpath))
+    unknown = np.setdiff1d(sections["STYP"], list(HWCFG_BIN_TSYN.values()))
+    if len(unknown) > 0:
+        raise ValueError("Unknown synapse type codes {}: {}".format(", ".join(map(str, unknown)), fpath))
+
+    types       = np.array(list(HWCFG_BIN_TSYN))
+    code2type   = np.zeros(256, dtype=int)
+    code2type[list(HWCFG_BIN_TSYN.values())] = np.arange(len(HWCFG_BIN_TSYN))
+    hwcfg.syn   = SynTable(nb_nrn, sections["SDST"], sections["SSRC"], types[code2type[sections["STYP"]]], sections["SWGT"])
+
+    return hwcfg
+
+def read_hwconfig(fpath:str) -> HwConfigFile:
+    """Read hardware configuration in text or binary format (from file extension)"""
+    if os.path.splitext(fpath)[1] == HWCFG_BIN_EXT:
+        return read_hwconfig_bin(fpath)
+    return HwConfigFile.read(fpath)
+
+def convert_hwconfig(fpath_in:str, fpath_out:str) -> HwConfigFile:
+    """Convert hardware configuration between text and binary formats (from file extensions)
+
+    :param str fpath_in: Path of configuration file to convert
+    :param str fpath_out: Path of converted configuration file
+    :returns: Hardware configuration
+    """
+    hwconfig = read_hwconfig(fpath_in)
+    if os.path.splitext(fpath_out)[1] == HWCFG_BIN_EXT:
+        write_hwconfig_bin(hwconfig, fpath_out)
+    else:
+        hwconfig.write(fpath_out)
+    return hwconfig
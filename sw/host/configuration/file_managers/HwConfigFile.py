@@ -15,11 +15,20 @@
 # > **29 Jul 2022** : file creation (RB)
 # > **19 Oct 2022** : remove L diagonal and add node area (RB)
 # > **05 Dec 2022** : adapt file from simoton to snn_hh (RB)
+# > **17 Oct 2026** : read configuration file back (RB)
+# > **17 Oct 2026** : synapses stored sparse, dense layout streamed at write (RB)
+# > **17 Oct 2026** : time step written in header (RB)
+# > **17 Oct 2026** : time step in DATE line, header kept to 2 lines read by target (RB)
+# > **17 Oct 2026** : dense synapses as read-only view of synapse table (RB)
 
 import os
+import warnings
 import numpy as np
 from datetime import datetime
 
+from configuration.synapses.Synapses import Destexhe
+from configuration.synapses.SynTable import SynTable, SYN_TABLE_NONE
+
 COM_SEP     = '#'
 KEY_SEP     = '='
 VAL_SEP     = ',' # has to be python default list separator
@@ -56,9 +65,48 @@ class HwConfigFile :
         
 
         # Synaptic configuration
-        self.tsyn               = []    # Synaptic type
-        self.wsyn               = []    # Synaptic weight
+        self.syn                = SynTable(NB_NEURONS)  # Synapses (dest, src, type, weight)
+        self.__dense            = None  # Read-only dense view of syn [syn, tsyn, wsyn] (see tsyn)
+
+    @property
+    def tsyn(self):
+        """Synaptic types [dest, src] as a read-only dense view of syn
+
+        The view is built once per synapse table (nb_nrn^2 entries) and cannot
+        be edited in place (hwconfig.tsyn[d][s] = t raises ValueError): assign
+        tsyn as a whole or edit syn. Use syn.getRow or syn.getSynapse to read
+        synapses without dense arrays.
+        """
+        return self.__getDense()[0]
+
+    @tsyn.setter
+    def tsyn(self, tsyn):
+        self.__setDense(tsyn, None)
+
+    @property
+    def wsyn(self):
+        """Synaptic weights [dest, src] as a read-only dense view of syn (see tsyn)"""
+        return self.__getDense()[1]
+
+    @wsyn.setter
+    def wsyn(self, wsyn):
+        self.__setDense(None, wsyn)
 
+    def __getDense(self):
+        """Get read-only dense types and weights [dest, src] of syn (rebuilt when syn is replaced)"""
+        if self.__dense is None or self.__dense[0] is not self.syn:
+            [tsyn, wsyn] = self.syn.toDense()
+            tsyn.setflags(write=False)
+            wsyn.setflags(write=False)
+            self.__dense = [self.syn, tsyn, wsyn]
+        return self.__dense[1:]
+
+    def __setDense(self, tsyn, wsyn):
+        """Set synapses from dense types or weights [dest, src] (other one kept)"""
+        [tsyn_cur, wsyn_cur] = self.__getDense()
+        tsyn = tsyn_cur if tsyn is None or len(tsyn) == 0 else tsyn
+        wsyn = wsyn_cur if wsyn is None or len(wsyn) == 0 else wsyn
+        self.syn = SynTable.fromDense(tsyn, wsyn)
     
     def write(self, fpath):
         """Write configuration file
@@ -76,7 +124,7 @@ class HwConfigFile :
         with open(fpath, "w") as f:
             # Header
             f.write(COM_SEP + "SW_VERSION" + KEY_SEP + self.sw_ver + '\n')
-            f.write(COM_SEP + "DATE" + KEY_SEP + str(datetime.now()) + '\n')
+            f.write(COM_SEP + "DATE" + KEY_SEP + str(datetime.now()) + COL_SEP + "DT" + KEY_SEP + repr(float(self.dt)) + '\n') # 2 lines skipped by target
 
             # Global parameters (fetch from config)
             # f.write("NB_NRN" + KEY_SEP + str(self.nb_nrn) + '\n')
@@ -110,12 +158,112 @@ class HwConfigFile :
                 str_ir += self.__formatFloat(self.synrates[2][addr]) + '\n'    # Tv
                 f.write(str_ir)
             
-            # synaptic configuration
-            for nrn in range(self.nb_nrn):
-                f.write("N{}".format(nrn) + KEY_SEP + VAL_SEP.join(str(tsyn) + '$'+ str(wsyn) for tsyn,wsyn in zip(self.tsyn[nrn][:], self.wsyn[nrn][:])) + '\n')
+            # synaptic configuration (dense rows built one at a time from sparse synapses)
+            tok_none = SYN_TABLE_NONE + '$' + str(0.0)
+            for [nrn, src, tsyn, wsyn] in self.syn.iterRows():
+                row = [tok_none]*self.nb_nrn
+                for (s, t, w) in zip(src.tolist(), tsyn.tolist(), wsyn.tolist()):
+                    row[s] = t + '$' + str(w)
+                f.write("N{}".format(nrn) + KEY_SEP + VAL_SEP.join(row) + '\n')
 
             print("Hardware configuration file saved at: " + fpath)
 
+    @classmethod
+    def read(cls, fpath, dt:float=None):
+        """Read configuration file written by write
+
+        Values are parsed by section in bulk: parameters and rates as float
+        arrays, synapses as a sparse table (pairs of type "x" dropped).
+
+        :param str fpath: Path of hardware configuration file
+        :param float dt: Time step (ms), None to read it from header (DT field of DATE line)
+
+        Files without DT in header (written before it was added) fall back to
+        a time step guessed from GABAb rates K3 of psyn and default K3, only
+        valid if psyn was not edited.
+        :returns: Hardware configuration
+        """
+        with open(fpath, "r") as f:
+            lines = f.read().splitlines()
+
+        # Values of each key grouped by section (key prefix)
+        sw_ver   = ""
+        dt_hdr   = None
+        sections = {"HHparam_N": [], "psyn": [], "ionrates_I": [], "synrates_A": [], "N": []}
+        for line in lines:
+            if line.startswith(COM_SEP):
+                if line.startswith(COM_SEP + "SW_VERSION" + KEY_SEP):
+                    sw_ver = line.split(KEY_SEP, 1)[1]
+                for field in line[len(COM_SEP):].split(COL_SEP):
+                    if field.startswith("DT" + KEY_SEP):
+                        dt_hdr = float(field.split(KEY_SEP, 1)[1])
+                continue
+            [key, sep, val] = line.partition(KEY_SEP)
+            if not sep:
+                continue
+            for prefix in sections:
+                if key.startswith(prefix):
+                    sections[prefix].append([key[len(prefix):], val])
+                    break
+
+        def parse_floats(vals:list, sep:str):
+            return np.array(sep.join(vals).split(sep), dtype=np.float64)
+
+        # HH parameters
+        hhparam = sections["HHparam_N"]
+        nb_nrn  = len(hhparam)
+        hwcfg   = cls(sw_ver, nb_nrn)
+        hwcfg.HH_param      = parse_floats([v for [_, v] in hhparam], VAL_SEP).reshape(nb_nrn, -1)
+        hwcfg.nb_hhparam    = hwcfg.HH_param.shape[1]
+
+        # Synapses parameters
+        hwcfg.psyn = parse_floats([v for [_, v] in sections["psyn"]], VAL_SEP)
+
+        # m and h table rates (keys I{ionch}A{addr})
+        ionrates = sections["ionrates_I"]
+        if ionrates:
+            addr        = np.array([k.split('A') for [k, _] in ionrates], dtype=int)
+            hwcfg.nb_ionrate    = addr[:, 0].max() + 1
+            hwcfg.depth_ionrate = addr[:, 1].max() + 1
+            rates       = np.zeros([hwcfg.nb_ionrate, hwcfg.depth_ionrate, 4])
+            rates[addr[:, 0], addr[:, 1]] = parse_floats([v for [_, v] in ionrates], COL_SEP).reshape(-1, 4)
+            [hwcfg.m_rates1, hwcfg.m_rates2, hwcfg.h_rates1, hwcfg.h_rates2] = np.moveaxis(rates, 2, 0)
+
+        # Synaptic rates tables (keys A{addr})
+        synrates = sections["synrates_A"]
+        if synrates:
+            addr        = np.array([k for [k, _] in synrates], dtype=int)
+            hwcfg.depth_synrate = addr.max() + 1
+            hwcfg.synrates      = np.zeros([3, hwcfg.depth_synrate])
+            hwcfg.synrates[:, addr] = parse_floats([v for [_, v] in synrates], COL_SEP).reshape(-1, 3).T
+
+        # Synaptic configuration: all type$weight tokens split at once
+        syn = sections["N"]
+        if len(syn) != nb_nrn:
+            raise ValueError("Synaptic configuration of {} neurons expected, got {}".format(nb_nrn, len(syn)))
+        dest    = np.array([k for [k, _] in syn], dtype=int)
+        tokens  = VAL_SEP.join(v for [_, v] in syn).replace('$', VAL_SEP).split(VAL_SEP)
+        if len(tokens) != 2*nb_nrn*nb_nrn:
+            raise ValueError("Synaptic configuration of {}x{} synapses expected, got {} tokens".format(nb_nrn, nb_nrn, len(tokens)))
+        types   = np.array(tokens[0::2], dtype=object)
+        sel     = np.flatnonzero(types != SYN_TABLE_NONE)
+        weights = np.array([tokens[2*k+1] for k in sel.tolist()], dtype=np.float64)
+        hwcfg.syn = SynTable(nb_nrn, dest[sel // nb_nrn], sel % nb_nrn, types[sel].astype(str), weights)
+
+        # Time step: from header, else guessed from GABAb rate K3 of psyn (scaled by time step)
+        if dt is None:
+            dt = dt_hdr
+        if dt is None:
+            pid     = Destexhe.PID["GABAb_K3"]
+            k3_def  = Destexhe().psyn[pid]
+            if len(hwcfg.psyn) <= pid or hwcfg.psyn[pid] == 0 or k3_def == 0:
+                raise ValueError("No time step in header of {} and GABAb K3 of psyn is zero: pass dt".format(fpath))
+            dt = float("{:.6g}".format(hwcfg.psyn[pid]/k3_def))
+            warnings.warn("No time step in header of {}: dt={} guessed from GABAb K3 of psyn (wrong if psyn was edited), pass dt to override".format(fpath, dt))
+        hwcfg.dt = dt
+
+        return hwcfg
+
 
     def __formatFloat(self, val:float):
         if val == 0.0 or val == 1.0:
@@ -11,6 +11,7 @@
 # 
 # @details 
 # > **23 Oct 2023** : file creation (RB)
+# > **17 Oct 2026** : synapses generated as sparse table (RB)
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -21,12 +22,14 @@ from configuration.file_managers.SwConfigFile     import *
 from configuration.neurons.Ionrates               import *
 from configuration.neurons.Hhparam                import *
 from configuration.synapses.Synapses              import *
+from configuration.synapses.SynTable              import SynTable
 from configuration.network_models.OrgStructures   import *
 from configuration.network_models.OrgStructures   import nrncode
 from configuration.utility.settings               import _SOFTWARE_VERSION, _HW_MAX_NB_NEURONS, _HW_DT
 
 class NetwConfParams:
     model="custom"
+    nb_nrn=_HW_MAX_NB_NEURONS
     emulation_time_s=300
     en_step_stim=False
     step_stim_delay_ms=0
@@ -41,13 +44,14 @@ class NetwConfParams:
     org_wsyn_in=1.0
     org_wsyn_out=1.0
     org_inh_ratio=0.2
+    org_seed=None
 
 
 def gen_config(config_name:str, netw_conf_params:NetwConfParams, save_path:str="./"):
     # System parameters ####################################################################
     # Hardware platform (from KR260 platform)
     sw_ver              = _SOFTWARE_VERSION
-    NB_NEURONS          = _HW_MAX_NB_NEURONS
+    NB_NEURONS          = netw_conf_params.nb_nrn
     dt                  = _HW_DT
 
     # Files
@@ -87,8 +91,7 @@ def gen_config(config_name:str, netw_conf_params:NetwConfParams, save_path:str="
     swconfig_builder.parameters["stim_duration_ms"]            = netw_conf_params.step_stim_duration_ms
 
     # Globals & Builders ####################################################################
-    tsyn_row, wsyn_row    = ([] for i in range(2))
-    tsyn,     wsyn        = ([] for i in range(2))
+    syn                   = SynTable(NB_NEURONS)
     tnrn                  = []
 
     #   ██████ ██    ██ ███████ ████████  ██████  ███    ███ 
@@ -123,61 +126,45 @@ def gen_config(config_name:str, netw_conf_params:NetwConfParams, save_path:str="
 
         # USER >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
         # Create synaptic conncetions
-        # Synaptic types
+        # Synapses listed as destination and source neurons of one synaptic type
         #      | source |
         # -----|--------|
         # dest |        |
         tsyn_dict = Synapses().getDict()
         weight = 1.9
-        for dest in range(NB_NEURONS):
-            for src in range(NB_NEURONS):
-
-                if SYN_MODE == "NONE":
-                    tsyn_i = "destexhe_none"
-
-                elif SYN_MODE == "CHASER":
-                    if ((src+1) == dest):
-                        tsyn_i = "destexhe_ampa"
-                    else:
-                        tsyn_i = "destexhe_none"
-
-                elif SYN_MODE == "RANDOM":
-                    if (dest < 100) and (src < 100):
-                        if dest != src:
-                            if (np.random.rand() < 0.2):
-                                tsyn_i = "destexhe_ampa"
-                            else:
-                                tsyn_i = "destexhe_none"
-                        else:
-                            tsyn_i = "destexhe_none"
-                    else:
-                        tsyn_i = "destexhe_none"
-
-                elif SYN_MODE == "ONE_TO_ONE":
-                    if src==0 and dest==1:
-                        tsyn_i = "destexhe_gabab"
-                    elif src==1 and dest==2:
-                        tsyn_i = "destexhe_gabab"
-                    else:
-                        tsyn_i = "destexhe_none"
-
-                elif SYN_MODE == "ONE_TO_ALL":
-                    if src==0 and dest != 0:
-                        tsyn_i = "destexhe_gabaa"
-                    else:
-                        tsyn_i = "destexhe_none"
-                # <<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<
-
-                tsyn_row.append(tsyn_dict[tsyn_i])
-                if tsyn_i == "destexhe_none":
-                    wsyn_row.append(0.0)
-                else:
-                    wsyn_row.append(weight)
-
-            tsyn.append(tsyn_row)
-            wsyn.append(wsyn_row)
-            tsyn_row = []
-            wsyn_row = []
+        if SYN_MODE == "NONE":
+            syn_dest    = []
+            syn_src     = []
+            tsyn_i      = "destexhe_none"
+
+        elif SYN_MODE == "CHASER":
+            syn_src     = np.arange(NB_NEURONS-1)
+            syn_dest    = syn_src + 1
+            tsyn_i      = "destexhe_ampa"
+
+        elif SYN_MODE == "RANDOM":
+            # One draw per pair of the first 100 neurons but autapses (destination then source order)
+            [syn_dest, syn_src] = np.nonzero(~np.eye(min(NB_NEURONS, 100), dtype=bool))
+            keep        = np.random.rand(len(syn_dest)) < 0.2
+            syn_dest    = syn_dest[keep]
+            syn_src     = syn_src[keep]
+            tsyn_i      = "destexhe_ampa"
+
+        elif SYN_MODE == "ONE_TO_ONE":
+            syn_dest    = [1, 2]
+            syn_src     = [0, 1]
+            tsyn_i      = "destexhe_gabab"
+
+        elif SYN_MODE == "ONE_TO_ALL":
+            syn_dest    = np.arange(1, NB_NEURONS)
+            syn_src     = np.zeros(NB_NEURONS-1, dtype=int)
+            tsyn_i      = "destexhe_gabaa"
+        # <<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<
+
+        syn_dest    = np.asarray(syn_dest, dtype=int)
+        syn_src     = np.asarray(syn_src, dtype=int)
+        keep        = (syn_dest < NB_NEURONS) & (syn_src < NB_NEURONS)
+        syn         = SynTable(NB_NEURONS, syn_dest[keep], syn_src[keep], tsyn_dict[tsyn_i], weight)
 
     #   ██████  ██████   ██████   █████  ███    ██  ██████  ██ ██████  
     #  ██    ██ ██   ██ ██       ██   ██ ████   ██ ██    ██ ██ ██   ██ 
@@ -194,7 +181,7 @@ def gen_config(config_name:str, netw_conf_params:NetwConfParams, save_path:str="
         INH_RATIO   = netw_conf_params.org_inh_ratio
 
         # Instanciate helper for organoid modeling configuration
-        org         = OrgStructures(NB_NEURONS)
+        org         = OrgStructures(NB_NEURONS, netw_conf_params.org_seed)
 
         # Configure organoid model
         ## (1) - Add organoids
@@ -241,30 +228,16 @@ def gen_config(config_name:str, netw_conf_params:NetwConfParams, save_path:str="
         # (format for hardware config)
 
         # Get model parameters
-        tsyn_org    = org.getSynTypes()
-        wsyn_org    = org.getSynWeights()
+        [syn_dest, syn_src, tsyn_org, wsyn_org] = org.getSynapses()
         tnrn_org    = org.getNeuronTypes()
         tsyn_dict   = Synapses().getDict()
 
-        for dest in range(NB_NEURONS):
-            for src in range(NB_NEURONS):
-                tsyn_i = tsyn_org[dest][src]
-                wsyn_i = wsyn_org[dest][src]
-                tsyn_row.append(tsyn_dict[tsyn_i])
-                if tsyn_i == "destexhe_none":
-                    wsyn_row.append(0.0)
-                elif tsyn_i == "destexhe_ampa":
-                    wsyn_row.append(netw_conf_params.org_wsynexc*wsyn_i)
-                elif tsyn_i == "destexhe_gabaa":
-                    wsyn_row.append(netw_conf_params.org_wsyninh*wsyn_i)
-                else:
-                    wsyn_row.append(wsyn_i)
-
-            tsyn.append(tsyn_row)
-            wsyn.append(wsyn_row)
-
-            tsyn_row = []
-            wsyn_row = []
+        tsyn_hw = np.empty(len(tsyn_org), dtype=object)
+        for (tsyn_i, tsyn_hw_i) in tsyn_dict.items():
+            tsyn_hw[tsyn_org == tsyn_i] = tsyn_hw_i
+        wsyn_hw = np.select([tsyn_org == "destexhe_ampa", tsyn_org == "destexhe_gabaa"],
+                            [netw_conf_params.org_wsynexc*wsyn_org, netw_conf_params.org_wsyninh*wsyn_org], wsyn_org)
+        syn     = SynTable(NB_NEURONS, syn_dest, syn_src, tsyn_hw.astype(str), wsyn_hw)
         
         tnrn = tnrn_org
     else:
@@ -311,8 +284,7 @@ def gen_config(config_name:str, netw_conf_params:NetwConfParams, save_path:str="
         hw_cfg_file.HH_param.append(hhp)
 
     # Synapses
-    hw_cfg_file.tsyn = tsyn
-    hw_cfg_file.wsyn = wsyn
+    hw_cfg_file.syn = syn
 
     # Write file
     swconfig_builder.write(os.path.join(local_dirpath_save, "swconfig_" + config_fname + ".json"))  # save path of swconfig on local
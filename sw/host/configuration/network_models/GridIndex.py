@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# @title      Spatial index of neurons for distance-dependent connectivity
+# @file       GridIndex.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Grid buckets of neuron positions and drawing of synapses within a radius
+#
+# @details
+# Neurons are bucketed in square cells of the connection radius, so that only
+# neighbor cells hold candidate pairs. For each pair of cells, the connection
+# probability is bounded by its value at the minimum distance between cells:
+# candidates are drawn at this bound by geometric skips over the pairs of the
+# cells and kept with probability p(d)/bound. Each pair is then connected with
+# probability p(d) as with one draw per pair, but time and memory follow the
+# number of synapses instead of the number of pairs.
+#
+# > **17 Oct 2026** : file creation
+
+import math
+import numpy as np
+
+class GridIndex:
+    def __init__(self, x, y, cell_size:float) -> None:
+        """Bucket neurons in square cells
+
+        :param x: X coordinates of all neurons
+        :param y: Y coordinates of all neurons
+        :param float cell_size: Side of cells (use connection radius)
+        """
+        self.x          = np.asarray(x, dtype=np.float64)
+        self.y          = np.asarray(y, dtype=np.float64)
+        self.cell_size  = float(cell_size)
+
+        # Neurons of each occupied cell {(cx, cy): neurons}
+        cx      = np.floor((self.x - self.x.min())/self.cell_size).astype(np.int64) if len(self.x) > 0 else np.zeros(0, dtype=np.int64)
+        cy      = np.floor((self.y - self.y.min())/self.cell_size).astype(np.int64) if len(self.y) > 0 else np.zeros(0, dtype=np.int64)
+        order   = np.lexsort((cy, cx))
+        cells   = np.stack((cx[order], cy[order]), axis=1)
+        [keys, starts] = np.unique(cells, axis=0, return_index=True) if len(order) > 0 else [np.zeros([0, 2], dtype=np.int64), []]
+        bounds  = np.append(starts, len(order)).astype(int)
+        self.cells = {(int(k[0]), int(k[1])): order[bounds[i]:bounds[i+1]] for i, k in enumerate(keys)}
+
+    def iterCellPairs(self, ndest, nsrc, radius:float):
+        """Iterate over pairs of cells closer than radius
+
+        :param ndest: Destination neurons
+        :param nsrc: Source neurons
+        :param float radius: Maximum distance between neurons (µm)
+        :returns: Generator of [destination neurons, source neurons, minimum distance between cells]
+        """
+        is_dest = np.zeros(len(self.x), dtype=bool)
+        is_src  = np.zeros(len(self.x), dtype=bool)
+        is_dest[np.asarray(ndest, dtype=int)]  = True
+        is_src[np.asarray(nsrc, dtype=int)]    = True
+        reach   = int(math.ceil(radius/self.cell_size))
+
+        for ((cx, cy), ids) in self.cells.items():
+            dest = ids[is_dest[ids]]
+            if len(dest) == 0:
+                continue
+            for dx in range(-reach, reach+1):
+                for dy in range(-reach, reach+1):
+                    ids_src = self.cells.get((cx+dx, cy+dy))
+                    if ids_src is None:
+                        continue
+                    dmin = self.cell_size*math.hypot(max(0, abs(dx)-1), max(0, abs(dy)-1))
+                    if dmin >= radius:
+                        continue
+                    src = ids_src[is_src[ids_src]]
+                    if len(src) > 0:
+                        yield [dest, src, dmin]
+
+    def drawEdges(self, ndest, nsrc, radius:float, prob, rng=np.random):
+        """Draw synapses with a probability decreasing with distance between neurons
+
+        :param ndest: Destination neurons
+        :param nsrc: Source neurons
+        :param float radius: Distance from which probability is zero (µm)
+        :param prob: Function of connection probability of distance array (decreasing)
+        :param rng: Random generator (numpy.random or RandomState)
+        :returns: [destination neurons, source neurons] of synapses sorted by destination then source (no autapse)
+        """
+        edges_dest  = []
+        edges_src   = []
+        for [dest, src, dmin] in self.iterCellPairs(ndest, nsrc, radius):
+            bound = min(1.0, float(prob(np.array(dmin))))
+            if bound <= 0:
+                continue
+
+            # Candidates at bound, kept with probability p(d)/bound
+            pos = sample_bernoulli(len(dest)*len(src), bound, rng)
+            d   = dest[pos // len(src)]
+            s   = src[pos % len(src)]
+            p   = prob(np.hypot(self.x[s] - self.x[d], self.y[s] - self.y[d]))
+            keep = (rng.rand(len(pos))*bound < p) & (d != s)
+            edges_dest.append(d[keep])
+            edges_src.append(s[keep])
+
+        if not edges_dest:
+            return [np.zeros(0, dtype=int), np.zeros(0, dtype=int)]
+        dest    = np.concatenate(edges_dest)
+        src     = np.concatenate(edges_src)
+        order   = np.lexsort((src, dest))
+        return [dest[order], src[order]]
+
+def sample_bernoulli(n:int, p:float, rng=np.random):
+    """Positions of successes among n Bernoulli trials of probability p (cost follows number of successes)
+
+    :param int n: Number of trials
+    :param float p: Probability of success
+    :param rng: Random generator (numpy.random or RandomState)
+    :returns: Sorted positions of successes
+    """
+    if p >= 1:
+        return np.arange(n)
+    if p <= 0 or n == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # Gaps between successes are geometric
+    pos     = []
+    last    = -1
+    while True:
+        mean    = (n - 1 - last)*p
+        gaps    = rng.geometric(p, size=int(mean + 4*math.sqrt(mean) + 16))
+        drawn   = last + np.cumsum(gaps)
+        pos.append(drawn[drawn < n])
+        if drawn[-1] >= n:
+            break
+        last = drawn[-1]
+    return np.concatenate(pos)
@@ -13,12 +13,17 @@
 # 
 # @details 
 # > **17 Feb 2022** : file creation (RB)
+# > **17 Oct 2026** : connection rules computed on blocks of neuron pairs, seeded generation (RB)
+# > **17 Oct 2026** : distance rules drawn from grid index of neurons as edge lists (RB)
+# > **17 Oct 2026** : synapses kept as edge list and weight rules instead of dense matrices (RB)
 
 import numpy as np
 import matplotlib.pyplot as plt
 import math
 import warnings
 
+from configuration.network_models.GridIndex import GridIndex
+
 ## Simulation parameters ##################################################
 # Describe the models of neurons and synapses used to model the organoid
 
@@ -38,6 +43,9 @@ syncode     = { SYN_NONE: "destexhe_none",      # No synapse is none from "Synap
                 SYN_EXC:  "destexhe_ampa",      # Excitatory synapse is AMPA from "Synapses.py"
                 SYN_INH:  "destexhe_gabaa"}     # Inhibitory synapse is GABAa from "Synapses.py"
 
+# Neuron pairs per block of connection rules (bounds memory of probability matrices)
+SYNCON_BLOCK_SIZE = 2**20
+
 # Colors
 COLOR_EXC = "red"   # Color for excitatory neurons and synaptic connections
 COLOR_INH = "blue"  # Color for inhibitory neurons and synaptic connections
@@ -45,12 +53,14 @@ COLOR_INH = "blue"  # Color for inhibitory neurons and synaptic connections
 ## Organoid modeling ##################################################
 # Helper class to generate configuration of organoid modeling
 class OrgStructures:
-    def __init__(self, nb_nrn) -> None:
+    def __init__(self, nb_nrn, seed=None) -> None:
         """Initialize
         
         :param int nb_nrn: Number of neurons used to emulate the WHOLE model
+        :param int seed: Seed of neuron placement, types and connections (None to use numpy global generator)
         """
         self.nb_nrn         = nb_nrn    # Number of neurons used in total
+        self.rng            = np.random if seed is None else np.random.RandomState(seed)
         self.nb_orgs        = 0         # Number of organoids
         self.nb_nrn_per_org = 0         # Number of neurons per organoid
         self.org_diam       = []        # List of organoids diameters
@@ -68,8 +78,10 @@ class OrgStructures:
 
         self.tnrn_all   = [] # List of neuron's type of all neurons [n0 ... self.nb_nrn]
         self.nlist_all  = [] # List of neuron's index of all neurons [n0 ... self.nb_nrn]
-        self.tsyn       = np.zeros([self.nb_nrn, self.nb_nrn], dtype=np.uint8)  # Synapses types [dest, src]
-        self.wsyn       = np.zeros([self.nb_nrn, self.nb_nrn])  # Synapses types [dest, src]
+        self.grids      = {} # Grid index of all neurons per cell size
+        self.syn_dest   = np.zeros(0, dtype=int) # Destination neuron of synapses (sorted by destination then source)
+        self.syn_src    = np.zeros(0, dtype=int) # Source neuron of synapses
+        self.wrules     = [] # Synaptic weights applied in order [(org_dest, org_src, weight)]
 
     # Setters -------------------------------------------------------------------------
 
@@ -113,6 +125,7 @@ class OrgStructures:
         self.dist2c_all = [item for sublist in self.dist2c for item in sublist] 
         self.tnrn_all   = [item for sublist in self.tnrn for item in sublist] 
         self.nlist_all  = [item for sublist in self.nlist for item in sublist] 
+        self.grids      = {}
 
     def genSynCon(self, rule, org_dest, org_src, max_pcon):
         """Generate synaptic connections
@@ -128,15 +141,31 @@ class OrgStructures:
 
         Examples: genSynCon("single", org_dest=0, org_src=0, 0.1); genSynCon("assembloid", org_dest=0, org_src=1, 0.2)
         """
+        [dest, src] = self.genSynEdges(rule, org_dest, org_src, max_pcon)
+
+        # Union with previous synapses (type only depends on source neuron)
+        key                 = np.unique(np.concatenate((self.syn_dest*self.nb_nrn + self.syn_src, dest*self.nb_nrn + src)))
+        self.syn_dest       = key // self.nb_nrn
+        self.syn_src        = key % self.nb_nrn
+
+    def genSynEdges(self, rule, org_dest, org_src, max_pcon):
+        """Draw synaptic connections as an edge list (see genSynCon)
+
+        Distance rules ("single", "assembloid") only draw pairs of neurons within
+        the distance where probability is non-zero, from a grid index of neurons.
+
+        :returns: [destination neurons, source neurons] of synapses sorted by destination then source
+        """
         if   rule == "single":
-            self.tsyn = self.__ruleSynConSingle(    self.tsyn, self.nlist[org_dest], self.nlist[org_src], self.tnrn_all, self.x_all, self.y_all, self.org_diam[org_src], max_pcon)
+            return self.__ruleSynConSingle(    self.nlist[org_dest], self.nlist[org_src], self.x_all, self.y_all, self.org_diam[org_src], max_pcon)
         elif rule == "assembloid":
             dist_orgs = math.sqrt(  (self.org_center_xy[org_dest][0]-self.org_center_xy[org_src][0])**2 + 
                                     (self.org_center_xy[org_dest][1]-self.org_center_xy[org_src][1])**2
                                  )
-            self.tsyn = self.__ruleSynConAssembloid(self.tsyn, self.nlist[org_dest], self.nlist[org_src], self.tnrn_all, self.x_all, self.y_all, dist_orgs + self.org_diam[org_src]/2+self.org_diam[org_dest]/2, max_pcon)
+            return self.__ruleSynConAssembloid(self.nlist[org_dest], self.nlist[org_src], self.x_all, self.y_all, dist_orgs + self.org_diam[org_src]/2+self.org_diam[org_dest]/2, max_pcon)
         elif rule == "connectoid":
-            self.tsyn = self.__ruleSynConConnectoid(self.tsyn, self.nlist[org_dest], self.nlist[org_src], self.tnrn_all, self.x_all, self.y_all, self.dist2c_all, max_pcon)
+            return self.__ruleSynConConnectoid(self.nlist[org_dest], self.nlist[org_src], self.dist2c_all, max_pcon)
+        return [np.zeros(0, dtype=int), np.zeros(0, dtype=int)]
 
     def genSynWeights(self, org_dest=-1, org_src=-1, weight=0.0):
         """Generate synaptic weights
@@ -147,13 +176,12 @@ class OrgStructures:
 
         Passing -1 for both organoid index select all synapses.
         For now the same weight is apply to synapses in the group.
+        Weights are applied in order when synapses are read (see getSynapses),
+        synapses without weight applied have a weight of 0.0.
 
         Example: genSynWeights(org_dest=-1, org_src=-1, weight=10.0) sets all synapses to 10.0
         """
-        if (org_src != -1) and (org_dest != -1):
-            self.wsyn = self.__genGroupSynWeights(self.nlist[org_dest], self.nlist[org_src], self.wsyn, weight)
-        else:
-            self.wsyn.fill(weight)
+        self.wrules.append((org_dest, org_src, weight))
 
     def __genXYcoordinates(self, type:str, diam, center_xy, nb_nrn=0, nrn_diam=0.0):
         """Generate XY coordinates
@@ -169,18 +197,19 @@ class OrgStructures:
         dist2c  = []
 
         if   type == "random":
-            for _ in range(nb_nrn):
-                u       = np.random.rand() + np.random.rand()
-                alpha   = 2 * math.pi * np.random.rand()
-                # r       = (diam/2) * math.sqrt(np.random.rand())
-                r       = (diam/2) * (2 - u if u > 1 else u)
-                xt      = r * math.cos(alpha) + center_xy[0]
-                yt      = r * math.sin(alpha) + center_xy[1]
-                dc      = math.sqrt((center_xy[0]-xt)**2 + (center_xy[1]-yt)**2)/(diam/2)
-
-                x.append( xt )
-                y.append( yt )
-                dist2c.append( dc )
+            # Draws of all neurons at once, in the order of per neuron draws (u1, u2, alpha)
+            rnd     = self.rng.rand(nb_nrn, 3)
+            u       = rnd[:, 0] + rnd[:, 1]
+            alpha   = 2 * math.pi * rnd[:, 2]
+            # r       = (diam/2) * np.sqrt(rnd)
+            r       = (diam/2) * np.where(u > 1, 2 - u, u)
+            xt      = r * np.cos(alpha) + center_xy[0]
+            yt      = r * np.sin(alpha) + center_xy[1]
+            dc      = np.sqrt((center_xy[0]-xt)**2 + (center_xy[1]-yt)**2)/(diam/2)
+
+            x       = xt.tolist()
+            y       = yt.tolist()
+            dist2c  = dc.tolist()
 
         elif type == "radius":
             ring_diam   = diam
@@ -226,13 +255,7 @@ class OrgStructures:
 
         For now independently from their position in the organoid.
         """
-        tnrn = []
-        for i in range (nb_nrn):
-            if np.random.rand() < inh_ratio:
-                tnrn.append(NRN_INH)
-            else:
-                tnrn.append(NRN_EXC)
-        return tnrn
+        return np.where(self.rng.rand(nb_nrn) < inh_ratio, NRN_INH, NRN_EXC).tolist()
 
     def __genSynConFromFile(self, fpath):
         tsyn_row    = []
@@ -244,9 +267,8 @@ class OrgStructures:
                 tsyn.append(line.split(','))
         return tsyn
 
-    def __ruleSynConSingle(self, tsyn, ndest, nsrc, tnrn_all, x_all, y_all, org_diam, pcon):
+    def __ruleSynConSingle(self, ndest, nsrc, x_all, y_all, org_diam, pcon):
         """Generate synaptic connection inside organoid based on distance between neurons
-        :param tsyn: Array of synaptic types for all organoids
         :param ndest: List of destination neuron index
         :param nsrc: List of source neuron index
         :param x: Array of neuron coordinates x
@@ -259,27 +281,14 @@ class OrgStructures:
         Here, ratio is proportional to relative distance between neurons compared to the organoid diameter
         """
 
-        cnt = 0
-        for dest in ndest:
-            for src in nsrc:
-                if dest != src:
-                    # Calculate distance between neurons
-                    d = math.sqrt( (x_all[src]-x_all[dest])**2 + (y_all[src]-y_all[dest])**2 )
-                    
-                    # Normalize probability (the closer, the higher)
-                    p = pcon*(1 - d/org_diam)
-        
-                    if (np.random.rand() < p):
-                        cnt += 1
-                        if tnrn_all[src] == NRN_INH:
-                            tsyn[dest][src] = SYN_INH
-                        elif tnrn_all[src] == NRN_EXC:
-                            tsyn[dest][src] = SYN_EXC
-        return tsyn
+        # Normalize probability (the closer, the higher)
+        def prob(d):
+            return pcon*(1 - d/org_diam)
 
-    def __ruleSynConAssembloid(self, tsyn, ndest, nsrc, tnrn_all, x_all, y_all, max_d, pcon):
+        return self.__getGridIndex(x_all, y_all, org_diam).drawEdges(ndest, nsrc, org_diam, prob, self.rng)
+
+    def __ruleSynConAssembloid(self, ndest, nsrc, x_all, y_all, max_d, pcon):
         """Generate synaptic connection for assembloid (prioritize connection to close by neurons)
-        :param tsyn: Array of synaptic types for all organoids
         :param ndest: List of destination neuron index
         :param nsrc: List of source neuron index
         :param x: Array of neuron coordinates x
@@ -292,58 +301,75 @@ class OrgStructures:
         Here, ratio is proportional to relative distance of the neuron compared ot max_d
         """
 
-        cnt = 0
-        for dest in ndest:
-            for src in nsrc:
-                if dest != src:
-                    # Calculate distance between neurons
-                    d = math.sqrt( (x_all[src]-x_all[dest])**2 + (y_all[src]-y_all[dest])**2 )
-                    
-                    # Normalize probability (the closer, the higher)
-                    p = pcon*(1 - d/max_d)
-        
-                    if (np.random.rand() < p):
-                        cnt += 1
-                        if tnrn_all[src] == NRN_INH:
-                            tsyn[dest][src] = SYN_INH
-                        elif tnrn_all[src] == NRN_EXC:
-                            tsyn[dest][src] = SYN_EXC
-        return tsyn
+        # Normalize probability (the closer, the higher)
+        def prob(d):
+            return pcon*(1 - d/max_d)
 
-    def __ruleSynConConnectoid(self, tsyn, ndest, nsrc, tnrn_all, x_all, y_all, dist2c_all, pcon):
+        return self.__getGridIndex(x_all, y_all, max_d).drawEdges(ndest, nsrc, max_d, prob, self.rng)
+
+    def __ruleSynConConnectoid(self, ndest, nsrc, dist2c_all, pcon):
         """Generate synaptic connection inside organoid based on distance between neurons
-        :param tsyn: Array of synaptic types for all organoids
         :param ndest: List of destination neuron index
         :param nsrc: List of source neuron index
-        :param x: Array of neuron coordinates x
-        :param y: Array of neuron coordinates y
-        :param org_diam: Organoid diameter (µm)
+        :param dist2c_all: Relative distance of neurons to center of their organoid
         :param pcon: Maximum connection probability
         
         Generate synaptic connection inside organoid based on distance between neurons.
         Neurons on the outside of the orgnaoid (higher relative distance to center) have higher connection probabilities
         Here, ratio is proportional to relative distance between neurons compared to the organoid diameter
         """
+        dist2c_all = np.asarray(dist2c_all)
 
-        for dest in ndest:
-            for src in nsrc:
-                if dest != src:
-                    # Normalize probability (the further from center, i.e. on the edge, the higher connectivity)
-                    # p = pcon*(math.exp((dist2c_all[src] + dist2c_all[dest])/2)/math.exp(1)) # exponential
-                    p = pcon*((dist2c_all[src] + dist2c_all[dest])/2) # linear
-        
-                    if (np.random.rand() < p):
-                        if tnrn_all[src] == NRN_INH:
-                            tsyn[dest][src] = SYN_INH
-                        elif tnrn_all[src] == NRN_EXC:
-                            tsyn[dest][src] = SYN_EXC
-        return tsyn
+        # Normalize probability (the further from center, i.e. on the edge, the higher connectivity)
+        def prob(dest, src):
+            # return pcon*(np.exp((dist2c_all[src] + dist2c_all[dest])/2)/math.exp(1)) # exponential
+            return pcon*((dist2c_all[src] + dist2c_all[dest])/2) # linear
+
+        return self.__drawSynCon(ndest, nsrc, prob)
+
+    def __getGridIndex(self, x_all, y_all, cell_size):
+        """Get grid index of all neurons (built once per cell size)"""
+        if cell_size not in self.grids:
+            self.grids[cell_size] = GridIndex(x_all, y_all, cell_size)
+        return self.grids[cell_size]
+
+    def __drawSynCon(self, ndest, nsrc, prob):
+        """Draw synaptic connections from connection probabilities of all neuron pairs
+
+        :param ndest: List of destination neuron index
+        :param nsrc: List of source neuron index
+        :param prob: Function of connection probability of (dest [block, 1], src [1, source]) index arrays
+        :returns: [destination neurons, source neurons] of synapses sorted by destination then source
+
+        Pairs are processed by blocks of destination neurons with one draw per block for
+        all pairs but autapses, in the order of a loop over destinations then sources.
+        """
+        ndest   = np.asarray(ndest, dtype=int)
+        nsrc    = np.asarray(nsrc, dtype=int)
+        step    = max(1, SYNCON_BLOCK_SIZE//max(1, len(nsrc)))
+        edges   = [[], []]
+
+        for k in range(0, len(ndest), step):
+            dest            = ndest[k:k+step, None]
+            p               = prob(dest, nsrc[None, :])
+            pairs           = dest != nsrc[None, :]
+            rnd             = np.full(pairs.shape, np.inf)
+            rnd[pairs]      = self.rng.rand(np.count_nonzero(pairs))
+            [row, col]      = np.nonzero(rnd < p)
+            edges[0].append(dest[row, 0])
+            edges[1].append(nsrc[col])
+
+        if not edges[0]:
+            return [np.zeros(0, dtype=int), np.zeros(0, dtype=int)]
+        dest    = np.concatenate(edges[0])
+        src     = np.concatenate(edges[1])
+        order   = np.lexsort((src, dest))
+        return [dest[order], src[order]]
 
     def __genGroupSynWeights(self, ndest, nsrc, wsyn, w):
-        """Apply synaptic weight to a group"""
-        for dest in ndest:
-            for src in nsrc:
-                wsyn[dest][src] = w
+        """Apply synaptic weight to synapses of a group"""
+        sel         = np.isin(self.syn_dest, ndest) & np.isin(self.syn_src, nsrc)
+        wsyn[sel]   = w
         return wsyn
 
     # Plotters -------------------------------------------------------------------------
@@ -369,10 +395,10 @@ class OrgStructures:
         # Synaptic connections
         elif type == "syn_con":
             if (org_src != -1) and (org_dest != -1):
-                self.__plotSynCon(self.nlist[org_dest], self.nlist[org_src], self.tsyn, self.x_all, self.y_all, self.tnrn_all,  
+                self.__plotSynCon(self.nlist[org_dest], self.nlist[org_src], self.x_all, self.y_all, self.tnrn_all,  
                                 "Synaptic connection organoid {} to organoid {}".format(org_src, org_dest))
             else:
-                self.__plotSynCon(self.nlist_all, self.nlist_all, self.tsyn, self.x_all, self.y_all, self.tnrn_all,
+                self.__plotSynCon(self.nlist_all, self.nlist_all, self.x_all, self.y_all, self.tnrn_all,
                                 "All synaptic connections")
         
         plt.show(block=block)
@@ -398,7 +424,7 @@ class OrgStructures:
 
         plt.show(block=False)
     
-    def __plotSynCon(self, ndest, nsrc, tsyn, x_all, y_all, tnrn_all, title=""):
+    def __plotSynCon(self, ndest, nsrc, x_all, y_all, tnrn_all, title=""):
         """Plot synaptic connections"""
         fig = plt.figure("Print XY coordinates: " + title)
         fig.suptitle(title, fontsize=20)
@@ -410,32 +436,45 @@ class OrgStructures:
         plt.scatter(x_all, y_all, label= ",", color=colors, marker= ".", s=10)
 
         # Connections
-        cnt = 0
-        for dest in ndest:
-            for src in nsrc:
-                if tsyn[dest][src] != SYN_NONE:                    
-                    if   tnrn_all[src] == NRN_INH: linecolor = COLOR_INH
-                    elif tnrn_all[src] == NRN_EXC: linecolor = COLOR_EXC
-                    else:                          linecolor = "black"
-                    plt.plot([x_all[src], x_all[dest]], [y_all[src], y_all[dest]], color=linecolor, linewidth=0.1)
+        sel = np.isin(self.syn_dest, ndest) & np.isin(self.syn_src, nsrc)
+        for (dest, src) in zip(self.syn_dest[sel].tolist(), self.syn_src[sel].tolist()):
+            if   tnrn_all[src] == NRN_INH: linecolor = COLOR_INH
+            elif tnrn_all[src] == NRN_EXC: linecolor = COLOR_EXC
+            else:                          linecolor = "black"
+            plt.plot([x_all[src], x_all[dest]], [y_all[src], y_all[dest]], color=linecolor, linewidth=0.1)
         plt.show(block=False)
 
     # Getters -------------------------------------------------------------------------
 
+    def getSynapses(self):
+        """Get synapses in SNN-HH encoding
+
+        :returns: [destination neurons, source neurons, types, weights] sorted by destination then source
+        """
+        codes   = np.array([syncode[c] for c in range(max(syncode)+1)])
+        tsyn    = codes[np.where(np.asarray(self.tnrn_all, dtype=int)[self.syn_src] == NRN_INH, SYN_INH, SYN_EXC)]
+
+        wsyn    = np.zeros(len(self.syn_dest))
+        for (org_dest, org_src, weight) in self.wrules:
+            if (org_src != -1) and (org_dest != -1):
+                wsyn = self.__genGroupSynWeights(self.nlist[org_dest], self.nlist[org_src], wsyn, weight)
+            else:
+                wsyn.fill(weight)
+        return [self.syn_dest, self.syn_src, tsyn, wsyn]
+
     def getSynTypes(self):
-        """Get types of synapses in SNN-HH encoding"""
-        tsyn_row_str = []
-        tsyn_str = []
-        for dest in range(self.nb_nrn):
-            for src in range(self.nb_nrn):
-                tsyn_row_str.append(syncode[self.tsyn[dest][src]])
-            tsyn_str.append(tsyn_row_str)
-            tsyn_row_str = []
-        return tsyn_str
+        """Get types of synapses in SNN-HH encoding [dest, src] (dense, see getSynapses)"""
+        [dest, src, tsyn, _] = self.getSynapses()
+        types = np.full([self.nb_nrn, self.nb_nrn], syncode[SYN_NONE], dtype=np.result_type(tsyn.dtype, np.array(syncode[SYN_NONE]).dtype))
+        types[dest, src] = tsyn
+        return types
 
     def getSynWeights(self):
-        """Get weight of synapses"""
-        return self.wsyn
+        """Get weight of synapses [dest, src] (dense, see getSynapses)"""
+        [dest, src, _, wsyn] = self.getSynapses()
+        weights = np.zeros([self.nb_nrn, self.nb_nrn])
+        weights[dest, src] = wsyn
+        return weights
 
     def getNeuronTypes(self):
         """Get neuron types in SNN-HH encoding"""
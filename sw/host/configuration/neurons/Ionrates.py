@@ -12,6 +12,7 @@
 # 
 # @details 
 # > **05 Dec 2022** : file creation (RB)
+# > **17 Oct 2026** : rate tables evaluated on whole voltage ramp as arrays (RB)
 
 from math import exp, ceil, pi, tanh, cosh
 import numpy as np
@@ -25,6 +26,17 @@ RATE_TABLE_SIZE     = 2048
 RATE_STEP           = abs(RATE_VMIN - RATE_VMAX)/RATE_TABLE_SIZE
 v_ramp              = linspace(RATE_VMIN, RATE_VMAX, RATE_TABLE_SIZE)
 
+def rate_limit(x, rate, limit):
+    """Replace rate by its limit where x = 0 (removable singularity 0/0 of x/(exp(x/k)-1) rates)
+
+    :param x: Numerator of rate vanishing at singularity
+    :param rate: Rate evaluated (NaN at singularity)
+    :param float limit: Limit of rate at singularity
+    """
+    if np.ndim(x) == 0:
+        return limit if x == 0 else rate
+    return np.where(x == 0, limit, rate)
+
 class Ionrates:
     def __init__(self) -> None:
         """Initialize"""
@@ -64,6 +76,7 @@ class Ionrates:
         :param bool gen_fpga_sim_files: Generate rates files for FPGA simulations
         :param int fp_width: Width of sfixed
         :param int fp_dec: Bit coding decimal part of sfixed
+        :returns: [m_rates1, m_rates2, h_rates1, h_rates2] as arrays [ionic channel, voltage address]
         """
         if   nrn_model == "pospischil":
             model = Pospischil()
@@ -84,54 +97,45 @@ class Ionrates:
                 r1_hines    = lambda alpha, beta, dt: 1-dt*(alpha+beta)
                 r2_hines    = lambda alpha, beta, dt: dt*alpha
 
-            mNa_r1, mNa_r2, hNa_r1, hNa_r2  = ([] for _ in range(4))
-            mK_r1, mK_r2                    = ([] for _ in range(2))
-            mM_r1, mM_r2                    = ([] for _ in range(2))
-            mL_r1, mL_r2, hL_r1, hL_r2      = ([] for _ in range(4))
-            mT_r1, mT_r2, hT_r1, hT_r2      = ([] for _ in range(4))
-            ones                            = [1.0]*len(v_ramp)
-            m_rates1, m_rates2              = ([] for _ in range(2))
-            h_rates1, h_rates2              = ([] for _ in range(2))
-
             ###########################################################################
 
 
-            # Generate rate tables
-            for v in v_ramp:
-                # Na
-                mNa_r1.append( r1_hines(model.alpha_m_Na(v), model.beta_m_Na(v), dt))
-                mNa_r2.append( r2_hines(model.alpha_m_Na(v), model.beta_m_Na(v), dt))
-                hNa_r1.append( r1_hines(model.alpha_h_Na(v), model.beta_h_Na(v), dt))
-                hNa_r2.append( r2_hines(model.alpha_h_Na(v), model.beta_h_Na(v), dt))
-                # K
-                mK_r1.append( r1_hines(model.alpha_m_K(v), model.beta_m_K(v), dt) )
-                mK_r2.append( r2_hines(model.alpha_m_K(v), model.beta_m_K(v), dt) )
-                # M
-                mM_r1.append( r1(model.xinf_M(v), model.taux_M(v), dt) )
-                mM_r2.append( r2(model.xinf_M(v), model.taux_M(v), dt) )
-                # L
-                mL_r1.append( r1_hines(model.alpha_m_L(v), model.beta_m_L(v), dt))
-                mL_r2.append( r2_hines(model.alpha_m_L(v), model.beta_m_L(v), dt))
-                hL_r1.append( r1_hines(model.alpha_h_L(v), model.beta_h_L(v), dt))
-                hL_r2.append( r2_hines(model.alpha_h_L(v), model.beta_h_L(v), dt))
-                # T
-                mT_r1.append( 0.0 )
-                mT_r2.append( model.xinf_T_m(v) )
-                hT_r1.append( r1(model.xinf_T_h(v), model.taux_T_h(v), dt) )
-                hT_r2.append( r2(model.xinf_T_h(v), model.taux_T_h(v), dt) )
-
-                
-            m_rates1.append(mNa_r1) ; m_rates2.append(mNa_r2)   # Na
-            m_rates1.append(mK_r1)  ; m_rates2.append(mK_r2)    # K
-            m_rates1.append(mM_r1)  ; m_rates2.append(mM_r2)    # M
-            m_rates1.append(mL_r1)  ; m_rates2.append(mL_r2)    # L
-            m_rates1.append(mT_r1)  ; m_rates2.append(mT_r2)    # T
-        
-            h_rates1.append(hNa_r1) ; h_rates2.append(hNa_r2)   # Na
-            h_rates1.append(ones)   ; h_rates2.append(ones)     # K
-            h_rates1.append(ones)   ; h_rates2.append(ones)     # M
-            h_rates1.append(hL_r1)  ; h_rates2.append(hL_r2)    # L
-            h_rates1.append(hT_r1)  ; h_rates2.append(hT_r2)    # T
+            # Generate rate tables (rate functions evaluated on whole voltage ramp)
+            v       = v_ramp
+            ones    = np.ones(len(v_ramp))
+            # Na
+            [alpha, beta]   = [model.alpha_m_Na(v), model.beta_m_Na(v)]
+            mNa_r1          = r1_hines(alpha, beta, dt)
+            mNa_r2          = r2_hines(alpha, beta, dt)
+            [alpha, beta]   = [model.alpha_h_Na(v), model.beta_h_Na(v)]
+            hNa_r1          = r1_hines(alpha, beta, dt)
+            hNa_r2          = r2_hines(alpha, beta, dt)
+            # K
+            [alpha, beta]   = [model.alpha_m_K(v), model.beta_m_K(v)]
+            mK_r1           = r1_hines(alpha, beta, dt)
+            mK_r2           = r2_hines(alpha, beta, dt)
+            # M
+            [xinf, taux]    = [model.xinf_M(v), model.taux_M(v)]
+            mM_r1           = r1(xinf, taux, dt)
+            mM_r2           = r2(xinf, taux, dt)
+            # L
+            [alpha, beta]   = [model.alpha_m_L(v), model.beta_m_L(v)]
+            mL_r1           = r1_hines(alpha, beta, dt)
+            mL_r2           = r2_hines(alpha, beta, dt)
+            [alpha, beta]   = [model.alpha_h_L(v), model.beta_h_L(v)]
+            hL_r1           = r1_hines(alpha, beta, dt)
+            hL_r2           = r2_hines(alpha, beta, dt)
+            # T
+            mT_r1           = np.zeros(len(v_ramp))
+            mT_r2           = model.xinf_T_m(v)
+            [xinf, taux]    = [model.xinf_T_h(v), model.taux_T_h(v)]
+            hT_r1           = r1(xinf, taux, dt)
+            hT_r2           = r2(xinf, taux, dt)
+
+            m_rates1 = np.stack([mNa_r1, mK_r1, mM_r1, mL_r1, mT_r1])   # Na, K, M, L, T
+            m_rates2 = np.stack([mNa_r2, mK_r2, mM_r2, mL_r2, mT_r2])
+            h_rates1 = np.stack([hNa_r1, ones,  ones,  hL_r1, hT_r1])
+            h_rates2 = np.stack([hNa_r2, ones,  ones,  hL_r2, hT_r2])
 
             writeFPGASimFile(gen_fpga_sim_files, "r1m_Na.txt", mNa_r1, len(v_ramp), SFI.ION.WIDTH, SFI.ION.DEC)
             writeFPGASimFile(gen_fpga_sim_files, "r2m_Na.txt", mNa_r2, len(v_ramp), SFI.ION.WIDTH, SFI.ION.DEC)
@@ -285,57 +289,65 @@ class Pospischil:
             
     # Na ---------------------------------------------------------------------
     # m
-    def alpha_m_Na(self, v) -> np.longdouble: return ((-0.32*(v-self.V_T-13)) / (exp(-(v-self.V_T-13)/4)-1))
-    def  beta_m_Na(self, v) -> np.longdouble: return ((+0.28*(v-self.V_T-40)) / (exp((v-self.V_T-40)/5)-1))
+    def alpha_m_Na(self, v) -> np.longdouble:
+        with np.errstate(invalid="ignore"):
+            return rate_limit(v-self.V_T-13, ((-0.32*(v-self.V_T-13)) / (np.exp(-(v-self.V_T-13)/4)-1)), 0.32*4)
+    def  beta_m_Na(self, v) -> np.longdouble:
+        with np.errstate(invalid="ignore"):
+            return rate_limit(v-self.V_T-40, ((+0.28*(v-self.V_T-40)) / (np.exp((v-self.V_T-40)/5)-1)), 0.28*5)
     def  calc_m_Na(self, v, mpre, dt) -> np.float64: 
         dx = self.alpha_m_Na(v)*(1-mpre) - self.beta_m_Na(v)*mpre
         return forwardEuler(dx, mpre, dt)
     # h
-    def alpha_h_Na(self, v)-> np.longdouble: return 0.128*exp(-(v-self.V_T-17)/18)
-    def  beta_h_Na(self, v)-> np.longdouble: return 4/(1+exp(-(v-self.V_T-40)/5))
+    def alpha_h_Na(self, v)-> np.longdouble: return 0.128*np.exp(-(v-self.V_T-17)/18)
+    def  beta_h_Na(self, v)-> np.longdouble: return 4/(1+np.exp(-(v-self.V_T-40)/5))
     def  calc_h_Na(self, v, hpre, dt)-> np.float64: 
         dx = self.alpha_h_Na(v)*(1-hpre) - self.beta_h_Na(v)*hpre
         return forwardEuler(dx, hpre, dt)
 
     # K ---------------------------------------------------------------------
     # m
-    def alpha_m_K(self, v)-> np.longdouble: return (-0.035*(v-self.V_T-15)) / (exp(-(v-self.V_T-15)/5)-1)
-    def  beta_m_K(self, v)-> np.longdouble: return 0.5*exp(-(v-self.V_T-10)/40)
+    def alpha_m_K(self, v)-> np.longdouble:
+        with np.errstate(invalid="ignore"):
+            return rate_limit(v-self.V_T-15, (-0.035*(v-self.V_T-15)) / (np.exp(-(v-self.V_T-15)/5)-1), 0.035*5)
+    def  beta_m_K(self, v)-> np.longdouble: return 0.5*np.exp(-(v-self.V_T-10)/40)
     def  calc_m_K(self, v, mpre, dt)-> np.float64:
         dx = self.alpha_m_K(v)*(1-mpre) - self.beta_m_K(v)*mpre
         return forwardEuler(dx, mpre, dt)
 
     # M ---------------------------------------------------------------------
     # m_M
-    def   xinf_M(self, v)-> np.longdouble: return 1.0/(1.0+exp(-(v+35.0)/10.0))
-    def   taux_M(self, v)-> np.longdouble: return self.TAU_MAX/(3.3*exp((v+35.0)/20.0) + exp(-(v+35.0)/20.0))
+    def   xinf_M(self, v)-> np.longdouble: return 1.0/(1.0+np.exp(-(v+35.0)/10.0))
+    def   taux_M(self, v)-> np.longdouble: return self.TAU_MAX/(3.3*np.exp((v+35.0)/20.0) + np.exp(-(v+35.0)/20.0))
     def calc_m_M(self, v, mpre, dt)-> np.float64:
         dx = (self.xinf_M(v)-mpre)/self.taux_M(v)
         return forwardEuler(dx, mpre, dt)
 
     # L ---------------------------------------------------------------------
     # m (q)
-    def alpha_m_L(self, v)-> np.longdouble: return 0.055*(-27-v) / (exp((-27-v)/3.8) - 1)
-    def  beta_m_L(self, v)-> np.longdouble: return 0.94*exp((-75-v)/17)
+    def alpha_m_L(self, v)-> np.longdouble:
+        with np.errstate(invalid="ignore"):
+            return rate_limit(-27-v, 0.055*(-27-v) / (np.exp((-27-v)/3.8) - 1), 0.055*3.8)
+    def  beta_m_L(self, v)-> np.longdouble: return 0.94*np.exp((-75-v)/17)
     def  calc_m_L(self, v, mpre, dt)-> np.float64: 
         dx = self.alpha_m_L(v)*(1-mpre) - self.beta_m_L(v)*mpre
         return forwardEuler(dx, mpre, dt)
     # h (r)
-    def alpha_h_L(self,v)-> np.longdouble: return 0.000457*exp((-13.0-v)/50.0)
-    def  beta_h_L(self,v)-> np.longdouble: return 0.0065 / (exp((-15.0-v)/28.0) + 1.0)
+    def alpha_h_L(self,v)-> np.longdouble: return 0.000457*np.exp((-13.0-v)/50.0)
+    def  beta_h_L(self,v)-> np.longdouble: return 0.0065 / (np.exp((-15.0-v)/28.0) + 1.0)
     def  calc_h_L(self, v, hpre, dt)-> np.float64:
         dx = self.alpha_h_L(v)*(1-hpre) - self.beta_h_L(v)*hpre
         return forwardEuler(dx, hpre, dt)
     
     # T ---------------------------------------------------------------------
     # m (directly correspond to r2)
-    def xinf_T_m(self, v)-> np.longdouble: return 1 / (1 + exp(-(v+self.V_X+57)/6.2))
+    def xinf_T_m(self, v)-> np.longdouble: return 1 / (1 + np.exp(-(v+self.V_X+57)/6.2))
     def calc_m_T(self, v, mpre, dt) -> np.float64:
         dx = self.xinf_T_m(v)
         return dx
     # h
-    def xinf_T_h(self, v)-> np.longdouble: return 1 / (1 + exp((v + self.V_X + 81)/4))
-    def taux_T_h(self, v)-> np.longdouble: return (30.8 + ((211.4 + exp((v+self.V_X+113.2)/5)) / (1 + exp((v+self.V_X+84)/3.2)))) * (1/(3**1.2))
+    def xinf_T_h(self, v)-> np.longdouble: return 1 / (1 + np.exp((v + self.V_X + 81)/4))
+    def taux_T_h(self, v)-> np.longdouble: return (30.8 + ((211.4 + np.exp((v+self.V_X+113.2)/5)) / (1 + np.exp((v+self.V_X+84)/3.2)))) * (1/(3**1.2))
     def calc_h_T(self, v, hpre, dt) -> np.float64: 
         dx = (self.xinf_T_h(v)-hpre)/self.taux_T_h(v)
         return forwardEuler(dx, hpre, dt)
\ No newline at end of file
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# @title      Sparse synapse table
+# @file       SynTable.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Synapses of a configuration stored as (dest, src, type, weight)
+#
+# @details
+# Synapses are kept sorted by destination then source neuron with at most one
+# synapse per pair of neurons. Types are receptor names of the hardware
+# configuration ("ampa", "nmda", "gabaa", "gabab"), pairs without synapse
+# ("x") are not stored. The dense layout [dest, src] of the text configuration
+# file is only built row by row when written (see iterRows).
+#
+# > **17 Oct 2026** : file creation
+
+import numpy as np
+
+SYN_TABLE_NONE = "x" # Type of pairs without synapse
+
+class SynTable:
+    def __init__(self, nb_nrn:int, dest=None, src=None, tsyn=None, wsyn=None) -> None:
+        """Initialize synapse table
+
+        Synapses given several times for a same pair of neurons keep the last one.
+
+        :param int nb_nrn: Number of neurons
+        :param dest: Destination neuron of synapses
+        :param src: Source neuron of synapses
+        :param tsyn: Receptor type of synapses ("x" entries are dropped)
+        :param wsyn: Weight of synapses
+        """
+        self.nb_nrn = nb_nrn
+        dest    = np.zeros(0, dtype=np.int64) if dest is None else np.asarray(dest, dtype=np.int64).ravel()
+        src     = np.zeros(0, dtype=np.int64) if src  is None else np.asarray(src,  dtype=np.int64).ravel()
+        tsyn    = np.broadcast_to(np.asarray(SYN_TABLE_NONE if tsyn is None else tsyn, dtype=str), dest.shape)
+        wsyn    = np.broadcast_to(np.asarray(0.0 if wsyn is None else wsyn, dtype=np.float64), dest.shape)
+
+        # Last synapse of each pair, sorted by destination then source
+        key             = dest*nb_nrn + src
+        [_, last]       = np.unique(key[::-1], return_index=True)
+        sel             = len(key) - 1 - last
+        sel             = sel[tsyn[sel] != SYN_TABLE_NONE]
+        self.dest       = dest[sel]
+        self.src        = src[sel]
+        self.tsyn       = np.array(tsyn[sel], dtype=str)
+        self.wsyn       = np.array(wsyn[sel])
+        self.indptr     = np.concatenate(([0], np.cumsum(np.bincount(self.dest, minlength=nb_nrn)))).astype(np.int64)
+
+    @classmethod
+    def fromDense(cls, tsyn, wsyn):
+        """Create synapse table from dense types and weights [dest, src]"""
+        tsyn            = np.asarray(tsyn, dtype=str)
+        [dest, src]     = np.nonzero(tsyn != SYN_TABLE_NONE)
+        return cls(len(tsyn), dest, src, tsyn[dest, src], np.asarray(wsyn, dtype=np.float64)[dest, src])
+
+    def toDense(self):
+        """Get dense types and weights [dest, src] (memory of nb_nrn^2 entries)
+
+        :returns: [types, weights]
+        """
+        tsyn = np.full([self.nb_nrn, self.nb_nrn], SYN_TABLE_NONE, dtype=np.result_type(self.tsyn.dtype, "U1"))
+        wsyn = np.zeros([self.nb_nrn, self.nb_nrn])
+        tsyn[self.dest, self.src] = self.tsyn
+        wsyn[self.dest, self.src] = self.wsyn
+        return [tsyn, wsyn]
+
+    def getNnz(self) -> int:
+        """Get number of synapses"""
+        return len(self.dest)
+
+    def getRow(self, dest:int):
+        """Get synapses of a destination neuron
+
+        :returns: [source neurons, types, weights]
+        """
+        [start, stop] = self.indptr[dest:dest+2]
+        return [self.src[start:stop], self.tsyn[start:stop], self.wsyn[start:stop]]
+
+    def getSynapse(self, dest:int, src:int):
+        """Get synapse of a pair of neurons
+
+        :returns: [type, weight] ("x" and 0.0 if no synapse)
+        """
+        [start, stop]   = self.indptr[dest:dest+2]
+        k               = start + np.searchsorted(self.src[start:stop], src)
+        if k < stop and self.src[k] == src:
+            return [str(self.tsyn[k]), float(self.wsyn[k])]
+        return [SYN_TABLE_NONE, 0.0]
+
+    def iterRows(self):
+        """Iterate over destination neurons (including neurons without synapse)
+
+        :returns: Generator of [destination neuron, source neurons, types, weights]
+        """
+        for dest in range(self.nb_nrn):
+            yield [dest] + self.getRow(dest)
@@ -12,6 +12,7 @@
 #
 # @details
 # > **05 Dec 2022** : file creation (RB)
+# > **17 Oct 2026** : synaptic rate tables evaluated on whole ramps as arrays (RB)
 
 from math import exp, ceil, pi, tanh, cosh
 import numpy as np
@@ -135,12 +136,12 @@ class Destexhe:
         T_max = 1.0
         K_p = 5
         V_p = 2
-        return T_max/(1+exp(-(v-V_p)/K_p))
+        return T_max/(1+np.exp(-(v-V_p)/K_p))
 
     def B_v(self, v):
         """Calculate B for destexhe synapses"""
         mg2 = 1 # mM
-        return 1/(1+exp(-0.062*v)*(mg2/3.57))
+        return 1/(1+np.exp(-0.062*v)*(mg2/3.57))
 
     def Sn_GABAb(self, s):
         n   = self.psyn_GABAb_n
@@ -152,32 +153,26 @@ class Destexhe:
         return self.SYNRATE_DEPTH
 
     def getSynRates(self, gen_fpga_sim_files:bool):
-        """Get synaptic rate tables"""
-        l_Bv, l_Tv, synrates = ([] for i in range(3))
-        l_gabab_sn = []
+        """Get synaptic rate tables
+
+        :returns: Array [Bv, Tv, Sn GABAb; address]
+        """
         v_ramp = linspace(      self.SYNRATE_VMIN,       self.SYNRATE_VMAX,        self.SYNRATE_DEPTH)
         s_ramp = linspace(self.TABLE_SN_GABAB_MIN, self.TABLE_SN_GABAB_MAX, self.TABLE_SN_GABAB_DEPTH)
 
-        for v in v_ramp:
-            l_Bv.append(self.B_v(v))
-            l_Tv.append(self.T_v(v))
-
-        for s in s_ramp:
-            l_gabab_sn.append(self.Sn_GABAb(s))
+        l_Bv        = self.B_v(v_ramp)
+        l_Tv        = self.T_v(v_ramp)
+        l_gabab_sn  = self.Sn_GABAb(s_ramp)
 
         writeFPGASimFile(gen_fpga_sim_files, "rate_Bv.txt",             l_Bv, len(v_ramp),        self.SYNRATE_FP_WIDTH_BV, self.SYNRATE_FP_DEC_BV)
         writeFPGASimFile(gen_fpga_sim_files, "rate_Tv.txt",             l_Tv, len(v_ramp),        self.SYNRATE_FP_WIDTH_TV, self.SYNRATE_FP_DEC_TV)
         writeFPGASimFile(gen_fpga_sim_files, "rate_sn_gabab.txt", l_gabab_sn, len(s_ramp), self.TABLE_SN_GABAB_FP_WIDTH, self.TABLE_SN_GABAB_FP_DEC)
 
-        synrates.append(l_Bv)
-        synrates.append(l_Tv)
-        synrates.append(l_gabab_sn)
-
-        return synrates
+        return np.stack([l_Bv, l_Tv, l_gabab_sn])
 
     # Synaptic currents #########################################
     def getPsyn(self, dt):
-        ret_psyn = self.psyn
+        ret_psyn = list(self.psyn)
         ret_psyn[self.PID["GABAb_K3"]] *= dt
         ret_psyn[self.PID["GABAb_K4"]] *= dt
         return ret_psyn
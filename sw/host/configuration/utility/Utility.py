@@ -1,3 +1,4 @@
+import numpy as np
 from fxpmath import Fxp
 
 class SFI_ENC:
@@ -29,6 +30,26 @@ class SFI:
     SN_GABAB_OUT = SFI_ENC(width = 18, dec =  16)
     PMUL_GSYN    = SFI_ENC(width = 18, dec =  16)
 
+def sfiQuantize(val, sfi:SFI_ENC):
+    """Quantize values to signed fixed point integers (value*2**DEC)
+
+    Rounding toward zero and saturation on WIDTH bits as Fxp default behavior.
+    """
+    q = np.trunc(np.asarray(val, dtype=np.float64) * 2.0**sfi.DEC)
+    return np.clip(q, -2**(sfi.WIDTH-1), 2**(sfi.WIDTH-1)-1).astype(np.int64)
+
+def sfiRequantize(q, dec, sfi:SFI_ENC):
+    """Requantize signed fixed point integers with dec fractional bits to another encoding
+
+    Rounding toward zero and saturation on WIDTH bits as Fxp default behavior.
+    """
+    shift = dec - sfi.DEC
+    if shift > 0:
+        q = np.where(q < 0, -((-q) >> shift), q >> shift)
+    else:
+        q = q << -shift
+    return np.clip(q, -2**(sfi.WIDTH-1), 2**(sfi.WIDTH-1)-1)
+
 def writeFPGASimFile(gen_fpga_sim_files, fname, rate, length, FP_WIDTH, FP_DEC):
     """Write FPGA simulation files"""
     if gen_fpga_sim_files:
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+# @title      Pytest configuration of host software
+# @file       conftest.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Makes packages of host software importable from tests (run pytest from sw/host)
+#
+# @details
+# > **17 Oct 2026** : file creation
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+# @title      Benchmark emulation performance
+# @file       bench_emulator.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Standard workloads timing configuration generation and emulation
+#
+# @details
+# Each workload (model, number of neurons, equations, engine, context storage)
+# runs in a fresh process so that peak memory is measured per workload.
+# Results are saved as JSON with the commit they were measured on and can be
+# compared against a previous run.
+#
+# > **17 Oct 2026** : file creation
+# > **17 Oct 2026** : speedup of partitioned emulation
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import subprocess
+import contextlib
+import multiprocessing as mp
+import numpy as np
+
+from configuration.gen_config       import NetwConfParams, gen_config
+from configuration.file_managers.HwConfigFile   import HwConfigFile
+from configuration.file_managers.HwConfigBin    import write_hwconfig_bin, read_hwconfig_bin, HWCFG_BIN_EXT
+from configuration.utility.settings import _SOFTWARE_VERSION
+from emulation.hh_snn.SnnEmulator   import SnnEmulator, ENGINE_SCALAR, ENGINE_VECTOR
+from emulation.hh_snn.ParallelEmulator import ParallelEmulator
+
+# Standard workloads
+BENCH_NB_NRN    = [4, 64, 512, 1024]
+BENCH_MODELS    = ["custom", "single", "connectoid"]
+BENCH_FPGA_EMU  = [False, True]
+BENCH_CONTEXT   = [False, True]
+BENCH_ENGINES   = [ENGINE_VECTOR]
+BENCH_WORKERS   = [1]
+
+def get_workloads(nb_nrn:list=BENCH_NB_NRN, models:list=BENCH_MODELS, fpga_emu:list=BENCH_FPGA_EMU,
+                  store_context:list=BENCH_CONTEXT, engines:list=BENCH_ENGINES, nb_workers:list=BENCH_WORKERS) -> list:
+    """Get workloads of all combinations of parameters
+
+    Partitioned workloads (more than one worker) are only vector engine without context.
+
+    :param list nb_nrn: Numbers of neurons
+    :param list models: Network models of configuration generation
+    :param list fpga_emu: Emulate FPGA equations (True) or exact equations (False)
+    :param list store_context: Store context of emulation
+    :param list engines: Emulation engines
+    :param list nb_workers: Numbers of worker processes of partitioned emulation
+    """
+    return [{"model": m, "nb_nrn": n, "fpga_emu": f, "engine": e, "store_context": c, "nb_workers": w}
+            for m in models for n in nb_nrn for f in fpga_emu for e in engines for c in store_context for w in nb_workers
+            if w == 1 or (e == ENGINE_VECTOR and not c)]
+
+def get_workload_name(workload:dict) -> str:
+    """Get unique name of workload (key of comparisons between runs)"""
+    name = "{}_{}_{}_{}_{}".format(workload["model"], workload["nb_nrn"],
+                                   "fpga" if workload["fpga_emu"] else "exact",
+                                   workload["engine"],
+                                   "ctx" if workload["store_context"] else "noctx")
+    if workload.get("nb_workers", 1) > 1:
+        name += "_w{}".format(workload["nb_workers"])
+    return name
+
+def get_peak_rss_mb() -> float:
+    """Get peak resident memory of current process (MB)"""
+    import resource
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes on Linux
+    return maxrss/2**20 if sys.platform == "darwin" else maxrss/2**10
+
+def bench_hwconfig_io(hwconfig, fpath_txt:str) -> dict:
+    """Compare size and parse time of text and binary hardware configuration files
+
+    :param HwConfigFile hwconfig: Hardware configuration written at fpath_txt
+    :param str fpath_txt: Path of text configuration file
+    """
+    fpath_bin = os.path.splitext(fpath_txt)[0] + HWCFG_BIN_EXT
+    write_hwconfig_bin(hwconfig, fpath_bin)
+
+    tstart  = time.perf_counter()
+    HwConfigFile.read(fpath_txt)
+    read_txt_s = time.perf_counter() - tstart
+    tstart  = time.perf_counter()
+    read_hwconfig_bin(fpath_bin)
+    read_bin_s = time.perf_counter() - tstart
+
+    return {
+        "hwconfig_txt_mb"   : os.path.getsize(fpath_txt)/2**20,
+        "hwconfig_bin_mb"   : os.path.getsize(fpath_bin)/2**20,
+        "read_txt_s"        : read_txt_s,
+        "read_bin_s"        : read_bin_s,
+    }
+
+def _run_workload(workload:dict, time_s:float, seed:int, queue) -> None:
+    """Worker process generating configuration and emulating a workload"""
+    try:
+        netw_conf_params                    = NetwConfParams()
+        netw_conf_params.model              = workload["model"]
+        netw_conf_params.nb_nrn             = workload["nb_nrn"]
+        netw_conf_params.emulation_time_s   = time_s
+
+        np.random.seed(seed)
+        with tempfile.TemporaryDirectory() as tmp_dir, contextlib.redirect_stdout(io.StringIO()):
+            tstart              = time.perf_counter()
+            [hwconfig, swconfig] = gen_config("bench", netw_conf_params, tmp_dir)
+            gen_config_s        = time.perf_counter() - tstart
+            hwconfig_io         = bench_hwconfig_io(hwconfig, os.path.join(tmp_dir, "hwconfig_bench.txt"))
+        rss_setup_mb = get_peak_rss_mb()
+
+        np.random.seed(seed)
+        nb_workers = workload.get("nb_workers", 1)
+        if nb_workers > 1:
+            # Serial reference with counter-based noise of partitioned emulation
+            snn_ref                 = SnnEmulator(hwconfig, swconfig, False, np.float64, noise_seed=seed)
+            snn_ref.show_progress   = False
+            tstart                  = time.perf_counter()
+            snn_ref.run(np.arange(hwconfig.nb_nrn), workload["fpga_emu"], ENGINE_VECTOR)
+            serial_s                = time.perf_counter() - tstart
+
+            snn_emu                 = ParallelEmulator(hwconfig, swconfig, np.float64, nb_workers, seed)
+            snn_emu.show_progress   = False
+            tstart                  = time.perf_counter()
+            snn_emu.run(np.arange(hwconfig.nb_nrn), workload["fpga_emu"])
+            wall_s                  = time.perf_counter() - tstart
+        else:
+            snn_emu                 = SnnEmulator(hwconfig, swconfig, workload["store_context"], np.float64)
+            snn_emu.show_progress   = False
+            tstart                  = time.perf_counter()
+            snn_emu.run(np.arange(hwconfig.nb_nrn), workload["fpga_emu"], workload["engine"])
+            wall_s                  = time.perf_counter() - tstart
+
+        nb_steps    = len(snn_emu.t) - 1
+        emulated_s  = nb_steps*snn_emu.dt*1e-3
+        result      = dict(workload)
+        result.update({
+            "name"                  : get_workload_name(workload),
+            "nb_steps"              : nb_steps,
+            "emulated_s"            : emulated_s,
+            "gen_config_s"          : gen_config_s,
+            "wall_s"                : wall_s,
+            "steps_per_s"           : nb_steps/wall_s,
+            "neuron_steps_per_s"    : nb_steps*hwconfig.nb_nrn/wall_s,
+            "real_time_factor"      : emulated_s/wall_s,
+            "peak_rss_setup_mb"     : rss_setup_mb,
+            "peak_rss_mb"           : get_peak_rss_mb(),
+            "nb_spikes"             : len(snn_emu.spk_tab),
+        })
+        result.update(hwconfig_io)
+        if nb_workers > 1:
+            result.update({
+                "serial_wall_s"     : serial_s,
+                "speedup"           : serial_s/wall_s,
+                "same_spikes"       : bool(np.array_equal(snn_ref.spk_tab.toArray(), snn_emu.spk_tab.toArray())),
+            })
+        queue.put([result, None])
+    except Exception as e:
+        queue.put([None, repr(e)])
+
+def get_run_info() -> dict:
+    """Get information identifying a benchmark run (commit, machine, versions)"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {
+        "commit"            : commit,
+        "date"              : time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "software_version"  : _SOFTWARE_VERSION,
+        "platform"          : platform.platform(),
+        "processor"         : platform.processor(),
+        "cpu_count"         : os.cpu_count(),
+        "python"            : platform.python_version(),
+        "numpy"             : np.__version__,
+    }
+
+def run_benchmark(workloads:list, time_s:float=0.1, seed:int=0, fpath:str=None) -> dict:
+    """Run workloads, each in a new process, and save results
+
+    Real time factor is the emulated duration over wall time of emulation
+    (above 1 is faster than real time). Configuration generation is timed
+    separately and not included in emulation metrics. Partitioned workloads
+    also report speedup over the serial vector engine with the same noise.
+
+    :param list workloads: Workloads to run (see get_workloads)
+    :param float time_s: Emulated duration of each workload (s)
+    :param int seed: Seed of configuration generation and noise
+    :param str fpath: Path of JSON results (None to not save)
+    """
+    bench   = {"info": get_run_info(), "time_s": time_s, "seed": seed, "results": []}
+    ctx     = mp.get_context("spawn")
+
+    print("{:<36} {:>12} {:>16} {:>10} {:>10} {:>10} {:>16} {:>18}".format("Workload", "steps/s", "neuron-steps/s", "RTF", "RSS (MB)", "gen (s)",
+                                                                           "cfg txt/bin (MB)", "cfg read txt/bin (s)"))
+    for workload in workloads:
+        queue   = ctx.Queue()
+        proc    = ctx.Process(target=_run_workload, args=(workload, time_s, seed, queue))
+        proc.start()
+        [result, err] = queue.get()
+        proc.join()
+
+        if err is not None:
+            print("{:<36} failed: {}".format(get_workload_name(workload), err))
+            continue
+
+        bench["results"].append(result)
+        print("{:<36} {:>12.1f} {:>16.4g} {:>10.4f} {:>10.1f} {:>10.3f} {:>16} {:>18}".format(
+            result["name"], result["steps_per_s"], result["neuron_steps_per_s"],
+            result["real_time_factor"], result["peak_rss_mb"], result["gen_config_s"],
+            "{:.3f}/{:.3f}".format(result["hwconfig_txt_mb"], result["hwconfig_bin_mb"]),
+            "{:.4f}/{:.4f}".format(result["read_txt_s"], result["read_bin_s"])))
+        if "speedup" in result:
+            print("{:<36} speedup {:.3f} over serial vector engine ({} workers, {} CPUs, same spikes: {})".format(
+                "", result["speedup"], result["nb_workers"], bench["info"]["cpu_count"], result["same_spikes"]))
+
+    if fpath is not None:
+        with open(fpath, "w") as f:
+            json.dump(bench, f, indent=2)
+        print("Benchmark results saved at: {}".format(fpath))
+
+    return bench
+
+def compare_benchmark(bench:dict, baseline:dict) -> dict:
+    """Compare results of benchmark against a baseline run
+
+    :param dict bench: Results of run_benchmark
+    :param dict baseline: Results of run_benchmark used as reference
+    :returns: Speedup of emulation (steps/s) and ratio of peak memory per workload name
+    """
+    ref = {r["name"]: r for r in baseline["results"]}
+    cmp = {}
+
+    print("Comparison against {} ({})".format(baseline["info"]["commit"], baseline["info"]["date"]))
+    print("{:<36} {:>10} {:>10} {:>10}".format("Workload", "speedup", "RSS ratio", "gen ratio"))
+    for r in bench["results"]:
+        if r["name"] not in ref:
+            continue
+        b = ref[r["name"]]
+        cmp[r["name"]] = {
+            "speedup"       : r["steps_per_s"]/b["steps_per_s"],
+            "rss_ratio"     : r["peak_rss_mb"]/b["peak_rss_mb"],
+            "gen_ratio"     : r["gen_config_s"]/b["gen_config_s"],
+        }
+        print("{:<36} {:>10.3f} {:>10.3f} {:>10.3f}".format(r["name"], *cmp[r["name"]].values()))
+    return cmp
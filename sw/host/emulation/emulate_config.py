@@ -12,17 +12,284 @@
 # @details
 # > **23 Oct 2023** : file creation (RB)
 
+import os
+import time
+import numpy as np
+
 from configuration.file_managers.HwConfigFile import *
 from configuration.file_managers.SwConfigFile import *
 from emulation.hh_snn.SnnEmulator import *
+from emulation.hh_snn.Recorder import *
+from emulation.hh_snn.ParallelEmulator import ParallelEmulator
+from emulation.hh_snn.StageProfiler import StageProfiler
+from emulation.hh_snn.FpgaComparator import FpgaComparator, get_wave_channels
 
-def emulate_config(hwconfig:HwConfigFile, swconfig:SwConfigFile, nlist, fpga_emu, store_context:bool, dtype):
-    snn_emu = SnnEmulator(hwconfig, swconfig, store_context, dtype)
-    
+def emulate_config(hwconfig:HwConfigFile, swconfig:SwConfigFile, nlist, fpga_emu, store_context:bool, dtype, engine:str=ENGINE_SCALAR, recorder:Recorder=None,
+                   checkpoint:str=None, checkpoint_interval_s:float=10.0, resume:bool=False, nb_workers:int=1,
+                   rate_lut_step:float=None, noise_seed:int=None, profiler:StageProfiler=None, integrator:str=INTEG_EULER, dt:float=None,
+                   event_syn:bool=False):
     if fpga_emu:
         print("Software emulation using FPGA equations")
     else:
         print("Software emulation using exact equations")
 
-    snn_emu.run(nlist, fpga_emu)
-    return snn_emu
\ No newline at end of file
+    # Partitioned emulation on multiple processes (vector engine, voltages only)
+    if nb_workers > 1:
+        if store_context or checkpoint is not None or profiler is not None:
+            raise ValueError("Context, checkpoint and profiler not supported by partitioned emulation")
+        if integrator != INTEG_EULER or dt is not None:
+            raise ValueError("Integrators and time step not supported by partitioned emulation")
+        if event_syn:
+            raise ValueError("Event-driven synapses not supported by partitioned emulation")
+        snn_emu = ParallelEmulator(hwconfig, swconfig, dtype, nb_workers, noise_seed, recorder)
+        snn_emu.run(nlist, fpga_emu)
+        return snn_emu
+
+    snn_emu = SnnEmulator(hwconfig, swconfig, store_context, dtype, recorder, noise_seed, dt)
+    if snn_emu.dt != hwconfig.dt or integrator != INTEG_EULER:
+        print("Integrator {} with time step {} ms".format(integrator, snn_emu.dt))
+    if profiler is not None:
+        snn_emu.profiler = profiler
+
+    if resume and checkpoint is not None and os.path.exists(checkpoint):
+        snn_emu.loadCheckpoint(checkpoint)
+        print("Resume emulation from checkpoint at {:.3f} s: {}".format(snn_emu.step*snn_emu.dt*1e-3, checkpoint))
+
+    # Fine rate tables for exact equations
+    rate_lut = None
+    if rate_lut_step is not None and not fpga_emu:
+        rate_lut = RateLut(snn_emu.dt, rate_lut_step, method=INTEG_GATING[integrator], dtype=dtype)
+        print("Fine rate tables (step {} mV), max error of gating update:".format(rate_lut_step))
+        for (gate, err) in rate_lut.getError().items():
+            print("  {:<5} {:e}".format(gate, err))
+
+    snn_emu.run(nlist, fpga_emu, engine, checkpoint, checkpoint_interval_s, rate_lut, integrator, event_syn)
+    return snn_emu
+
+def compare_engines(hwconfig:HwConfigFile, swconfig:SwConfigFile, nlist, fpga_emu, dtype, atol:float=1e-6, rtol:float=0.0, seed:int=0):
+    """Emulate configuration with scalar and vector engines and compare membrane voltages
+
+    Both engines draw noise from the global generator reset to the same seed.
+
+    :param list nlist: Neurons to emulate and compare
+    :param float atol: Absolute tolerance on membrane voltage (mV)
+    :param float rtol: Relative tolerance on membrane voltage
+    :param int seed: Seed of noise generator
+    :returns: [voltages within tolerance, maximum absolute error (mV)]
+    """
+    snn_emus = []
+    for engine in [ENGINE_SCALAR, ENGINE_VECTOR]:
+        np.random.seed(seed)
+        snn_emus.append(emulate_config(hwconfig, swconfig, nlist, fpga_emu, False, dtype, engine))
+
+    v_ref   = snn_emus[0].v[nlist]
+    v_vec   = snn_emus[1].v[nlist]
+    max_err = np.max(np.abs(v_vec - v_ref))
+    match   = np.allclose(v_vec, v_ref, rtol=rtol, atol=atol)
+
+    print("Engines comparison: max error {:e} mV ({})".format(max_err, "PASS" if match else "FAIL"))
+    return [match, max_err]
+
+def compare_integrators(hwconfig:HwConfigFile, swconfig:SwConfigFile, nlist, candidates:list, dtype=np.float64, spike_tol_ms:float=1.0, seed:int=0,
+                        reference:list=None):
+    """Compare integrators of exact equations at coarser time steps against a reference emulation
+
+    Spike times are compared neuron by neuron, use configurations without noise
+    (noise realizations differ with time step). Membrane voltages are compared at
+    time steps common to both emulations. Forward Euler at time step of
+    configuration is itself not converged for bursting neurons, a reference at a
+    finer time step (e.g. [INTEG_CN, dt/16]) gives the error of each candidate.
+
+    :param list nlist: Neurons to emulate and compare
+    :param list candidates: Pairs [integrator, time step (ms)], time steps multiple of time step of reference
+    :param list reference: Pair [integrator, time step (ms)] of reference (None for forward Euler at time step of configuration)
+    :param float spike_tol_ms: Error bound on spike times (ms)
+    :param int seed: Seed of noise generator
+    :returns: Comparison per candidate (speedup, spike count difference, max spike time error, voltage RMS error, within bound)
+    """
+    nlist = np.asarray(nlist, dtype=int)
+
+    def emulate(integrator, dt):
+        np.random.seed(seed)
+        snn_emu                 = SnnEmulator(hwconfig, swconfig, False, dtype, dt=dt)
+        snn_emu.show_progress   = False
+        tstart                  = time.perf_counter()
+        snn_emu.run(nlist, False, ENGINE_VECTOR, integrator=integrator)
+        wall_s                  = time.perf_counter() - tstart
+
+        steps   = snn_emu.spk_tab.getSteps()
+        nid     = snn_emu.spk_tab.getNeurons()
+        spikes  = [steps[nid == n]*snn_emu.dt for n in nlist]
+        return [snn_emu, spikes, wall_s]
+
+    [ref, ref_spikes, ref_wall_s] = emulate(*([INTEG_EULER, None] if reference is None else reference))
+    if reference is not None: # Speedup against forward Euler at time step of configuration
+        ref_wall_s = emulate(INTEG_EULER, None)[2]
+
+    results = []
+    print("{:<16} {:>10} {:>8} {:>10} {:>16} {:>14}".format("Integrator", "dt (ms)", "speedup", "spk count", "max spk err (ms)", "V RMS err (mV)"))
+    for [integrator, dt] in candidates:
+        k = dt/ref.dt
+        if abs(k - round(k)) > 1e-9:
+            raise ValueError("Time step has to be a multiple of time step of reference: {}".format(dt))
+        k = int(round(k))
+
+        [emu, spikes, wall_s] = emulate(integrator, dt)
+
+        count_diff  = int(sum(abs(len(s) - len(r)) for (s, r) in zip(spikes, ref_spikes)))
+        spk_err     = [np.max(np.abs(s - r)) for (s, r) in zip(spikes, ref_spikes) if len(s) == len(r) and len(s) > 0]
+        max_spk_err = float(max(spk_err)) if count_diff == 0 and spk_err else (0.0 if count_diff == 0 else float("inf"))
+
+        nb          = min(emu.v.shape[1], (ref.v.shape[1] - 1)//k + 1)
+        v_err       = emu.v[nlist, :nb] - ref.v[nlist, ::k][:, :nb]
+        result = {
+            "integrator"        : integrator,
+            "dt"                : dt,
+            "speedup"           : ref_wall_s/wall_s,
+            "spike_count_diff"  : count_diff,
+            "max_spike_err_ms"  : max_spk_err,
+            "v_rms_err"         : float(np.sqrt(np.mean(v_err**2))),
+            "within_bound"      : count_diff == 0 and max_spk_err <= spike_tol_ms,
+        }
+        results.append(result)
+        print("{:<16} {:>10.5f} {:>8.2f} {:>10} {:>16.3f} {:>14.3f} ({})".format(integrator, dt, result["speedup"], count_diff,
+              max_spk_err, result["v_rms_err"], "PASS" if result["within_bound"] else "FAIL"))
+    return results
+
+def match_spikes(spikes:list, ref_spikes:list, window_ms:float):
+    """Match spikes of each neuron to nearest spike of reference
+
+    :param list spikes: Spike times per neuron (ms)
+    :param list ref_spikes: Spike times of reference per neuron (ms)
+    :param float window_ms: Maximum time difference of matched spikes (ms)
+    :returns: [time differences of matched spikes (ms), number of unmatched spikes]
+    """
+    [diff, nb_unmatched] = [[], 0]
+    for (s, r) in zip(spikes, ref_spikes):
+        if len(r) == 0:
+            nb_unmatched += len(s)
+            continue
+        pos     = np.clip(np.searchsorted(r, s), 1, len(r)) # Nearest of r[pos-1] and r[pos]
+        d       = np.minimum(np.abs(s - r[pos-1]), np.abs(s - r[np.minimum(pos, len(r)-1)]))
+        diff.append(d[d <= window_ms])
+        nb_unmatched += int(np.sum(d > window_ms))
+    return [np.concatenate(diff) if diff else np.zeros(0), nb_unmatched]
+
+def compare_precision(hwconfig:HwConfigFile, swconfig:SwConfigFile, nlist, dtype=np.float32, time_s:float=None, seed:int=0,
+                      v_rms_tol:float=1.0, jitter_tol_ms:float=0.5, rate_tol:float=0.05, window_ms:float=2.0):
+    """Validate emulation in reduced precision against a float64 reference
+
+    Exact equations are emulated by the vector engine in both precisions with
+    noise drawn from the global generator reset to the same seed (same noise
+    realization rounded to dtype). Rounding differences grow in chaotic
+    networks, keep time_s short to measure precision rather than divergence.
+
+    :param list nlist: Neurons to emulate and compare
+    :param dtype: Type of emulation validated
+    :param float time_s: Emulated duration (s) (None for duration of software configuration)
+    :param int seed: Seed of noise generator
+    :param float v_rms_tol: Bound on voltage RMS error (mV)
+    :param float jitter_tol_ms: Bound on mean spike timing jitter (ms)
+    :param float rate_tol: Bound on relative deviation of mean firing rate
+    :param float window_ms: Maximum time difference of spikes matched for jitter (ms)
+    :returns: Comparison (speedup, memory ratio of voltage trace, voltage errors, spike jitter, firing rate deviation, within bound)
+    """
+    nlist = np.asarray(nlist, dtype=int)
+
+    # Configuration of emulation duration not shared with other instances
+    sw              = SwConfigFile()
+    sw.parameters   = dict(swconfig.parameters)
+    if time_s is not None:
+        sw.parameters["emulation_time_s"] = time_s
+
+    def emulate(emu_dtype):
+        np.random.seed(seed)
+        snn_emu                 = SnnEmulator(hwconfig, sw, False, emu_dtype)
+        snn_emu.show_progress   = False
+        tstart                  = time.perf_counter()
+        snn_emu.run(nlist, False, ENGINE_VECTOR)
+        wall_s                  = time.perf_counter() - tstart
+
+        steps   = snn_emu.spk_tab.getSteps()
+        nid     = snn_emu.spk_tab.getNeurons()
+        spikes  = [np.sort(steps[nid == n])*snn_emu.dt for n in nlist]
+        return [snn_emu, spikes, wall_s]
+
+    [ref, ref_spikes, ref_wall_s]   = emulate(np.float64)
+    [emu, spikes, wall_s]           = emulate(dtype)
+
+    duration_s          = (len(ref.t)-1)*ref.dt*1e-3
+    v_err               = emu.v[nlist].astype(np.float64) - ref.v[nlist]
+    [jitter, unmatched] = match_spikes(spikes, ref_spikes, window_ms)
+    rates               = np.array([len(s) for s in spikes])/duration_s
+    ref_rates           = np.array([len(r) for r in ref_spikes])/duration_s
+    rate_dev            = abs(rates.mean() - ref_rates.mean())/ref_rates.mean() if ref_rates.mean() > 0 else float(rates.mean() > 0)
+
+    result = {
+        "dtype"             : np.dtype(dtype).name,
+        "speedup"           : ref_wall_s/wall_s,
+        "memory_ratio"      : emu.v.nbytes/ref.v.nbytes,
+        "v_rms_err"         : float(np.sqrt(np.mean(v_err**2))),
+        "v_max_err"         : float(np.max(np.abs(v_err))),
+        "jitter_mean_ms"    : float(np.mean(jitter)) if len(jitter) > 0 else 0.0,
+        "jitter_max_ms"     : float(np.max(jitter))  if len(jitter) > 0 else 0.0,
+        "unmatched_spikes"  : unmatched,
+        "rate_hz"           : float(rates.mean()),
+        "ref_rate_hz"       : float(ref_rates.mean()),
+        "rate_dev"          : float(rate_dev),
+        "rate_neuron_dev_hz": float(np.mean(np.abs(rates - ref_rates))),
+    }
+    result["within_bound"] = (result["v_rms_err"] <= v_rms_tol and result["jitter_mean_ms"] <= jitter_tol_ms
+                              and result["rate_dev"] <= rate_tol)
+
+    print("Precision {} against float64 ({:.3f} s emulated, {} neurons):".format(result["dtype"], duration_s, len(nlist)))
+    print("  speedup {:.2f}, memory of voltage trace x{:.2f}".format(result["speedup"], result["memory_ratio"]))
+    print("  V error: RMS {:.3e} mV, max {:.3e} mV".format(result["v_rms_err"], result["v_max_err"]))
+    print("  Spike jitter: mean {:.3f} ms, max {:.3f} ms, {} unmatched".format(result["jitter_mean_ms"], result["jitter_max_ms"], unmatched))
+    print("  Firing rate: {:.2f} Hz against {:.2f} Hz (deviation {:.2%}, {:.3f} Hz per neuron)".format(
+          result["rate_hz"], result["ref_rate_hz"], result["rate_dev"], result["rate_neuron_dev_hz"]))
+    print("  {}".format("PASS" if result["within_bound"] else "FAIL"))
+    return result
+
+def compare_fpga(hwconfig:HwConfigFile, swconfig:SwConfigFile, fpath_waves:str=None, fpath_raster:str=None, channels:list=None,
+                 seed:int=None, noise_seed:int=None, v_tol:float=1.0, window_ms:float=2.0, tstamp_offset:int=0):
+    """Compare emulation of FPGA equations with waves and raster recorded by the FPGA
+
+    All neurons of the configuration are emulated by the vector engine and
+    compared on the fly (see FpgaComparator), voltages of the emulation are not
+    stored. FPGA noise is not reproduced, compare configurations without noise
+    for a time step by time step match.
+
+    :param str fpath_waves: Path of waves recorded by FPGA (None to not compare voltages)
+    :param str fpath_raster: Path of raster recorded by FPGA (.csv or .bin, None to not compare spikes)
+    :param list channels: Neuron of each wave channel (None for neurons selected by sel_nrn_vmem_dma)
+    :param int seed: Seed of global noise generator (None to keep current state)
+    :param int noise_seed: Seed of counter-based noise (None for global generator)
+    :param float v_tol: Voltage error (mV) from which a neuron diverged
+    :param float window_ms: Maximum time difference of matched spikes (ms)
+    :param int tstamp_offset: Time step of emulation of wave time stamp 0
+    :returns: Comparison per wave channel and per neuron (see FpgaComparator.getResults)
+    """
+    if channels is None:
+        channels = get_wave_channels(swconfig.parameters["sel_nrn_vmem_dma"])
+
+    comparator = FpgaComparator(hwconfig.nb_nrn, hwconfig.dt, fpath_waves, fpath_raster, channels, v_tol, window_ms, tstamp_offset)
+    if seed is not None:
+        np.random.seed(seed)
+    snn_emu             = SnnEmulator(hwconfig, swconfig, False, np.float64, comparator, noise_seed)
+    comparator.spikes   = snn_emu.spk_tab
+    snn_emu.run(np.arange(hwconfig.nb_nrn), True, ENGINE_VECTOR)
+    res = comparator.getResults()
+
+    if fpath_waves is not None:
+        print("{:>8} {:>16} {:>14} {:>14}".format("Neuron", "divergence (ms)", "V RMS err (mV)", "V max err (mV)"))
+        for (k, n) in enumerate(res["channels"]):
+            print("{:>8} {:>16} {:>14.4f} {:>14.4f}".format(n, "-" if res["divergence_ms"][k] < 0 else "{:.3f}".format(res["divergence_ms"][k]),
+                                                            res["v_rms_err"][k], res["v_max_err"][k]))
+    if fpath_raster is not None:
+        mismatch = np.flatnonzero((res["unmatched_emu"] > 0) | (res["unmatched_fpga"] > 0))
+        print("Spikes: {} emulated, {} FPGA, {} and {} unmatched, mean time difference of matched spikes {:.3f} ms".format(
+              res["nb_spikes_emu"].sum(), res["nb_spikes_fpga"].sum(), res["unmatched_emu"].sum(), res["unmatched_fpga"].sum(),
+              np.nansum(res["spike_diff_ms"]*res["nb_matched"])/max(1, res["nb_matched"].sum())))
+        print("Neurons with unmatched spikes: {}".format(len(mismatch)))
+    return res
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# @title      Emulate batch of SNN configurations
+# @file       BatchEmulator.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Emulation of many configurations or seeds in one array pass
+#
+# @details
+# Configurations are stacked neuron-wise along a batch axis: member k holds
+# neurons [k*nb_nrn, (k+1)*nb_nrn). The whole batch is advanced by the vector
+# engine as a single network of independent blocks.
+#
+# > **17 Oct 2026** : file creation
+
+import copy
+import numpy as np
+
+from configuration.file_managers.HwConfigFile import *
+from configuration.file_managers.SwConfigFile import *
+from configuration.neurons.Hhparam   import Hhparam
+from configuration.synapses.SynTable import SynTable
+from emulation.hh_snn.SnnEmulator    import SnnEmulator, ENGINE_VECTOR
+from emulation.hh_snn.SynCsr         import SynCsr, SYN_RECEPTORS
+from emulation.hh_snn.Recorder       import Recorder
+from emulation.hh_snn.NoiseGen       import NoiseGen
+from emulation.hh_snn.SpikeBuffer    import SpikeBuffer
+
+class BatchEmulator(SnnEmulator):
+    def __init__(self, hwconfigs:list, swconfig:SwConfigFile, seeds:list=None, store_context:bool=False, dtype=np.float64, recorder:Recorder=None,
+                 counter_noise:bool=False) -> None:
+        """Initialize batch emulator from hardware config files
+
+        :param list hwconfigs: Hardware configurations (same number of neurons, time step and rate tables)
+        :param SwConfigFile swconfig: Software configuration (emulation time and stimulation) of all members
+        :param list seeds: Noise seed per member (None to draw noise from global generator)
+        :param bool store_context: Store context of all members
+        :param Recorder recorder: Stream recorded variables (neurons indexed along batch)
+        :param bool counter_noise: Counter-based noise keyed by (seed, neuron of member, time step) instead of sequential generators
+        """
+        ref = hwconfigs[0]
+        for hw in hwconfigs[1:]:
+            if hw.nb_nrn != ref.nb_nrn or hw.dt != ref.dt:
+                raise ValueError("Batch members must have the same number of neurons and time step")
+            for rates in ["m_rates1", "m_rates2", "h_rates1", "h_rates2"]:
+                if not np.array_equal(getattr(hw, rates), getattr(ref, rates)):
+                    raise ValueError("Batch members must have the same rate tables: {}".format(rates))
+        if seeds is not None and len(seeds) != len(hwconfigs):
+            raise ValueError("One seed per batch member required")
+
+        self.hwconfigs  = hwconfigs
+        self.batch_size = len(hwconfigs)
+        self.batch_nrn  = ref.nb_nrn
+        self.rngs       = None
+        self.noise_gens = None
+        if counter_noise:
+            if seeds is None:
+                raise ValueError("Seeds required for counter-based noise")
+            self.noise_gens = [NoiseGen(s) for s in seeds]
+        elif seeds is not None:
+            self.rngs       = [np.random.RandomState(s) for s in seeds]
+
+        # Members stacked as one configuration (synapses set per member in getSynCsr)
+        batch_hw            = copy.copy(ref)
+        batch_hw.nb_nrn     = self.batch_size * self.batch_nrn
+        batch_hw.HH_param   = [hhp for hw in hwconfigs for hhp in hw.HH_param]
+        batch_hw.syn        = SynTable(batch_hw.nb_nrn)
+
+        super().__init__(batch_hw, swconfig, store_context, dtype, recorder)
+
+    def run(self, FPGA_EMU:bool=False):
+        """Running emulation of all members with the vector engine
+
+        :param bool FPGA_EMU: Emulate FPGA equations (rate tables and fixed point) instead of exact equations
+        """
+        return super().run(np.arange(self.nb_nrn), FPGA_EMU, ENGINE_VECTOR)
+
+    def getSynCsr(self, nid) -> SynCsr:
+        """Get block diagonal synaptic connectivity of members
+
+        :param nid: Index of emulated neurons (all neurons of batch)
+        """
+        if not np.array_equal(nid, np.arange(self.nb_nrn)):
+            raise ValueError("Batch emulation computes all neurons of all members")
+
+        [rows, cols, types, weights] = [[], [], [], []]
+        for k, hw in enumerate(self.hwconfigs):
+            csr = SynCsr.fromTable(hw.syn, np.arange(self.batch_nrn), self.dtype)
+            for syn_type in SYN_RECEPTORS:
+                rows.append(csr.rows[syn_type] + k*self.batch_nrn)
+                cols.append(csr.cols[syn_type] + k*self.batch_nrn)
+                types.append(np.full(csr.getNnz(syn_type), syn_type))
+                weights.append(csr.weights[syn_type])
+
+        batch_csr = SynCsr(None, None, nid, self.dtype)
+        batch_csr.setCoo(np.concatenate(rows), np.concatenate(cols), np.concatenate(types), np.concatenate(weights), self.dtype)
+        return batch_csr
+
+    def drawNoise(self, nid):
+        """Draw standard normal values of noise, from generator of each member if seeded
+
+        :param nid: Index of emulated neurons (all neurons of batch)
+        """
+        if self.noise_gens is not None:
+            member_nid = np.arange(self.batch_nrn)
+            return np.concatenate([gen.get(member_nid, self.step) for gen in self.noise_gens])
+        if self.rngs is None:
+            return super().drawNoise(nid)
+        return np.concatenate([rng.randn(self.batch_nrn) for rng in self.rngs])
+
+    def getV(self, k:int=None):
+        """Get membrane voltages
+
+        :param int k: Batch member (None for all members as [member, neuron, time])
+        """
+        if k is None:
+            return self.v.reshape(self.batch_size, self.batch_nrn, -1)
+        return self.v[k*self.batch_nrn:(k+1)*self.batch_nrn]
+
+    def getSpikes(self, k:int):
+        """Get spikes of a batch member
+
+        :param int k: Batch member
+        :returns: Spikes with neurons indexed in member
+        """
+        first   = k*self.batch_nrn
+        nid     = self.spk_tab.getNeurons().astype(np.int64)
+        sel     = (nid >= first) & (nid < first + self.batch_nrn)
+        return SpikeBuffer.fromArray(np.stack((self.spk_tab.getSteps()[sel], nid[sel] - first), axis=1), self.batch_nrn)
+
+def perturb_hh_params(hwconfig:HwConfigFile, nb:int, val:float=0.10) -> list:
+    """Generate hardware configurations with randomized noise parameters and initial voltage
+
+    Same randomization as en_randomize_hh_params of configuration generation (global generator).
+
+    :param HwConfigFile hwconfig: Hardware configuration perturbed
+    :param int nb: Number of configurations generated
+    :param float val: Relative standard deviation of perturbations
+    """
+    dp          = Hhparam().getDict()
+    hwconfigs   = []
+    for _ in range(nb):
+        hw          = copy.copy(hwconfig)
+        hw.HH_param = []
+        for hhp in hwconfig.HH_param:
+            hhp = list(hhp)
+            for p in ["mu", "theta", "sigma", "v_init"]:
+                hhp[dp[p]] = hhp[dp[p]] + val*np.random.randn()*hhp[dp[p]]
+            hw.HH_param.append(hhp)
+        hwconfigs.append(hw)
+    return hwconfigs
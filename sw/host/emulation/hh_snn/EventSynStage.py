@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# @title      Event-driven synapse stage of emulation
+# @file       EventSynStage.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Destexhe synapses scattered only from presynaptic neurons in their release window
+#
+# @details
+# The transmitter concentration T_v of a presynaptic neuron at rest is almost
+# zero, its receptor states r then decay geometrically by the same factor for
+# all neurons (1 - k2*dt with forward Euler, exp(-k2*dt) with exponential
+# Euler). A presynaptic neuron is active when its voltage exceeds the voltage
+# where T_v reaches t_eps, T_v of other neurons is taken as zero.
+#
+# For AMPA, NMDA and GABAa receptors, the contribution of inactive sources to
+# each target is kept in an accumulator decayed once per time step. Only the
+# synapses of active sources, and of sources entering or leaving the active
+# window, are read at each time step, so that synaptic cost follows network
+# activity rather than network size. Accumulators are rebuilt from all
+# synapses every resync_steps to bound rounding drift.
+#
+# GABAb receptors act through the non-linear Sn(s) and are scattered from all
+# synapses at each time step as in SynStage.
+#
+# Error against SynStage: r of an inactive source is underestimated by at most
+# k1*t_eps/k2 (steady state of the neglected release), i.e. 2.8e-4 for GABAa
+# with the default t_eps.
+#
+# > **17 Oct 2026** : file creation
+
+import numpy as np
+
+from emulation.hh_snn.SynCsr    import SynCsr, SYN_RECEPTORS
+from emulation.hh_snn.SynStage  import SynStage, SYN_ROW
+
+EVENT_T_EPS         = 1e-5  # Transmitter concentration (mM) under which release is neglected
+EVENT_RESYNC_STEPS  = 4096  # Time steps between rebuilds of accumulators
+
+# Receptors with states decaying linearly when presynaptic neuron is inactive
+EVENT_RECEPTORS     = ["ampa", "nmda", "gabaa"]
+
+class EventSynStage(SynStage):
+    def __init__(self, syn_csr:SynCsr, dt, exp_euler:bool=False, t_eps:float=EVENT_T_EPS, resync_steps:int=EVENT_RESYNC_STEPS) -> None:
+        """Initialize event-driven synapse stage
+
+        :param SynCsr syn_csr: Sparse synaptic connectivity among emulated neurons
+        :param float dt: Time step (ms)
+        :param bool exp_euler: Advance receptor states with exponential Euler instead of forward Euler
+        :param float t_eps: Transmitter concentration (mM) under which presynaptic neuron is inactive
+        :param int resync_steps: Time steps between rebuilds of accumulators of inactive sources
+        """
+        super().__init__(syn_csr, dt, exp_euler)
+        self.t_eps          = t_eps
+        self.resync_steps   = resync_steps
+
+        # Voltage where T_v = Tmax/(1+exp(-(v-Vp)/Kp)) reaches t_eps (constants of Synapses.T_v)
+        [t_max, k_p, v_p] = [1.0, 5.0, 2.0]
+        if not 0 < t_eps < t_max:
+            raise ValueError("Release threshold has to be within (0, {}) mM: {}".format(t_max, t_eps))
+        self.v_on   = v_p - k_p*np.log(t_max/t_eps - 1)
+
+        # Decay factor of receptor states without release
+        self.decay  = {syn_type: np.exp(-self.k2[syn_type]*dt) if exp_euler else 1 - self.k2[syn_type]*dt
+                       for syn_type in EVENT_RECEPTORS + ["gabab"]}
+
+        # Receptor types scattered from active sources (types without synapses skipped)
+        self.types_ev   = [syn_type for syn_type in EVENT_RECEPTORS if syn_csr.getNnz(syn_type) > 0]
+        self.decay_ev   = np.array([[self.decay[syn_type]] for syn_type in self.types_ev])
+        self.rows_ev    = [SYN_ROW[syn_type] for syn_type in self.types_ev]
+        self.en_gabab   = syn_csr.getNnz("gabab") > 0
+
+        self.active     = None  # Presynaptic neurons active at previous time step (None before first step)
+        self.acc        = None  # Weighted states of inactive sources [receptor type of types_ev, target neuron]
+        self.rprev      = None
+        self.nb_steps   = 0
+        self.nb_active  = 0     # Sum of active sources over time steps (see getActivity)
+
+    def updatePre(self, v_pre, rprev:dict, sprev_gabab):
+        """Advance receptor states of all presynaptic neurons by one time step
+
+        States of active neurons are advanced as in SynStage, states of
+        inactive neurons are decayed.
+
+        :param v_pre: Membrane voltage of emulated neurons at previous time step
+        :param dict rprev: Previous r state per receptor type
+        :param sprev_gabab: Previous s state of GABAb receptors
+        :returns: [rnew per receptor type, snew of GABAb receptors]
+        """
+        self.new_active = v_pre > self.v_on
+        self.rprev      = rprev
+        act             = np.flatnonzero(self.new_active)
+        T_v             = self.model.T_v(v_pre[act])
+
+        rnew = {}
+        for syn_type in SYN_RECEPTORS:
+            r       = rprev[syn_type]*self.decay[syn_type]
+            r_act   = rprev[syn_type][act]
+            k1      = self.k1[syn_type]
+            k2      = self.k2[syn_type]
+            if self.exp_euler:
+                k       = k1*T_v + k2
+                rinf    = k1*T_v/k
+                r[act]  = rinf + (r_act - rinf)*np.exp(-k*self.dt)
+            else:
+                r[act]  = self.model.rcalc(r_act, k1, k2, T_v, self.dt)
+            rnew[syn_type] = r
+
+        if self.exp_euler:
+            sinf        = self.k3*rprev["gabab"]/self.k4
+            snew_gabab  = sinf + (sprev_gabab - sinf)*np.exp(-self.k4*self.dt)
+        else:
+            snew_gabab  = self.model.scalc(sprev_gabab, rprev["gabab"], self.k3, self.k4, self.dt)
+        return [rnew, snew_gabab]
+
+    def scatter(self, rnew:dict, snew_gabab):
+        """Scatter weighted receptor states to target neurons
+
+        :returns: Weighted receptor activation [receptor type, target neuron]
+        """
+        active  = self.new_active
+        act     = np.zeros([len(SYN_ROW), self.csr.nb_nrn], dtype=snew_gabab.dtype)
+
+        rnew_ev = np.stack([rnew[syn_type] for syn_type in self.types_ev])
+        decay   = self.decay_ev.astype(rnew_ev.dtype, copy=False)
+        if self.active is None or self.nb_steps % self.resync_steps == 0:
+            # Rebuild accumulators from all inactive sources
+            self.acc = self.csr.dotCols(self.types_ev, np.flatnonzero(~active), rnew_ev)
+        else:
+            # Inactive sources decay, sources entering window leave accumulator, sources leaving window join it
+            entering    = np.flatnonzero(active & ~self.active)
+            leaving     = np.flatnonzero(~active & self.active)
+            self.acc    = self.acc*decay
+            if len(entering) > 0:
+                rdec      = np.stack([self.rprev[syn_type] for syn_type in self.types_ev])*decay
+                self.acc -= self.csr.dotCols(self.types_ev, entering, rdec)
+            if len(leaving) > 0:
+                self.acc += self.csr.dotCols(self.types_ev, leaving, rnew_ev)
+
+        sources = np.flatnonzero(active)
+        act[self.rows_ev] = self.acc + self.csr.dotCols(self.types_ev, sources, rnew_ev) if len(sources) > 0 else self.acc
+        if self.en_gabab:
+            act[SYN_ROW["gabab"]] = self.csr.dot("gabab", self.model.Sn_GABAb(snew_gabab))
+
+        self.active      = active
+        self.nb_steps   += 1
+        self.nb_active  += len(sources)
+        return act
+
+    def getActivity(self) -> float:
+        """Get mean fraction of presynaptic neurons in release window over time steps"""
+        if self.nb_steps == 0:
+            return 0.0
+        return self.nb_active/(self.nb_steps*len(self.csr.src))
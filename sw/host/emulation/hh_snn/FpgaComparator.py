@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+# @title      Compare emulation against FPGA recordings
+# @file       FpgaComparator.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Recorder comparing emulation on the fly with waves and raster recorded by the FPGA
+#
+# @details
+# Waves of the target application are float32 records [time stamp, 16 channels]
+# with the time stamp (time step) stored as the bits of a uint32. Channels are
+# the neurons selected for membrane voltage monitoring (sel_nrn_vmem_dma) in
+# ascending neuron order.
+#
+# Emulated voltages of monitored neurons are buffered by blocks of time steps
+# and compared with waves read by chunks. Spikes are compared on raster frames
+# (1 ms) with a sliding window: a spike is final once the other side reached
+# window frames after it, and spikes older than twice the window are dropped.
+# Memory is then bounded by block and chunk sizes, whatever the recording
+# duration.
+#
+# The FPGA noise generator cannot be reproduced by the emulator, waves and
+# spikes only match time step by time step for configurations without noise.
+#
+# > **17 Oct 2026** : file creation
+
+import numpy as np
+
+from emulation.hh_snn.Recorder      import Recorder
+from emulation.hh_snn.SpikeBuffer   import SpikeBuffer, iter_raster, RASTER_TSTAMP_MS
+
+WAVES_NB_CHANNELS = 16 # Neurons monitored by DMA (MAX_NRN_MON_VMEM_DMA of target application)
+
+def iter_waves(fpath:str, nb_channels:int=WAVES_NB_CHANNELS, chunk_size:int=2**16):
+    """Read waves recorded by target application by chunks (memory bounded by chunk size)
+
+    :param str fpath: Path of waves file
+    :param int nb_channels: Number of channels per record
+    :param int chunk_size: Number of records per chunk
+    :returns: Generator of [time steps, membrane voltages [record, channel]]
+    """
+    records = np.memmap(fpath, dtype=np.dtype([("tstamp", "<u4"), ("v", "<f4", (nb_channels,))]), mode="r")
+    for k in range(0, len(records), chunk_size):
+        chunk = records[k:k+chunk_size]
+        yield [chunk["tstamp"].astype(np.int64), np.array(chunk["v"], dtype=np.float64)]
+
+def get_wave_channels(sel_nrn_vmem_dma:list, nb_channels:int=WAVES_NB_CHANNELS) -> list:
+    """Get neurons of wave channels from neurons selected for monitoring"""
+    return sorted(set(sel_nrn_vmem_dma))[:nb_channels]
+
+def nearest_spike(frames, nid, ref_frames, ref_nid):
+    """Distance to nearest spike of same neuron in reference (frames)
+
+    :returns: Distance per spike (inf if no spike of neuron in reference)
+    """
+    key     = nid.astype(np.int64)*2**40 + frames
+    ref_key = np.sort(ref_nid.astype(np.int64)*2**40 + ref_frames)
+    dist    = np.full(len(key), np.inf)
+    if len(ref_key) == 0:
+        return dist
+
+    pos = np.searchsorted(ref_key, key)
+    for cand in [np.maximum(pos-1, 0), np.minimum(pos, len(ref_key)-1)]:
+        same        = (ref_key[cand] >> 40) == (key >> 40)
+        dist[same]  = np.minimum(dist[same], np.abs(ref_key[cand][same] - key[same]))
+    return dist
+
+class FpgaComparator(Recorder):
+    def __init__(self, nb_nrn:int, dt:float, fpath_waves:str=None, fpath_raster:str=None, channels:list=None, v_tol:float=1.0,
+                 window_ms:float=2.0, tstamp_offset:int=0, block_size:int=2**14) -> None:
+        """Compare membrane voltages and spikes of emulation with FPGA recordings
+
+        :param int nb_nrn: Number of neurons of configuration
+        :param float dt: Time step (ms)
+        :param str fpath_waves: Path of waves recorded by FPGA (None to not compare voltages)
+        :param str fpath_raster: Path of raster recorded by FPGA (.csv or .bin, None to not compare spikes)
+        :param list channels: Neuron of each wave channel (see get_wave_channels)
+        :param float v_tol: Voltage error (mV) from which a neuron diverged
+        :param float window_ms: Maximum time difference of matched spikes (ms)
+        :param int tstamp_offset: Time step of emulation of wave time stamp 0
+        :param int block_size: Time steps of emulation buffered between comparisons
+        """
+        channels = [] if fpath_waves is None or channels is None else list(channels)
+        super().__init__(["v"], channels, 1)
+        self.nb_nrn         = nb_nrn
+        self.dt             = dt
+        self.fpath_waves    = fpath_waves
+        self.fpath_raster   = fpath_raster
+        self.channels       = channels
+        self.v_tol          = v_tol
+        self.window         = int(np.ceil(window_ms/RASTER_TSTAMP_MS))
+        self.tstamp_offset  = tstamp_offset
+        self.block_size     = int(block_size)
+        self.spikes         = SpikeBuffer(nb_nrn) # Spikes of emulation (set to spike buffer of emulator)
+
+    def open(self, nid, nb_steps:int, dtype, first_step:int=0) -> None:
+        """Start comparison of an emulation"""
+        super().open(nid, nb_steps, dtype, first_step)
+        nb_ch = len(self.channels)
+
+        # Voltages: block of emulated time steps and pending waves
+        self.block      = np.zeros([self.block_size, nb_ch])
+        self.block_base = first_step
+        self.last_step  = first_step - 1
+        self.waves      = iter_waves(self.fpath_waves) if self.fpath_waves is not None else None
+        self.wave_pend  = [np.zeros(0, dtype=np.int64), np.zeros([0, nb_ch])]
+
+        self.v_nb       = np.zeros(nb_ch, dtype=np.int64)
+        self.v_sq       = np.zeros(nb_ch)
+        self.v_max      = np.zeros(nb_ch)
+        self.div_step   = np.full(nb_ch, -1, dtype=np.int64)
+
+        # Spikes: pending frames of both sides and raster read ahead
+        self.raster     = iter_raster(self.fpath_raster) if self.fpath_raster is not None else None
+        self.spk_read   = 0
+        self.emu_pend   = [np.zeros(0, dtype=np.int64)]*2
+        self.fpga_pend  = [np.zeros(0, dtype=np.int64)]*2
+        self.fpga_ahead = [np.zeros(0, dtype=np.int64)]*2
+        self.final      = -1 # Last frame of final spikes
+
+        self.nb_emu         = np.zeros(self.nb_nrn, dtype=np.int64)
+        self.nb_fpga        = np.zeros(self.nb_nrn, dtype=np.int64)
+        self.unmatched_emu  = np.zeros(self.nb_nrn, dtype=np.int64)
+        self.unmatched_fpga = np.zeros(self.nb_nrn, dtype=np.int64)
+        self.nb_matched     = np.zeros(self.nb_nrn, dtype=np.int64)
+        self.sum_diff       = np.zeros(self.nb_nrn)
+
+    def record(self, step:int, values:dict) -> None:
+        """Buffer voltages of monitored neurons and compare once block is full
+
+        :param int step: Time step index
+        :param dict values: Values of emulated neurons per variable
+        """
+        if step - self.block_base >= self.block_size:
+            self.__compare()
+            self.block_base = step
+        self._write("v", step - self.block_base, np.asarray(values["v"])[self.sel])
+        self.last_step = step
+
+    def _write(self, var:str, sample:int, values) -> None:
+        """Buffer voltages of monitored neurons at a row of current block"""
+        self.block[sample] = values
+
+    def close(self) -> None:
+        """Compare remaining time steps and spikes"""
+        self.__compare(last=True)
+
+    def __compare(self, last:bool=False) -> None:
+        if self.waves is not None:
+            self.__compareWaves()
+        if self.raster is not None:
+            self.__compareSpikes(last)
+
+    def __nextWaves(self) -> bool:
+        chunk = next(self.waves, None)
+        if chunk is None:
+            self.waves = None
+            return False
+        self.wave_pend = [np.concatenate((self.wave_pend[0], chunk[0] + self.tstamp_offset)), np.concatenate((self.wave_pend[1], chunk[1]))]
+        return True
+
+    def __compareWaves(self) -> None:
+        # Read waves up to last emulated time step
+        while (len(self.wave_pend[0]) == 0 or self.wave_pend[0][-1] <= self.last_step) and self.__nextWaves():
+            pass
+
+        [steps, v]  = self.wave_pend
+        done        = steps <= self.last_step
+        sel         = done & (steps >= self.block_base)
+        [steps, v]  = [steps[sel], v[sel]]
+        self.wave_pend = [self.wave_pend[0][~done], self.wave_pend[1][~done]]
+        if len(steps) == 0:
+            return
+
+        err     = np.abs(self.block[steps - self.block_base] - v)
+        self.v_nb  += len(steps)
+        self.v_sq  += np.sum(err**2, axis=0)
+        self.v_max  = np.maximum(self.v_max, np.max(err, axis=0))
+
+        exceed  = err > self.v_tol
+        for ch in np.flatnonzero((self.div_step < 0) & np.any(exceed, axis=0)):
+            self.div_step[ch] = steps[np.argmax(exceed[:, ch])]
+
+    def __compareSpikes(self, last:bool) -> None:
+        # Frames complete on emulation side
+        frame = int(np.floor((self.last_step+1)*self.dt/RASTER_TSTAMP_MS)) if not last else int(np.floor(self.last_step*self.dt/RASTER_TSTAMP_MS)) + 1
+
+        # Emulated spikes (one per neuron and frame as in raster)
+        steps       = self.spikes.getSteps()[self.spk_read:]
+        nid         = self.spikes.getNeurons()[self.spk_read:].astype(np.int64)
+        self.spk_read += len(steps)
+        frames      = np.floor(steps*self.dt/RASTER_TSTAMP_MS).astype(np.int64)
+        [frames, nid] = self.__unique(np.concatenate((self.emu_pend[0], frames)), np.concatenate((self.emu_pend[1], nid)))
+        self.emu_pend = [frames, nid]
+
+        # FPGA spikes of complete frames
+        while (len(self.fpga_ahead[0]) == 0 or self.fpga_ahead[0][-1] < frame):
+            chunk = next(self.raster, None)
+            if chunk is None:
+                break
+            self.fpga_ahead = [np.concatenate((self.fpga_ahead[0], chunk[0].astype(np.int64))), np.concatenate((self.fpga_ahead[1], chunk[1].astype(np.int64)))]
+        ready           = self.fpga_ahead[0] < frame
+        self.fpga_pend  = [np.concatenate((self.fpga_pend[0], self.fpga_ahead[0][ready])), np.concatenate((self.fpga_pend[1], self.fpga_ahead[1][ready]))]
+        self.fpga_ahead = [self.fpga_ahead[0][~ready], self.fpga_ahead[1][~ready]]
+
+        # Spikes final once both sides reached window frames after them
+        final = frame - 1 if last else frame - 1 - self.window
+        for (pend, ref, nb, unmatched, emu_side) in [(self.emu_pend, self.fpga_pend, self.nb_emu, self.unmatched_emu, True),
+                                                     (self.fpga_pend, self.emu_pend, self.nb_fpga, self.unmatched_fpga, False)]:
+            sel         = (pend[0] > self.final) & (pend[0] <= final)
+            [f, n]      = [pend[0][sel], pend[1][sel]]
+            dist        = nearest_spike(f, n, ref[0], ref[1])
+            matched     = dist <= self.window
+            np.add.at(nb, n, 1)
+            np.add.at(unmatched, n[~matched], 1)
+            if emu_side:
+                np.add.at(self.nb_matched, n[matched], 1)
+                np.add.at(self.sum_diff, n[matched], dist[matched]*RASTER_TSTAMP_MS)
+        self.final = max(self.final, final)
+
+        # Drop spikes no longer needed as neighbours
+        for pend in [self.emu_pend, self.fpga_pend]:
+            keep    = pend[0] > self.final - self.window
+            pend[:] = [pend[0][keep], pend[1][keep]]
+
+    def __unique(self, frames, nid):
+        key = np.unique(nid*2**40 + frames)
+        return [key & (2**40 - 1), key >> 40]
+
+    def getResults(self) -> dict:
+        """Get comparison per wave channel and per neuron
+
+        :returns: Wave channels (neuron, divergence time (ms, -1 if none), RMS and max voltage error (mV)) and
+                  spikes per neuron (emulated, FPGA, unmatched of both sides, matched, mean time difference of matched spikes (ms))
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return {
+                "channels"          : np.array(self.channels, dtype=int),
+                "divergence_ms"     : np.where(self.div_step >= 0, self.div_step*self.dt, -1.0),
+                "v_rms_err"         : np.sqrt(self.v_sq/self.v_nb),
+                "v_max_err"         : self.v_max,
+                "v_nb_samples"      : self.v_nb,
+                "nb_spikes_emu"     : self.nb_emu,
+                "nb_spikes_fpga"    : self.nb_fpga,
+                "unmatched_emu"     : self.unmatched_emu,
+                "unmatched_fpga"    : self.unmatched_fpga,
+                "nb_matched"        : self.nb_matched,
+                "spike_diff_ms"     : np.where(self.nb_matched > 0, self.sum_diff/self.nb_matched, np.nan),
+            }
@@ -39,9 +39,11 @@ class Ionchan:
         if nrn_model == "pospischil":
             return g * (v - e)
     
-    def calcINoise(self, nrn_model:str, iprev, noise_offs, pmul_theta, pmul_sigma):
-        """Calculate current for noise"""
+    def calcINoise(self, nrn_model:str, iprev, noise_offs, pmul_theta, pmul_sigma, rand_val=None):
+        """Calculate current for noise (rand_val from global generator if not given, e.g. NoiseGen)"""
         if nrn_model == "pospischil":
-            return iprev + noise_offs + pmul_theta*iprev + pmul_sigma*np.random.randn()
+            if rand_val is None:
+                rand_val = np.random.randn()
+            return iprev + noise_offs + pmul_theta*iprev + pmul_sigma*rand_val
 
     
\ No newline at end of file
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# @title      Counter-based noise generation
+# @file       NoiseGen.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Reproducible normal deviates keyed by (seed, neuron id, time step)
+#
+# @details
+# Each deviate is a pure function of (seed, neuron id, time step): two uniform
+# values are obtained by hashing the counter with splitmix64 and transformed
+# with Box-Muller. The noise of a neuron is then the same whatever the order
+# of computation (serial, partitioned, batched or resumed emulation) and can be
+# replayed for a single neuron. Deviates are generated in blocks of time steps.
+#
+# > **17 Oct 2026** : file creation
+
+import numpy as np
+
+STEP_BITS = 40 # Bits of time step in counter (neuron id in upper bits)
+
+def splitmix64(x):
+    """Splitmix64 hash of unsigned 64 bits integers (wrapping arithmetic)
+
+    :param x: Values to hash (np.uint64)
+    """
+    with np.errstate(over="ignore"):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+class NoiseGen:
+    def __init__(self, seed:int, block_size:int=1024) -> None:
+        """Initialize counter-based generator of standard normal deviates
+
+        :param int seed: Seed of generator
+        :param int block_size: Number of time steps generated per block
+        """
+        self.seed       = int(seed)
+        self.block_size = int(block_size)
+        self.key1       = splitmix64(np.uint64(self.seed % 2**64))
+        self.key2       = splitmix64(self.key1)
+
+        self.block      = None  # Deviates [time step, neuron] of current block
+        self.block_nid  = None
+        self.block_step = 0
+
+    def generate(self, nid, step:int, nb_steps:int):
+        """Generate deviates of neurons for consecutive time steps
+
+        :param nid: Neuron ids
+        :param int step: First time step
+        :param int nb_steps: Number of time steps
+        :returns: Standard normal deviates [time step, neuron]
+        """
+        nid     = np.asarray(nid, dtype=np.uint64)
+        steps   = np.arange(step, step + nb_steps, dtype=np.uint64)
+        counter = (nid[np.newaxis, :] << np.uint64(STEP_BITS)) | steps[:, np.newaxis]
+
+        x1      = splitmix64(counter ^ self.key1)
+        x2      = splitmix64(counter ^ self.key2)
+
+        u1 = ((x1 >> np.uint64(11)).astype(np.float64) + 1.0) * 2.0**-53 # (0, 1]
+        u2 =  (x2 >> np.uint64(11)).astype(np.float64)        * 2.0**-53 # [0, 1)
+        return np.sqrt(-2.0*np.log(u1)) * np.cos(2.0*np.pi*u2)
+
+    def get(self, nid, step:int):
+        """Get deviates of neurons at one time step (from block generated ahead)
+
+        :param nid: Neuron ids
+        :param int step: Time step
+        """
+        if (self.block is None or not (self.block_step <= step < self.block_step + self.block_size)
+            or not np.array_equal(self.block_nid, nid)):
+            self.block_nid  = np.array(nid)
+            self.block_step = step
+            self.block      = self.generate(nid, step, self.block_size)
+        return self.block[step - self.block_step]
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+# @title      Emulate SNN on multiple processes
+# @file       ParallelEmulator.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Partitioned emulation with shared memory exchange of membrane voltages
+#
+# @details
+# Neurons are split in contiguous partitions advanced by worker processes with
+# the vector engine. Membrane voltages are exchanged through a double buffer in
+# shared memory and workers synchronize once per time step (synapses act
+# without delay on the next time step). Each worker only fetches voltages of
+# the presynaptic neurons of its partition and advances their synaptic states,
+# and noise is counter-based so that each worker draws noise of its partition
+# only. Results are identical to a single process run of the vector engine
+# with the same noise seed. Voltages are gathered from the double buffer by
+# the main process (full trace or recorder), so that shared memory does not
+# grow with emulation duration.
+#
+# > **17 Oct 2026** : file creation
+# > **17 Oct 2026** : voltages gathered by main process, presynaptic neurons and noise of partition only
+
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from threading import BrokenBarrierError
+
+from configuration.file_managers.HwConfigFile import *
+from configuration.file_managers.SwConfigFile import *
+from configuration.neurons.Hhparam            import Hhparam
+from emulation.hh_snn.SnnEmulator    import SnnEmulator, ENGINE_VECTOR
+from emulation.hh_snn.SynCsr         import SynCsr, SYN_RECEPTORS
+from emulation.hh_snn.Recorder       import Recorder
+from emulation.hh_snn.SpikeBuffer    import SpikeBuffer
+
+class NullRecorder(Recorder):
+    def __init__(self) -> None:
+        """Record nothing (voltages of partitions published through shared memory)"""
+        super().__init__([])
+
+    def isRecorded(self, step:int) -> bool:
+        return False
+
+    def _write(self, var:str, sample:int, values) -> None:
+        pass
+
+class PartitionEmulator(SnnEmulator):
+    def __init__(self, hwconfig:HwConfigFile, swconfig:SwConfigFile, dtype, nlist, vbuf, barrier, noise_seed:int) -> None:
+        """Emulator of a partition exchanging membrane voltages with other partitions
+
+        :param list nlist: All neurons emulated (sources of synapses)
+        :param vbuf: Shared double buffer of membrane voltages [2, neuron]
+        :param barrier: Barrier of all partitions and main process
+        :param int noise_seed: Seed of counter-based noise (same for all partitions)
+        """
+        super().__init__(hwconfig, swconfig, False, dtype, NullRecorder(), noise_seed)
+        self.nlist      = np.asarray(nlist, dtype=int)
+        self.src        = self.nlist
+        self.vbuf       = vbuf
+        self.barrier    = barrier
+
+    def getSynCsr(self, nid) -> SynCsr:
+        """Get synapses to neurons of partition from their presynaptic neurons"""
+        sel         = np.isin(self.syn.dest, nid) & np.isin(self.syn.tsyn, SYN_RECEPTORS)
+        self.src    = self.nlist[np.isin(self.nlist, self.syn.src[sel])]
+        return SynCsr.fromTable(self.syn, nid, self.dtype, self.src)
+
+    def exchange(self, step:int, nid):
+        """Publish voltages of partition and fetch voltages of presynaptic neurons"""
+        self.vbuf[step % 2, nid] = self.vprev[nid]
+        self.barrier.wait()
+        self.vprev[self.src] = self.vbuf[step % 2, self.src]
+
+def _run_partition(hwconfig, swconfig, parameters, dtype, fpga_emu, nlist, part, shm_name, noise_seed, barrier, queue, show_progress):
+    """Worker process emulating a partition
+
+    :param dict parameters: Parameters of software configuration (class attribute not pickled with spawn start method)
+    :param part: Neurons of partition
+    :param str shm_name: Name of shared memory of voltage double buffer
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        vbuf    = np.ndarray([2, hwconfig.nb_nrn], dtype=dtype, buffer=shm.buf)
+        swconfig.parameters = parameters
+
+        emu = PartitionEmulator(hwconfig, swconfig, dtype, nlist, vbuf, barrier, noise_seed)
+        emu.show_progress = show_progress
+        emu.run(part, fpga_emu, ENGINE_VECTOR)
+        queue.put([emu.spk_tab.toArray(), None])
+    except Exception as e:
+        barrier.abort()
+        queue.put([None, repr(e)])
+    finally:
+        shm.close()
+
+class ParallelEmulator:
+    def __init__(self, hwconfig:HwConfigFile, swconfig:SwConfigFile, dtype=np.float64, nb_workers:int=mp.cpu_count(), noise_seed:int=None,
+                 recorder:Recorder=None) -> None:
+        """Initialize partitioned emulation on multiple processes
+
+        :param HwConfigFile hwconfig: Hardware configuration file generated for FPGA
+        :param SwConfigFile swconfig: Software configuration file
+        :param int nb_workers: Number of worker processes
+        :param int noise_seed: Seed of counter-based noise keyed by (seed, neuron, time step) (None for seed of run)
+        :param Recorder recorder: Stream membrane voltages instead of storing [neuron, time] array (only "v" recorded)
+        """
+        if recorder is not None and any(var != "v" for var in recorder.variables):
+            raise ValueError("Only membrane voltage recorded by partitioned emulation")
+
+        self.hwconfig   = hwconfig
+        self.swconfig   = swconfig
+        self.dtype      = dtype
+        self.nb_workers = nb_workers
+        self.noise_seed = noise_seed
+        self.recorder   = recorder
+
+        self.dt         = hwconfig.dt
+        self.nb_nrn     = hwconfig.nb_nrn
+        self.time_ms    = swconfig.parameters['emulation_time_s']*1e3
+        self.t          = np.linspace(1, self.time_ms/self.dt, int(self.time_ms/self.dt))
+        self.v          = None
+        self.spk_tab    = SpikeBuffer(self.nb_nrn)
+        self.show_progress = True
+
+        pid             = Hhparam().getDict()
+        self.v_init     = np.array([hwconfig.HH_param[nid][pid["v_init"]] for nid in range(self.nb_nrn)], dtype=dtype)
+
+    def run(self, nlist, FPGA_EMU:bool=False, seed:int=None):
+        """Running emulation of neurons split in partitions
+
+        Same results as the vector engine with counter-based noise seeded with
+        noise_seed (or seed if noise_seed is None).
+
+        :param list nlist: Neurons to compute (if synapses used, has to include all neurons included)
+        :param bool FPGA_EMU: Emulate FPGA equations (rate tables and fixed point) instead of exact equations
+        :param int seed: Seed of noise if noise_seed is None (None for random seed)
+        """
+        nlist = np.asarray(nlist, dtype=int)
+        parts = [p for p in np.array_split(nlist, min(self.nb_workers, len(nlist))) if len(p) > 0]
+        noise_seed = self.noise_seed
+        if noise_seed is None:
+            noise_seed = np.random.randint(2**31) if seed is None else seed
+
+        # Shared memory: voltage double buffer
+        shm = shared_memory.SharedMemory(create=True, size=2*self.nb_nrn*np.dtype(self.dtype).itemsize)
+        try:
+            vbuf    = np.ndarray([2, self.nb_nrn], dtype=self.dtype, buffer=shm.buf)
+            barrier = mp.Barrier(len(parts) + 1)
+            queue   = mp.Queue()
+            procs   = [mp.Process(target=_run_partition,
+                                  args=(self.hwconfig, self.swconfig, dict(self.swconfig.parameters), self.dtype, FPGA_EMU, nlist, part,
+                                        shm.name, noise_seed, barrier, queue, self.show_progress and k == 0))
+                       for k, part in enumerate(parts)]
+            for p in procs:
+                p.start()
+
+            try:
+                self.__gather(nlist, vbuf, barrier)
+            except BrokenBarrierError:
+                pass # Failure of a worker, reported through queue
+            except BaseException:
+                barrier.abort() # Release workers
+                raise
+
+            results = [queue.get() for _ in procs]
+            for p in procs:
+                p.join()
+
+            errors = [err for [_, err] in results if err is not None]
+            if errors:
+                raise RuntimeError("Partitioned emulation failed: {}".format(errors[0]))
+
+            self.spk_tab = SpikeBuffer.fromArray(np.concatenate([spk for [spk, _] in results]), self.nb_nrn)
+            self.spk_tab.sort()
+        finally:
+            shm.close()
+            shm.unlink()
+
+        return [self.t, self.v, self.spk_tab]
+
+    def __gather(self, nlist, vbuf, barrier):
+        """Store or record membrane voltages published by workers at each time step
+
+        Voltages of a time step stay in their buffer until workers pass the barrier
+        of the next time step, which waits for this process.
+
+        :param nlist: Neurons emulated
+        :param vbuf: Shared double buffer of membrane voltages [2, neuron]
+        :param barrier: Barrier of all partitions and main process
+        """
+        rec = self.recorder
+        if rec is None:
+            self.v          = np.zeros([self.nb_nrn, len(self.t)], dtype=self.dtype)
+            self.v[:, 0]    = self.v_init
+        else:
+            rec.open(nlist, len(self.t), self.dtype)
+            rec.record(0, {"v": self.v_init[nlist]})
+
+        for i in range(1, len(self.t)):
+            barrier.wait()
+            if rec is None:
+                self.v[nlist, i] = vbuf[i % 2, nlist]
+            elif rec.isRecorded(i):
+                rec.record(i, {"v": vbuf[i % 2, nlist]})
+
+        if rec is not None:
+            rec.close()
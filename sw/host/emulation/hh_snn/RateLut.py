@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# @title      Fine rate tables for exact equations
+# @file       RateLut.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Rate tables on a fine voltage grid with linear interpolation
+#
+# @details
+# Forward Euler update of a gating variable is linear in its previous value:
+# xnew = r1(v)*xprev + r2(v). Rates r1, r2 are computed once per time step on a
+# fine voltage grid from Pospischil equations and linearly interpolated, unlike
+# the 2048-entry FPGA tables addressed by nearest voltage.
+# Exponential Euler update (exact for voltage held over the time step) is also
+# linear: r1 = exp(-dt/tau), r2 = xinf*(1-r1).
+#
+# > **17 Oct 2026** : file creation
+
+import numpy as np
+
+from configuration.neurons.Ionrates import Pospischil
+
+# Gating variables in order of rate tables
+LUT_GATES = ["m_Na", "h_Na", "m_K", "m_M", "m_L", "h_L", "m_T", "h_T"]
+
+# Update methods of gating variables
+GATING_EULER        = "euler"       # Forward Euler (FPGA equations)
+GATING_EXP_EULER    = "exp_euler"   # Exponential Euler
+
+def calc_gating_rates(v, dt, method:str=GATING_EULER) -> list:
+    """Calculate rates of linear gating update xnew = r1*xprev + r2 from Pospischil equations
+
+    :param v: Membrane voltages (mV)
+    :param float dt: Time step (ms)
+    :param str method: Update method (GATING_EULER or GATING_EXP_EULER)
+    :returns: [r1, r2] as arrays [gate, voltage]
+    """
+    if method not in [GATING_EULER, GATING_EXP_EULER]:
+        raise ValueError("Unknown gating update method: {}".format(method))
+
+    model   = Pospischil()
+    v       = np.asarray(v, dtype=np.float64)
+    r1      = np.zeros([len(LUT_GATES), len(v)])
+    r2      = np.zeros([len(LUT_GATES), len(v)])
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        alpha_beta = {
+            "m_Na" : [model.alpha_m_Na(v), model.beta_m_Na(v)],
+            "h_Na" : [model.alpha_h_Na(v), model.beta_h_Na(v)],
+            "m_K"  : [model.alpha_m_K(v),  model.beta_m_K(v)],
+            "m_L"  : [model.alpha_m_L(v),  model.beta_m_L(v)],
+            "h_L"  : [model.alpha_h_L(v),  model.beta_h_L(v)],
+        }
+        xinf_taux = {
+            "m_M"  : [model.xinf_M(v),     model.taux_M(v)],
+            "h_T"  : [model.xinf_T_h(v),   model.taux_T_h(v)],
+        }
+
+        for g, gate in enumerate(LUT_GATES):
+            if gate == "m_T": # Directly set to steady state
+                r1[g] = 0.0
+                r2[g] = model.xinf_T_m(v)
+                continue
+
+            if gate in alpha_beta:
+                [alpha, beta] = alpha_beta[gate]
+                if method == GATING_EULER:
+                    r1[g] = 1 - dt*(alpha + beta)
+                    r2[g] = dt*alpha
+                else:
+                    r1[g] = np.exp(-dt*(alpha + beta))
+                    r2[g] = alpha/(alpha + beta)*(1 - r1[g])
+            else:
+                [xinf, taux] = xinf_taux[gate]
+                if method == GATING_EULER:
+                    r1[g] = 1 - dt/taux
+                    r2[g] = dt*xinf/taux
+                else:
+                    r1[g] = np.exp(-dt/taux)
+                    r2[g] = xinf*(1 - r1[g])
+    return [r1, r2]
+
+class RateLut:
+    def __init__(self, dt, step:float=2**-8, vmin:float=-150.0, vmax:float=100.0, method:str=GATING_EULER, dtype=np.float64) -> None:
+        """Compute rate tables of Pospischil equations on a fine voltage grid
+
+        Voltages outside [vmin, vmax] use rates at boundaries.
+
+        :param float dt: Time step (ms)
+        :param str method: Update method of gating variables (GATING_EULER or GATING_EXP_EULER)
+        :param float step: Voltage step of grid (mV)
+        :param float vmin: Minimum voltage of grid (mV)
+        :param float vmax: Maximum voltage of grid (mV)
+        :param dtype: Type of tables (type of gating variables updated)
+        """
+        self.dt     = dt
+        self.method = method
+        self.step   = step
+        self.vmin   = vmin
+        self.size   = int(np.ceil((vmax - vmin)/step)) + 1
+        self.vmax   = vmin + (self.size-1)*step
+        self.v      = vmin + step*np.arange(self.size)
+
+        [self.r1, self.r2] = self.calcRates(self.v)
+
+        # Removable singularities of rates (0/0) interpolated from neighbours
+        for r in [self.r1, self.r2]:
+            for g in range(len(LUT_GATES)):
+                bad = ~np.isfinite(r[g])
+                if np.any(bad):
+                    r[g][bad] = np.interp(self.v[bad], self.v[~bad], r[g][~bad])
+
+        # Rates and slopes of all gates interleaved [voltage, rate, gate] for a single gather
+        self.rates  = np.stack([self.r1, self.r2], axis=1).transpose(2, 1, 0).astype(dtype)
+        self.slopes = np.diff(self.rates, axis=0, append=self.rates[-1:])
+
+    def calcRates(self, v):
+        """Calculate rates of gating update from Pospischil equations
+
+        :param v: Membrane voltages (mV)
+        :returns: [r1, r2] as arrays [gate, voltage]
+        """
+        return calc_gating_rates(v, self.dt, self.method)
+
+    def update(self, v, xprev:list) -> list:
+        """Advance gating variables by one time step
+
+        :param v: Membrane voltages (mV)
+        :param list xprev: Previous values of gating variables (LUT_GATES order)
+        :returns: New values of gating variables (LUT_GATES order)
+        """
+        pos     = np.clip((v - self.vmin)/self.step, 0, self.size-1)
+        addr    = pos.astype(int)
+        frac    = (pos - np.floor(pos))[:, np.newaxis, np.newaxis]
+        r       = self.rates[addr] + frac*self.slopes[addr]
+
+        return [r[:, 0, g]*xprev[g] + r[:, 1, g] for g in range(len(LUT_GATES))]
+
+    def getError(self, vmin:float=-100.0, vmax:float=60.0) -> dict:
+        """Get maximum interpolation error against Pospischil equations
+
+        Rates are compared at midpoints of grid (worst case of linear interpolation).
+        As gating variables are in [0, 1], the error of a gating update is bounded by
+        the sum of errors on r1 and r2.
+
+        :param float vmin: Minimum voltage evaluated (mV)
+        :param float vmax: Maximum voltage evaluated (mV)
+        :returns: Maximum error of gating update per gate
+        """
+        v        = np.arange(vmin, vmax, self.step) + self.step/2
+        [r1, r2] = self.calcRates(v)
+        [l1, l2] = [self.update(v, [np.ones_like(v)]*len(LUT_GATES)), self.update(v, [np.zeros_like(v)]*len(LUT_GATES))]
+
+        err = {}
+        for g, gate in enumerate(LUT_GATES):
+            ok          = np.isfinite(r1[g]) & np.isfinite(r2[g])
+            err_r1      = np.abs((l1[g] - l2[g]) - r1[g])[ok]
+            err_r2      = np.abs(l2[g] - r2[g])[ok]
+            err[gate]   = float(np.max(err_r1) + np.max(err_r2))
+        return err
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+# @title      Record emulation outputs
+# @file       Recorder.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Recorders streaming selected variables of emulation
+#
+# @details
+# > **17 Oct 2026** : file creation
+
+import os
+import numpy as np
+from abc import ABC, abstractmethod
+
+# Variables that can be recorded
+REC_VARIABLES = [
+    "v",
+    "mNa", "hNa", "mK", "mM", "mL", "hL", "mT", "hT",
+    "i_Na", "i_K", "i_M", "i_L", "i_T", "i_Leak", "i_noise", "i_syn",
+    "r_ampa", "r_nmda", "r_gabaa", "r_gabab", "s_gabab", "Bv_nmda"
+]
+
+class Recorder(ABC):
+    def __init__(self, variables:list=["v"], nlist=None, decimation:int=1) -> None:
+        """Record variables of selected neurons every decimation time steps
+
+        :param list variables: Variables to record (see REC_VARIABLES)
+        :param list nlist: Neurons to record (None for all neurons emulated)
+        :param int decimation: Record one time step every decimation time steps
+        """
+        for var in variables:
+            if var not in REC_VARIABLES:
+                raise ValueError("Unknown variable to record: {}".format(var))
+        if decimation < 1:
+            raise ValueError("Decimation has to be a positive integer: {}".format(decimation))
+
+        self.variables  = list(variables)
+        self.nlist      = nlist
+        self.decimation = int(decimation)
+
+    def open(self, nid, nb_steps:int, dtype, first_step:int=0) -> None:
+        """Prepare recording of an emulation
+
+        :param nid: Index of emulated neurons (order of values recorded)
+        :param int nb_steps: Number of time steps of emulation (including initial conditions)
+        :param dtype: Type of values recorded
+        :param int first_step: First time step recorded (resumed emulation)
+        """
+        nid = np.asarray(nid, dtype=int)
+        if self.nlist is None:
+            self.sel = np.arange(len(nid))
+        else:
+            pos = {n: p for p, n in enumerate(nid)}
+            if not all(n in pos for n in self.nlist):
+                raise ValueError("Neurons recorded have to be emulated")
+            self.sel = np.array([pos[n] for n in self.nlist], dtype=int)
+
+        self.nid        = nid[self.sel]
+        self.first      = -(-first_step // self.decimation) # First sample index
+        self.steps      = np.arange(self.first * self.decimation, nb_steps, self.decimation)
+        self.nb_samples = len(self.steps)
+        self.dtype      = dtype
+
+    def isRecorded(self, step:int) -> bool:
+        """Check if time step is recorded
+
+        :param int step: Time step index
+        """
+        return step % self.decimation == 0
+
+    def record(self, step:int, values:dict) -> None:
+        """Record values of a time step
+
+        :param int step: Time step index
+        :param dict values: Values of emulated neurons per variable (variables not recorded are ignored)
+        """
+        if not self.isRecorded(step):
+            return
+        sample = step // self.decimation - self.first
+        for var in self.variables:
+            if var in values:
+                self._write(var, sample, np.asarray(values[var])[self.sel])
+
+    @abstractmethod
+    def _write(self, var:str, sample:int, values) -> None:
+        """Write values of a variable at a sample
+
+        :param str var: Variable name
+        :param int sample: Sample index (from first sample recorded)
+        :param values: Values of recorded neurons
+        """
+
+    def flush(self) -> None:
+        """Write samples buffered so far (e.g. at checkpoint)"""
+        pass
+
+    def close(self) -> None:
+        """End recording"""
+        pass
+
+class MemoryRecorder(Recorder):
+    def open(self, nid, nb_steps:int, dtype, first_step:int=0) -> None:
+        """Allocate arrays [neuron, sample] in memory"""
+        super().open(nid, nb_steps, dtype, first_step)
+        self.data = {var : np.zeros([len(self.sel), self.nb_samples], dtype=dtype) for var in self.variables}
+
+    def _write(self, var:str, sample:int, values) -> None:
+        self.data[var][:, sample] = values
+
+class CaptureRecorder(Recorder):
+    def __init__(self, spec:dict, decimation:int=1) -> None:
+        """Capture selected neurons per variable in memory
+
+        Only what is captured is gathered and stored, e.g. membrane voltage of all
+        neurons and channel states of a few neurons:
+        {"v": "all", "mNa": [0, 3], "i_syn": range(16)}
+
+        :param dict spec: Neurons captured per variable ("all" or None for all neurons emulated)
+        :param int decimation: Capture one time step every decimation time steps
+        """
+        super().__init__(list(spec.keys()), None, decimation)
+        self.spec = {var: (None if (nlist is None or isinstance(nlist, str) and nlist == "all") else list(nlist))
+                     for (var, nlist) in spec.items()}
+
+    def open(self, nid, nb_steps:int, dtype, first_step:int=0) -> None:
+        """Allocate arrays [neuron, sample] per variable in memory"""
+        super().open(nid, nb_steps, dtype, first_step)
+        pos = {n: p for p, n in enumerate(self.nid)}
+
+        self.sels   = {}
+        self.pos    = {}
+        self.data   = {}
+        for (var, nlist) in self.spec.items():
+            if nlist is None:
+                nlist = list(self.nid)
+            if not all(n in pos for n in nlist):
+                raise ValueError("Neurons captured have to be emulated: {}".format(var))
+            self.sels[var]  = np.array([pos[n] for n in nlist], dtype=int)
+            self.pos[var]   = {n: p for p, n in enumerate(nlist)}
+            self.data[var]  = np.zeros([len(nlist), self.nb_samples], dtype=dtype)
+
+    def record(self, step:int, values:dict) -> None:
+        """Capture values of a time step
+
+        :param int step: Time step index
+        :param dict values: Values of emulated neurons per variable
+        """
+        if not self.isRecorded(step):
+            return
+        sample = step // self.decimation - self.first
+        for (var, sel) in self.sels.items():
+            if var in values:
+                self._write(var, sample, np.asarray(values[var])[sel])
+
+    def _write(self, var:str, sample:int, values) -> None:
+        self.data[var][:, sample] = values
+
+    def isCaptured(self, var:str, n:int) -> bool:
+        """Check if a variable of a neuron is captured
+
+        :param str var: Variable name
+        :param int n: Neuron id
+        """
+        return var in self.pos and n in self.pos[var]
+
+    def getTrace(self, var:str, n:int):
+        """Get captured values of a variable for a neuron
+
+        :param str var: Variable name
+        :param int n: Neuron id
+        :returns: Values at time steps of steps
+        """
+        if not self.isCaptured(var, n):
+            raise ValueError("Variable {} of neuron {} not captured".format(var, n))
+        return self.data[var][self.pos[var][n]]
+
+class DiskRecorder(Recorder):
+    def __init__(self, path:str, variables:list=["v"], nlist=None, decimation:int=1, chunk_size:int=4096) -> None:
+        """Stream recorded variables to .npy files in chunks of samples
+
+        Memory used is bounded by chunk_size samples per variable regardless of
+        emulation duration. Files are [neuron, sample] stored column-major so
+        that chunks are contiguous on disk.
+
+        :param str path: Directory of recording (one <variable>.npy per variable)
+        :param int chunk_size: Number of samples buffered before writing to disk
+        """
+        super().__init__(variables, nlist, decimation)
+        self.path       = path
+        self.chunk_size = int(chunk_size)
+        self.files      = {}
+
+    def open(self, nid, nb_steps:int, dtype, first_step:int=0) -> None:
+        """Create files of recording, or reopen them when emulation is resumed
+
+        Files hold all samples of the emulation from its first time step, a resumed
+        emulation writes its samples at their offsets in the existing files.
+        """
+        super().open(nid, nb_steps, dtype, first_step)
+        steps = np.arange(0, nb_steps, self.decimation) # Samples of whole emulation
+        shape = (len(self.sel), len(steps))
+
+        self.files  = {}
+        self.chunks = {}
+        self.start  = {}
+        if first_step > 0:
+            self.__reopen(steps, shape, dtype)
+        else:
+            os.makedirs(self.path, exist_ok=True)
+            np.save(os.path.join(self.path, "nid.npy"),   self.nid)
+            np.save(os.path.join(self.path, "steps.npy"), steps)
+            for var in self.variables:
+                self.files[var] = np.lib.format.open_memmap(os.path.join(self.path, var + ".npy"), mode="w+", dtype=dtype,
+                                                            shape=shape, fortran_order=True)
+
+        for var in self.variables:
+            self.chunks[var] = np.zeros([len(self.sel), self.chunk_size], dtype=dtype)
+            self.start[var]  = self.first
+
+    def __reopen(self, steps, shape, dtype) -> None:
+        """Open files of recording of the emulation resumed (refused if they do not match)"""
+        fpath = {var: os.path.join(self.path, var + ".npy") for var in ["nid", "steps"] + self.variables}
+        if not all(os.path.exists(f) for f in fpath.values()):
+            raise ValueError("No recording of emulation resumed in {}: record it from its first time step".format(self.path))
+        if not (np.array_equal(np.load(fpath["nid"]), self.nid) and np.array_equal(np.load(fpath["steps"]), steps)):
+            raise ValueError("Recording in {} does not match emulation resumed (neurons, time steps or decimation)".format(self.path))
+
+        for var in self.variables:
+            self.files[var] = np.lib.format.open_memmap(fpath[var], mode="r+")
+            if self.files[var].shape != shape or self.files[var].dtype != dtype or not self.files[var].flags.f_contiguous:
+                self.files = {}
+                raise ValueError("Recording of {} in {} does not match emulation resumed".format(var, self.path))
+
+    def _write(self, var:str, sample:int, values) -> None:
+        sample += self.first # Offset in files
+        if sample - self.start[var] >= self.chunk_size:
+            self.__flush(var)
+            self.start[var] = sample
+        self.chunks[var][:, sample - self.start[var]] = values
+
+    def __flush(self, var:str) -> None:
+        stop = min(self.start[var] + self.chunk_size, self.files[var].shape[1])
+        self.files[var][:, self.start[var]:stop] = self.chunks[var][:, :stop - self.start[var]]
+        self.files[var].flush()
+
+    def flush(self) -> None:
+        """Write samples buffered so far to files"""
+        for var in self.files:
+            self.__flush(var)
+
+    def close(self) -> None:
+        """Write remaining samples and close files"""
+        self.flush()
+        self.files  = {}
+        self.chunks = {}
+
+def load_recording(path:str) -> dict:
+    """Load recording of DiskRecorder as read-only memory mapped arrays
+
+    :param str path: Directory of recording
+    :returns: Arrays per variable, plus "nid" (neurons) and "steps" (time steps)
+    """
+    data = {}
+    for f in sorted(os.listdir(path)):
+        if f.endswith(".npy"):
+            data[f[:-len(".npy")]] = np.load(os.path.join(path, f), mmap_mode="r")
+    return data
@@ -12,6 +12,7 @@
 # @details
 # > **23 Oct 2023** : file creation (RB)
 
+import os
 import numpy as np
 from tqdm import tqdm
 from fxpmath import Fxp
@@ -23,40 +24,79 @@ from configuration.neurons.Hhparam   import *
 from configuration.neurons.Ionrates  import RATE_VMIN, RATE_VMAX, RATE_STEP, RATE_TABLE_SIZE
 from configuration.neurons.Ionrates  import Pospischil
 from configuration.synapses.Synapses import *
-from configuration.utility.Utility   import SFI
+from configuration.utility.Utility   import SFI, sfiQuantize, sfiRequantize
+from emulation.hh_snn.SynCsr         import SynCsr
+from emulation.hh_snn.SynStage       import SynStage
+from emulation.hh_snn.EventSynStage  import EventSynStage
+from emulation.hh_snn.Recorder       import Recorder, REC_VARIABLES
+from emulation.hh_snn.RateLut        import RateLut, calc_gating_rates, GATING_EULER, GATING_EXP_EULER
+from emulation.hh_snn.NoiseGen       import NoiseGen
+from emulation.hh_snn.StageProfiler  import NullProfiler
+from emulation.hh_snn.SpikeBuffer    import SpikeBuffer
+from emulation.hh_snn.StimSchedule   import StimSchedule
 
 SPK_THREHSOLD = -10.0 # Spike detection threshold for spikes (mV)
 FP_ID   = 0
 SFI_ID  = 1
 CODING  = SFI_ID
 
+# Emulation engines
+ENGINE_SCALAR = "scalar" # Neuron by neuron (reference)
+ENGINE_VECTOR = "vector" # Whole network per time step
+
+# Integrators of exact equations (vector engine)
+INTEG_EULER     = "euler"           # Forward Euler gating and voltage (FPGA equations)
+INTEG_EXP_EULER = "exp_euler"       # Exponential Euler gating and receptors, forward Euler voltage
+INTEG_CN        = "crank_nicolson"  # Exponential Euler gating and receptors, Crank-Nicolson voltage
+INTEG_GATING    = {INTEG_EULER: GATING_EULER, INTEG_EXP_EULER: GATING_EXP_EULER, INTEG_CN: GATING_EXP_EULER}
+
+# Dynamical state saved in checkpoints
+CKPT_STATE = [
+    "vprev", "detect",
+    "mprev_Na", "mprev_K", "mprev_M", "mprev_L", "mprev_T", "hprev_Na", "hprev_L", "hprev_T",
+    "iprev_noise",
+    "rprev_ampa", "rprev_nmda", "rprev_gabaa", "rprev_gabab", "sprev_gabab",
+    "rnew_ampa",  "rnew_nmda",  "rnew_gabaa",  "rnew_gabab",  "snew_gabab"
+]
+
 class SnnEmulator:
-    def __init__(self, hwconfig:HwConfigFile, swconfig:SwConfigFile, store_context:bool, dtype=np.float64) -> None:
+    def __init__(self, hwconfig:HwConfigFile, swconfig:SwConfigFile, store_context:bool, dtype=np.float64, recorder:Recorder=None, noise_seed:int=None,
+                 dt:float=None) -> None:
         """Initialize emulator from hardware config file
         :param HwConfigFile hwconfig: Hardware configuration file generated for FPGA
         :param int run_time_ms: Emulatior duration in ms
         :param int stim_delay_ms: Delay of stimulation insertion in ms
         :param int stim_dur_ms: Duration of stimulation in ms
+        :param Recorder recorder: Stream recorded variables instead of storing [neuron, time] arrays (vector engine only)
+        :param int noise_seed: Seed of counter-based noise keyed by (seed, neuron, time step) (None for global generator)
+        :param float dt: Time step of emulation (ms) if different from configuration (exact equations only)
         """
         self.hwconfig = hwconfig
         self.swconfig = swconfig
 
-        self.dt     = hwconfig.dt
+        self.dt     = hwconfig.dt if dt is None else dt
         self.nb_nrn = hwconfig.nb_nrn
 
         self.time_ms = swconfig.parameters['emulation_time_s']*1e3
         self.t       = np.linspace(1, self.time_ms/self.dt, int(self.time_ms/self.dt))
         
-        self.en_stim     = swconfig.parameters['en_stim']
-        self.stim_del_ms = [swconfig.parameters['stim_delay_ms']]    * self.nb_nrn
-        self.stim_dur_ms = [swconfig.parameters['stim_duration_ms']] * self.nb_nrn
+        self.stim    = StimSchedule.fromSwConfig(swconfig, self.nb_nrn) # Add pulses or vectors to extend protocol
 
         self.STORE_CONTEXT = store_context
-        self.spk_tab = []
+        self.spk_tab = SpikeBuffer(self.nb_nrn)
         self.dtype = dtype
-
-        # Declare variables
-        self.v              = np.zeros( [self.nb_nrn, len(self.t)], dtype=dtype)
+        self.recorder = recorder
+        self.noise = None if noise_seed is None else NoiseGen(noise_seed)
+        self.step = 0 # Time step of current state
+        self.show_progress = True
+        self.profiler = NullProfiler() # Set a StageProfiler to time stages of emulation
+
+        # Declare variables (only current state kept if recorder used)
+        if self.recorder is None:
+            self.v          = np.zeros( [self.nb_nrn, len(self.t)], dtype=dtype)
+        else:
+            self.v          = None
+        self.vprev          = np.zeros( self.nb_nrn, dtype=dtype)
         self.detect         = np.zeros( self.nb_nrn, dtype=np.bool8)
         
         self.mprev_Na       = np.zeros( self.nb_nrn, dtype=dtype )
@@ -98,7 +138,7 @@ class SnnEmulator:
         self.rnew_gabab     = np.zeros( self.nb_nrn, dtype=dtype )
         self.snew_gabab     = np.zeros( self.nb_nrn, dtype=dtype )
 
-        if self.STORE_CONTEXT:
+        if self.STORE_CONTEXT and self.recorder is None:
             self.mNa        = np.zeros( [self.nb_nrn, len(self.t)], dtype=dtype)
             self.hNa        = np.zeros( [self.nb_nrn, len(self.t)], dtype=dtype)
             self.mK         = np.zeros( [self.nb_nrn, len(self.t)], dtype=dtype)
@@ -143,10 +183,22 @@ class SnnEmulator:
             self.pmul_theta[nid]  = hwconfig.HH_param[nid][pid["pmul_theta"]]
             self.pmul_sigma[nid]  = hwconfig.HH_param[nid][pid["pmul_sigma"]]
             self.pmul_gsyn[nid]   = hwconfig.HH_param[nid][pid["pmul_gsyn"]]
+
+        # Parameters pre-multiplied by time step of configuration rescaled to time step of emulation
+        if self.dt != hwconfig.dt:
+            k = self.dt/hwconfig.dt
+            for p in [self.g_Na, self.g_K, self.g_M, self.g_L, self.g_T, self.g_Leak, self.i_stim, self.pmul_gsyn, self.pmul_theta]:
+                p *= k
+            # Noise current is a voltage increment per time step: Ornstein-Uhlenbeck process
+            # of same mean and diffusion scaled by k
+            self.noise_offs *= k*k
+            self.pmul_sigma *= k*np.sqrt(k)
  
         # Initial conditions
+        self.vprev[:] = self.v_init
         for nid in range(self.nb_nrn):
-            self.v[nid][0]      = self.v_init[nid]
+            if self.recorder is None:
+                self.v[nid][0]  = self.v_init[nid]
 
             self.mprev_Na[nid]  = 0.01
             self.mprev_K[nid]   = 0.01
@@ -158,30 +210,90 @@ class SnnEmulator:
             self.hprev_L[nid]   = 0.99
             self.hprev_T[nid]   = 0.99
 
-        if self.STORE_CONTEXT:
-            self.mNa[nid][0] = self.mprev_Na[nid]
-            self.mK[nid][0]  = self.mprev_K[nid]
-            self.mM[nid][0]  = self.mprev_M[nid]
-            self.mL[nid][0]  = self.mprev_L[nid]
-            self.mT[nid][0]  = self.mprev_T[nid]
+            if self.STORE_CONTEXT and self.recorder is None:
+                self.mNa[nid][0] = self.mprev_Na[nid]
+                self.mK[nid][0]  = self.mprev_K[nid]
+                self.mM[nid][0]  = self.mprev_M[nid]
+                self.mL[nid][0]  = self.mprev_L[nid]
+                self.mT[nid][0]  = self.mprev_T[nid]
 
-            self.hNa[nid][0] = self.hprev_Na[nid]
-            self.hL[nid][0]  = self.hprev_L[nid]
-            self.hT[nid][0]  = self.hprev_T[nid]
+                self.hNa[nid][0] = self.hprev_Na[nid]
+                self.hL[nid][0]  = self.hprev_L[nid]
+                self.hT[nid][0]  = self.hprev_T[nid]
 
-        self.wsyn = hwconfig.wsyn
-        self.tsyn = hwconfig.tsyn
+        self.syn  = hwconfig.syn
 
-    def run(self, nlist, FPGA_EMU:bool=False):
+    def run(self, nlist, FPGA_EMU:bool=False, engine:str=ENGINE_SCALAR, checkpoint:str=None, checkpoint_interval_s:float=10.0, rate_lut:RateLut=None,
+            integrator:str=INTEG_EULER, event_syn:bool=False):
         """Running simulation from hardware configuration package
 
         This version is saving intermediate variables for later analysis.
+        Emulation continues from current time step (resumed from checkpoint or extended).
         
         :param list nlist: Number of neurons to compute (if synapses used, has to include all neurons included)
+        :param bool FPGA_EMU: Emulate FPGA equations (rate tables and fixed point) instead of exact equations
+        :param str engine: Emulation engine ("scalar": neuron by neuron, "vector": whole network per time step)
+        :param str checkpoint: Path of checkpoint file written during emulation (None to disable)
+        :param float checkpoint_interval_s: Interval between checkpoints in emulated time (s), last step always saved
+        :param RateLut rate_lut: Fine rate tables replacing analytic rates of exact equations (vector engine only)
+        :param str integrator: Integrator of exact equations (see INTEG_GATING, vector engine only for other than forward Euler)
+        :param bool event_syn: Scatter synapses only from presynaptic neurons in release window (see EventSynStage, vector engine only)
         """
+        self.ckpt_path  = checkpoint
+        self.ckpt_steps = max(1, int(checkpoint_interval_s*1e3/self.dt))
+
+        if integrator not in INTEG_GATING:
+            raise ValueError("Unknown integrator: {}".format(integrator))
+        if FPGA_EMU and (integrator != INTEG_EULER or self.dt != self.hwconfig.dt):
+            raise ValueError("FPGA equations only emulated with forward Euler at time step of configuration")
+        if rate_lut is not None and rate_lut.method != INTEG_GATING[integrator]:
+            raise ValueError("Fine rate tables computed for {} gating update, integrator requires {}".format(rate_lut.method, INTEG_GATING[integrator]))
+
+        if engine == ENGINE_VECTOR:
+            return self.__runVector(nlist, FPGA_EMU, rate_lut, integrator, event_syn)
+        elif engine != ENGINE_SCALAR:
+            raise ValueError("Unknown emulation engine: {}".format(engine))
+        elif integrator != INTEG_EULER:
+            raise ValueError("Integrators other than forward Euler only supported by vector engine")
+        elif self.recorder is not None:
+            raise ValueError("Recorder only supported by vector engine")
+        elif rate_lut is not None:
+            raise ValueError("Fine rate tables only supported by vector engine")
+        elif event_syn:
+            raise ValueError("Event-driven synapses only supported by vector engine")
+
+        nid         = np.asarray(nlist, dtype=int)
+        syn         = Synapses().destexhe
+        syn_stage   = SynStage(self.getSynCsr(nid), self.dt)
+        en_syn      = syn_stage.csr.getNnz() > 0
+        prof        = self.profiler
+
+        # Stimulation current vectors and vector of each time step
+        [stim_vec, stim_idx] = self.stim.compile(self.t, self.dt, self.i_stim, self.dt/self.hwconfig.dt)
+
+        prof.begin()
+        for i in tqdm(range(self.step, len(self.t)-1), disable=not self.show_progress):
+            stim_cur = stim_vec[stim_idx[i]]
+
+            # Counter-based noise of all neurons at current time step
+            if self.noise is not None:
+                rand_step = self.noise.get(nid, i)
+                prof.lap("noise")
+
+            # Synaptic stage (presynaptic states advanced once per time step)
+            if en_syn:
+                syn_act = self.__stepSynPre(syn_stage, nid, self.v[nid, i])
+                syn_pre = self.__getSynPre(nid)
 
-        for i in tqdm(range(len(self.t)-1)):
-            for n in nlist:
+                if self.STORE_CONTEXT:
+                    self.r_ampa[:,  i+1]  = self.rnew_ampa
+                    self.r_nmda[:,  i+1]  = self.rnew_nmda
+                    self.r_gabaa[:, i+1]  = self.rnew_gabaa
+                    self.r_gabab[:, i+1]  = self.rnew_gabab
+                    self.s_gabab[:, i+1]  = self.snew_gabab
+                prof.lap("synapses")
+
+            for j, n in enumerate(nlist):
                 # Coding vprev/mprev
                 v           = self.v[n][i]
                 
@@ -241,8 +353,10 @@ class SnnEmulator:
                     hnew_Na = Pospischil().calc_h_Na(v, hprev_Na, self.dt)
                     hnew_L  = Pospischil().calc_h_L( v, hprev_L,  self.dt)
                     hnew_T  = Pospischil().calc_h_T( v, hprev_T,  self.dt)
+                prof.lap("rates")
                 
                 # Coding parameters
+                rand_draw = np.random.randn() if self.noise is None else rand_step[j]
                 if FPGA_EMU:
                     g_Na        = self.g_Na[n]
                     g_K         = self.g_K[n]
@@ -255,13 +369,13 @@ class SnnEmulator:
                     e_Ca        = self.e_Ca[n]
                     e_Leak      = self.e_Leak[n]
 
-                    i_stim      = Fxp(self.i_stim[n],       signed=True, n_word=SFI.CUR.WIDTH,       n_frac=SFI.CUR.DEC)
+                    i_stim      = Fxp(stim_cur[n],          signed=True, n_word=SFI.CUR.WIDTH,       n_frac=SFI.CUR.DEC)
                     noise_offs  = Fxp(self.noise_offs[n],   signed=True, n_word=SFI.MU.WIDTH,        n_frac=SFI.MU.DEC)
                     pmul_theta  = Fxp(self.pmul_theta[n],   signed=True, n_word=SFI.THETA.WIDTH,     n_frac=SFI.THETA.DEC)
                     pmul_sigma  = Fxp(self.pmul_sigma[n],   signed=True, n_word=SFI.SIGMA.WIDTH,     n_frac=SFI.SIGMA.DEC)
                     pmul_gsyn   = Fxp(self.pmul_gsyn[n],    signed=True, n_word=SFI.PMUL_GSYN.WIDTH, n_frac=SFI.PMUL_GSYN.DEC)
                     iprev_noise = Fxp(self.iprev_noise[n],  signed=True, n_word=SFI.CUR_TRUNC.WIDTH, n_frac=SFI.CUR_TRUNC.DEC)
-                    rand_val    = Fxp(np.random.randn(),    signed=True, n_word=SFI.THETA.WIDTH,     n_frac=SFI.THETA.DEC)
+                    rand_val    = Fxp(rand_draw,            signed=True, n_word=SFI.THETA.WIDTH,     n_frac=SFI.THETA.DEC)
                 else:
                     g_Na        = self.g_Na[n]
                     g_K         = self.g_K[n]
@@ -273,13 +387,14 @@ class SnnEmulator:
                     e_K         = self.e_K[n]
                     e_Ca        = self.e_Ca[n]
                     e_Leak      = self.e_Leak[n]
-                    i_stim      = self.i_stim[n]
+                    i_stim      = stim_cur[n]
                     noise_offs  = self.noise_offs[n]
                     pmul_theta  = self.pmul_theta[n]
                     pmul_sigma  = self.pmul_sigma[n]
                     pmul_gsyn   = self.pmul_gsyn[n]
                     iprev_noise = self.iprev_noise[n]
-                    rand_val    = np.random.randn()
+                    rand_val    = rand_draw
+                prof.lap("fixed_point")
 
                 # Calculate currents (from mnew or mprev)
                 if True:
@@ -298,56 +413,26 @@ class SnnEmulator:
                     i_T        = g_T  * (mprev_T*mprev_T)  * hnew_T * (v - e_Ca)
                     i_Leak     = g_Leak  * (v - e_Leak)
                     i_noise    = iprev_noise + noise_offs + pmul_theta*iprev_noise + pmul_sigma*rand_val
+                prof.lap("ionic")
 
-                # Calulate synaptic current
-                i_syn = 0
-                for npre in nlist:
-                    # TODO : add syn emulation
-                    # if FPGA_EMU and SFI_CODING:
-                    #     v_npre  = Fxp(self.v[npre][i],    signed=True, n_word=SFI.V.WIDTH, n_frac=SFI.V.DEC)
-                    #     wsyn    = Fxp(self.wsyn[n][npre], signed=True, n_word=14,          n_frac=12) # TODO: check coding
-                    # else:
-                    v_npre = self.v[npre][i]
-                    wsyn    = self.wsyn[n][npre]
-                    # pmul_gsyn = pmul_gsyn.astype(float)
-                    
-                    if   self.tsyn[n][npre] == "ampa":
-                        [i_syn_it, self.rnew_ampa[npre]]  = Synapses().destexhe.calcISynAmpa( v_npre, v, self.rprev_ampa[npre],  wsyn*pmul_gsyn, self.dt)
-                    elif self.tsyn[n][npre] == "gabaa":
-                        [i_syn_it, self.rnew_gabaa[npre]] = Synapses().destexhe.calcISynGabaa(v_npre, v, self.rprev_gabaa[npre], wsyn*pmul_gsyn, self.dt)
-                    elif self.tsyn[n][npre] == "nmda":
-                        [i_syn_it, self.rnew_nmda[npre]]  = Synapses().destexhe.calcISynNmda( v_npre, v, self.rprev_nmda[npre],  wsyn*pmul_gsyn, self.dt)
-                    elif self.tsyn[n][npre] == "gabab":
-                        [i_syn_it, self.snew_gabab[npre], self.rnew_gabab[npre]] = Synapses().destexhe.calcISynGabab(v_npre, v, self.sprev_gabab[npre], self.rprev_gabab[npre], wsyn*pmul_gsyn, self.dt)
+                # Calulate synaptic current (from weighted presynaptic states)
+                if en_syn:
+                    if FPGA_EMU:
+                        i_syn = syn_stage.calcISynFxp(j, v, pmul_gsyn, *syn_pre)
                     else:
-                        i_syn_it = 0
-                    
-                    i_syn += i_syn_it
-                
-                if self.STORE_CONTEXT:
-                    self.r_ampa[:,  i+1]  = self.rnew_ampa
-                    self.r_nmda[:,  i+1]  = self.rnew_nmda
-                    self.r_gabaa[:, i+1]  = self.rnew_gabaa
-                    self.r_gabab[:, i+1]  = self.rnew_gabab
-                    self.s_gabab[:, i+1]  = self.snew_gabab
+                        i_syn = syn_stage.calcISyn(v, pmul_gsyn, syn_act[:, j])
+                else:
+                    i_syn = 0
 
-                    for npre in nlist:
-                        self.Bv_nmda[npre, i+1]       = Synapses().destexhe.B_v(v)
+                if self.STORE_CONTEXT:
+                    self.Bv_nmda[n, i+1]  = syn.B_v(v)
 
                     if FPGA_EMU:
                         self.i_syn[n][i+1] = i_syn
                         # self.i_syn[n][i+1] = i_syn.astype(float)
                     else:
                         self.i_syn[n][i+1] = i_syn
-
-                # Insert stimulation
-                if (self.t[i] > (self.stim_del_ms[n]/self.dt)) and (self.t[i] < ((self.stim_del_ms[n]+self.stim_dur_ms[n])/self.dt)) and self.en_stim:
-                    i_stim = i_stim
-                else:
-                    if FPGA_EMU:
-                        i_stim = Fxp(0, signed=True, n_word=SFI.CUR.WIDTH, n_frac=SFI.CUR.DEC)
-                    else:
-                        i_stim = 0
+                prof.lap("synapses")
 
                 # Calculate new membrane voltage
                 if FPGA_EMU: # TODO : add fpga sfi emulation of synapses
@@ -362,6 +447,7 @@ class SnnEmulator:
                     sfi_i_noise     = Fxp(i_noise,  signed=True, n_word=SFI.CUR.WIDTH,       n_frac=SFI.CUR.DEC)
                     sfi_i_stim      = Fxp(i_stim,   signed=True, n_word=SFI.CUR.WIDTH,       n_frac=SFI.CUR.DEC)
                     sfi_i_syn       = Fxp(i_syn,    signed=True, n_word=SFI.CUR.WIDTH,       n_frac=SFI.CUR.DEC)
+                    prof.lap("fixed_point")
 
                     dV              = sfi_i_Na + sfi_i_K + sfi_i_M + sfi_i_L + sfi_i_T + sfi_i_Leak - sfi_i_noise - sfi_i_stim + sfi_i_syn
                     vnew            = sfi_v - dV
@@ -373,21 +459,9 @@ class SnnEmulator:
                     self.v[n][i+1]  = vnew.astype(float)
                 else:
                     self.v[n][i+1]  = vnew
-
-                # Detection for raster plot
-                if (vnew > SPK_THREHSOLD) and (self.detect[n]==False):
-                    self.spk_tab.append([i+1, n])
-                    self.detect[n] = True
-                elif (vnew < SPK_THREHSOLD) and (self.detect[n]==True):
-                    self.detect[n] = False
+                prof.lap("integration")
 
                 # Update previous values
-                self.rprev_ampa     = self.rnew_ampa
-                self.rprev_nmda     = self.rnew_nmda
-                self.rprev_gabaa    = self.rnew_gabaa
-                self.rprev_gabab    = self.rnew_gabab
-                self.sprev_gabab    = self.snew_gabab
-
                 self.mprev_Na[n] = mnew_Na
                 self.mprev_K[n]  = mnew_K
                 self.mprev_M[n]  = mnew_M
@@ -418,5 +492,461 @@ class SnnEmulator:
                     self.i_T[n][i+1]        = i_T
                     self.i_Leak[n][i+1]     = i_Leak
                     self.i_noise[n][i+1]    = i_noise
+                prof.lap("recording")
+
+            # Detection for raster plot
+            self.__detectSpikes(i+1, nid, self.v[nid, i+1])
+            prof.lap("detection")
+
+            self.vprev[nid] = self.v[nid, i+1]
+            self.__stepDone(i+1)
+            prof.lap("exchange")
+            prof.stepDone(i+1)
+        prof.end()
+
+        return [self.t, self.v, self.spk_tab]
+
+    def __runVector(self, nlist, FPGA_EMU:bool, rate_lut:RateLut=None, integrator:str=INTEG_EULER, event_syn:bool=False):
+        """Running simulation with all neurons of nlist advanced together at each time step
+
+        Same equations as the scalar engine evaluated on arrays of neurons.
 
-        return [self.t, self.v, self.spk_tab]
\ No newline at end of file
+        :param list nlist: Number of neurons to compute (if synapses used, has to include all neurons included)
+        :param bool FPGA_EMU: Emulate FPGA equations (rate tables and fixed point) instead of exact equations
+        :param RateLut rate_lut: Fine rate tables replacing analytic rates of exact equations
+        :param str integrator: Integrator of exact equations
+        :param bool event_syn: Scatter synapses only from presynaptic neurons in release window
+        """
+        nid     = np.asarray(nlist, dtype=int)
+        dt      = self.dt
+        model   = Pospischil()
+        syn     = Synapses().destexhe
+
+        # Rate tables [ionic channel, address]
+        m_rates1 = np.asarray(self.hwconfig.m_rates1, dtype=self.dtype)
+        m_rates2 = np.asarray(self.hwconfig.m_rates2, dtype=self.dtype)
+        h_rates1 = np.asarray(self.hwconfig.h_rates1, dtype=self.dtype)
+        h_rates2 = np.asarray(self.hwconfig.h_rates2, dtype=self.dtype)
+
+        # Parameters of neurons computed
+        g_Na        = self.g_Na[nid]
+        g_K         = self.g_K[nid]
+        g_M         = self.g_M[nid]
+        g_L         = self.g_L[nid]
+        g_T         = self.g_T[nid]
+        g_Leak      = self.g_Leak[nid]
+        e_Na        = self.e_Na[nid]
+        e_K         = self.e_K[nid]
+        e_Ca        = self.e_Ca[nid]
+        e_Leak      = self.e_Leak[nid]
+
+        # Stimulation current vectors and vector of each time step
+        [stim_vec, stim_idx] = self.stim.compile(self.t, dt, self.i_stim, dt/self.hwconfig.dt)
+        stim_vec    = stim_vec[:, nid]
+
+        # Fixed point values are integers scaled by 2**DEC of their SFI encoding
+        if FPGA_EMU:
+            stim_vec    = sfiQuantize(stim_vec,             SFI.CUR)
+            noise_offs  = sfiQuantize(self.noise_offs[nid], SFI.MU)
+            pmul_theta  = sfiQuantize(self.pmul_theta[nid], SFI.THETA)
+            pmul_sigma  = sfiQuantize(self.pmul_sigma[nid], SFI.SIGMA)
+            pmul_gsyn   = sfiQuantize(self.pmul_gsyn[nid],  SFI.PMUL_GSYN)
+
+            # Noise terms are summed exactly on fractional bits of the widest product
+            dec_noise   = max(SFI.CUR_TRUNC.DEC, SFI.MU.DEC, SFI.THETA.DEC+SFI.CUR_TRUNC.DEC, SFI.SIGMA.DEC+SFI.THETA.DEC)
+        else:
+            noise_offs  = self.noise_offs[nid]
+            pmul_theta  = self.pmul_theta[nid]
+            pmul_sigma  = self.pmul_sigma[nid]
+            pmul_gsyn   = self.pmul_gsyn[nid]
+
+        # Synapses from source neurons to neurons computed
+        if event_syn:
+            syn_stage = EventSynStage(self.getSynCsr(nid), dt, integrator != INTEG_EULER)
+        else:
+            syn_stage = SynStage(self.getSynCsr(nid), dt, integrator != INTEG_EULER)
+        syn_src     = syn_stage.csr.src
+        en_syn      = syn_stage.csr.getNnz() > 0
+
+        # Recording
+        rec = self.recorder
+        if rec is not None:
+            rec.open(nid, len(self.t), self.dtype, self.step)
+            rec.record(self.step, self.__getContext(nid, self.vprev[nid], rec.variables))
+
+        prof = self.profiler
+        prof.begin()
+        for i in tqdm(range(self.step, len(self.t)-1), disable=not self.show_progress):
+            v = self.vprev[nid]
+
+            mprev_Na    = self.mprev_Na[nid]
+            mprev_K     = self.mprev_K[nid]
+            mprev_M     = self.mprev_M[nid]
+            mprev_L     = self.mprev_L[nid]
+            mprev_T     = self.mprev_T[nid]
+
+            hprev_Na    = self.hprev_Na[nid]
+            hprev_L     = self.hprev_L[nid]
+            hprev_T     = self.hprev_T[nid]
+
+            # Ionic channels states
+            if FPGA_EMU:
+                addr    = np.clip(np.rint(np.abs(v - RATE_VMIN) / RATE_STEP), 0, RATE_TABLE_SIZE-1).astype(int)
+
+                mnew_Na = m_rates1[0][addr] * mprev_Na  +  m_rates2[0][addr]
+                hnew_Na = h_rates1[0][addr] * hprev_Na  +  h_rates2[0][addr]
+                mnew_K  = m_rates1[1][addr] * mprev_K   +  m_rates2[1][addr]
+                mnew_M  = m_rates1[2][addr] * mprev_M   +  m_rates2[2][addr]
+                mnew_L  = m_rates1[3][addr] * mprev_L   +  m_rates2[3][addr]
+                hnew_L  = h_rates1[3][addr] * hprev_L   +  h_rates2[3][addr]
+                mnew_T  = m_rates1[4][addr] * mprev_T   +  m_rates2[4][addr]
+                hnew_T  = h_rates1[4][addr] * hprev_T   +  h_rates2[4][addr]
+            elif rate_lut is not None:
+                [mnew_Na, hnew_Na, mnew_K, mnew_M, mnew_L, hnew_L, mnew_T, hnew_T] = rate_lut.update(v,
+                    [mprev_Na, hprev_Na, mprev_K, mprev_M, mprev_L, hprev_L, mprev_T, hprev_T])
+            elif integrator != INTEG_EULER:
+                [r1, r2] = calc_gating_rates(v, dt, INTEG_GATING[integrator])
+                [mnew_Na, hnew_Na, mnew_K, mnew_M, mnew_L, hnew_L, mnew_T, hnew_T] = [(r1[g]*x + r2[g]).astype(self.dtype) for (g, x) in
+                    enumerate([mprev_Na, hprev_Na, mprev_K, mprev_M, mprev_L, hprev_L, mprev_T, hprev_T])]
+            else:
+                mnew_Na = model.calc_m_Na(v, mprev_Na, dt)
+                mnew_K  = model.calc_m_K( v, mprev_K,  dt)
+                mnew_M  = model.calc_m_M( v, mprev_M,  dt)
+                mnew_L  = model.calc_m_L( v, mprev_L,  dt)
+                mnew_T  = model.calc_m_T( v, mprev_T,  dt)
+
+                hnew_Na = model.calc_h_Na(v, hprev_Na, dt)
+                hnew_L  = model.calc_h_L( v, hprev_L,  dt)
+                hnew_T  = model.calc_h_T( v, hprev_T,  dt)
+            prof.lap("rates")
+
+            # Ionic currents
+            i_Na    = g_Na * (mnew_Na*mnew_Na*mnew_Na) * hnew_Na * (v - e_Na)
+            i_K     = g_K  * (mnew_K*mnew_K*mnew_K*mnew_K)  * (v - e_K)
+            i_M     = g_M  * mnew_M     * (v - e_K)
+            i_L     = g_L  * (mnew_L*mnew_L)  * hnew_L * (v - e_Ca)
+            i_T     = g_T  * (mnew_T*mnew_T)  * hnew_T * (v - e_Ca)
+            i_Leak  = g_Leak  * (v - e_Leak)
+            prof.lap("ionic")
+
+            # Noise current
+            if FPGA_EMU:
+                iprev_noise = sfiQuantize(self.iprev_noise[nid],     SFI.CUR_TRUNC)
+                rand_val    = sfiQuantize(self.drawNoise(nid),       SFI.THETA)
+                sfi_i_noise = ( (iprev_noise             << (dec_noise - SFI.CUR_TRUNC.DEC))
+                              + (noise_offs              << (dec_noise - SFI.MU.DEC))
+                              + ((pmul_theta*iprev_noise) << (dec_noise - SFI.THETA.DEC - SFI.CUR_TRUNC.DEC))
+                              + ((pmul_sigma*rand_val)    << (dec_noise - SFI.SIGMA.DEC - SFI.THETA.DEC)) )
+                i_noise     = sfi_i_noise / 2.0**dec_noise
+            else:
+                iprev_noise = self.iprev_noise[nid]
+                rand_val    = self.drawNoise(nid).astype(self.dtype, copy=False)
+                i_noise     = iprev_noise + noise_offs + pmul_theta*iprev_noise + pmul_sigma*rand_val
+            prof.lap("noise")
+
+            # Synaptic current (presynaptic voltages from previous time step)
+            if en_syn:
+                syn_act = self.__stepSynPre(syn_stage, syn_src, self.vprev[syn_src])
+                if FPGA_EMU: # Exact value of fixed point current
+                    i_syn = syn_stage.calcISynSfi(v, pmul_gsyn, *self.__getSynPre(syn_src))
+                    i_syn = sfiRequantize(i_syn, SFI.PMUL_GSYN.DEC, SFI.CUR) / 2.0**SFI.CUR.DEC
+                else:
+                    i_syn = syn_stage.calcISyn(v, pmul_gsyn, syn_act)
+            else:
+                i_syn   = np.zeros(len(nid), dtype=self.dtype)
+            prof.lap("synapses")
+
+            # Insert stimulation
+            i_stim_on = stim_vec[stim_idx[i]]
+
+            # Calculate new membrane voltage
+            if FPGA_EMU: # V and currents share the same fractional bits
+                sfi_i_Na        = sfiQuantize(i_Na,     SFI.CUR)
+                sfi_i_K         = sfiQuantize(i_K,      SFI.CUR)
+                sfi_i_M         = sfiQuantize(i_M,      SFI.CUR)
+                sfi_i_L         = sfiQuantize(i_L,      SFI.CUR)
+                sfi_i_T         = sfiQuantize(i_T,      SFI.CUR)
+                sfi_i_Leak      = sfiQuantize(i_Leak,   SFI.CUR)
+                sfi_v           = sfiQuantize(v,        SFI.V)
+
+                sfi_i_noise     = sfiRequantize(sfi_i_noise, dec_noise, SFI.CUR)
+                sfi_i_stim      = i_stim_on
+                sfi_i_syn       = sfiQuantize(i_syn,    SFI.CUR)
+                prof.lap("fixed_point")
+
+                dV              = sfi_i_Na + sfi_i_K + sfi_i_M + sfi_i_L + sfi_i_T + sfi_i_Leak - sfi_i_noise - sfi_i_stim + sfi_i_syn
+                vnew            = (sfi_v - dV) / 2.0**SFI.V.DEC
+            else:
+                dV              = i_Na + i_K + i_M + i_L + i_T + i_Leak - i_noise - i_stim_on + i_syn
+                if integrator == INTEG_CN: # Ionic currents implicit at mid step (linear in v for conductances of new gating states)
+                    g_ion       = (g_Na*(mnew_Na*mnew_Na*mnew_Na)*hnew_Na + g_K*(mnew_K*mnew_K*mnew_K*mnew_K) + g_M*mnew_M
+                                   + g_L*(mnew_L*mnew_L)*hnew_L + g_T*(mnew_T*mnew_T)*hnew_T + g_Leak)
+                    dV          = dV/(1 + g_ion/2)
+                vnew            = v - dV
+
+            self.vprev[nid] = vnew
+            if rec is None:
+                self.v[nid, i+1] = vnew
+            prof.lap("integration")
+
+            # Detection for raster plot
+            self.__detectSpikes(i+1, nid, vnew)
+            prof.lap("detection")
+
+            # Update previous values
+            self.mprev_Na[nid] = mnew_Na
+            self.mprev_K[nid]  = mnew_K
+            self.mprev_M[nid]  = mnew_M
+            self.mprev_L[nid]  = mnew_L
+            self.mprev_T[nid]  = mnew_T
+
+            self.hprev_Na[nid] = hnew_Na
+            self.hprev_L[nid]  = hnew_L
+            self.hprev_T[nid]  = hnew_T
+
+            self.iprev_noise[nid] = i_noise
+
+            # Record or store context
+            if rec is not None and rec.isRecorded(i+1):
+                rec.record(i+1, self.__getContext(nid, self.vprev[nid], rec.variables, {
+                    "i_Na" : i_Na, "i_K" : i_K, "i_M" : i_M, "i_L" : i_L, "i_T" : i_T, "i_Leak" : i_Leak,
+                    "i_noise" : i_noise, "i_syn" : i_syn, "Bv_nmda" : syn.B_v(v) if "Bv_nmda" in rec.variables else None
+                }))
+            elif self.STORE_CONTEXT and rec is None:
+                self.mNa[nid, i+1]      = mnew_Na
+                self.hNa[nid, i+1]      = hnew_Na
+                self.mK[nid, i+1]       = mnew_K
+                self.mM[nid, i+1]       = mnew_M
+                self.mL[nid, i+1]       = mnew_L
+                self.hL[nid, i+1]       = hnew_L
+                self.mT[nid, i+1]       = mnew_T
+                self.hT[nid, i+1]       = hnew_T
+
+                self.i_Na[nid, i+1]     = i_Na
+                self.i_K[nid, i+1]      = i_K
+                self.i_M[nid, i+1]      = i_M
+                self.i_L[nid, i+1]      = i_L
+                self.i_T[nid, i+1]      = i_T
+                self.i_Leak[nid, i+1]   = i_Leak
+                self.i_noise[nid, i+1]  = i_noise
+                self.i_syn[nid, i+1]    = i_syn
+
+                self.r_ampa[:,  i+1]    = self.rnew_ampa
+                self.r_nmda[:,  i+1]    = self.rnew_nmda
+                self.r_gabaa[:, i+1]    = self.rnew_gabaa
+                self.r_gabab[:, i+1]    = self.rnew_gabab
+                self.s_gabab[:, i+1]    = self.snew_gabab
+                self.Bv_nmda[nid, i+1]  = syn.B_v(v)
+            prof.lap("recording")
+
+            self.exchange(i+1, nid)
+            self.__stepDone(i+1)
+            prof.lap("exchange")
+            prof.stepDone(i+1)
+        prof.end()
+
+        if rec is not None:
+            rec.close()
+
+        return [self.t, self.v, self.spk_tab]
+
+    def getSynCsr(self, nid) -> SynCsr:
+        """Get sparse synaptic connectivity among emulated neurons
+
+        :param nid: Index of emulated neurons
+        """
+        return SynCsr.fromTable(self.syn, nid, self.dtype)
+
+    def exchange(self, step:int, nid):
+        """Exchange state of emulated neurons with other emulators at end of a time step (vector engine)
+
+        :param int step: Time step reached
+        :param nid: Index of emulated neurons
+        """
+        pass
+
+    def drawNoise(self, nid):
+        """Draw standard normal values of noise for emulated neurons at current time step (vector engine)
+
+        :param nid: Index of emulated neurons
+        """
+        if self.noise is not None:
+            return self.noise.get(nid, self.step)
+        return np.random.randn(len(nid))
+
+    def extend(self, time_s:float):
+        """Extend emulation duration, next run continues from current time step
+
+        :param float time_s: Emulation time added (s)
+        """
+        nb_steps     = len(self.t)
+        self.time_ms = self.time_ms + time_s*1e3
+        self.t       = np.linspace(1, self.time_ms/self.dt, int(self.time_ms/self.dt))
+
+        # Extend arrays [neuron, time] stored in memory
+        for var in REC_VARIABLES:
+            val = getattr(self, var, None)
+            if isinstance(val, np.ndarray) and val.ndim == 2:
+                setattr(self, var, np.concatenate((val, np.zeros([val.shape[0], len(self.t)-nb_steps], dtype=val.dtype)), axis=1))
+
+    def saveRaster(self, fpath:str):
+        """Save spikes in raster format of target application
+
+        :param str fpath: Path of raster file (binary frames if .bin, csv otherwise)
+        """
+        if fpath.endswith(".bin"):
+            self.spk_tab.writeRasterBin(fpath, self.dt, len(self.t))
+        else:
+            self.spk_tab.writeRasterCsv(fpath, self.dt)
+
+    def saveCheckpoint(self, path:str):
+        """Save dynamical state of emulation
+
+        Written to a temporary file first so that an interrupted save keeps previous checkpoint.
+
+        :param str path: Path of checkpoint file (.npz)
+        """
+        rng = np.random.get_state()
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f,
+                step            = self.step,
+                dt              = self.dt,
+                nb_nrn          = self.nb_nrn,
+                spk_tab         = self.spk_tab.toArray(),
+                rng_keys        = rng[1],
+                rng_pos         = rng[2],
+                rng_has_gauss   = rng[3],
+                rng_gauss       = rng[4],
+                **{name : getattr(self, name) for name in CKPT_STATE})
+        os.replace(tmp, path)
+
+    def loadCheckpoint(self, path:str):
+        """Restore dynamical state of emulation, next run continues from checkpoint time step
+
+        Values of arrays [neuron, time] before checkpoint time step are not restored.
+
+        :param str path: Path of checkpoint file (.npz)
+        """
+        with np.load(path) as ckpt:
+            if int(ckpt["nb_nrn"]) != self.nb_nrn or float(ckpt["dt"]) != self.dt:
+                raise ValueError("Checkpoint does not match emulated configuration: {}".format(path))
+
+            step = int(ckpt["step"])
+            if step >= len(self.t):
+                raise ValueError("Checkpoint at end of emulation, extend emulation to continue: {}".format(path))
+
+            for name in CKPT_STATE:
+                getattr(self, name)[:] = ckpt[name]
+            self.spk_tab = SpikeBuffer.fromArray(ckpt["spk_tab"], self.nb_nrn)
+            np.random.set_state(("MT19937", ckpt["rng_keys"], int(ckpt["rng_pos"]), int(ckpt["rng_has_gauss"]), float(ckpt["rng_gauss"])))
+
+        self.step = step
+        if self.v is not None:
+            self.v[:, step] = self.vprev
+
+    def __stepDone(self, step:int):
+        """Update current time step and save checkpoint at interval
+
+        :param int step: Time step reached
+        """
+        self.step = step
+        if self.ckpt_path is not None and (step % self.ckpt_steps == 0 or step == len(self.t)-1):
+            if self.recorder is not None: # Recording on disk up to checkpoint for resumed emulation
+                self.recorder.flush()
+            self.saveCheckpoint(self.ckpt_path)
+
+    def __detectSpikes(self, step:int, nid, vnew):
+        """Detect threshold crossing of membrane voltages (one spike until voltage is back under threshold)
+
+        :param int step: Time step of new membrane voltages
+        :param nid: Index of emulated neurons
+        :param vnew: New membrane voltages of emulated neurons
+        """
+        detect  = self.detect[nid]
+        spk     = (vnew > SPK_THREHSOLD) & ~detect
+        rst     = (vnew < SPK_THREHSOLD) &  detect
+        self.spk_tab.append(step, nid[spk])
+        self.detect[nid[spk]] = True
+        self.detect[nid[rst]] = False
+
+    def __getContext(self, nid, v, variables:list, currents:dict={}):
+        """Gather values of recorded variables for emulated neurons
+
+        Only variables recorded are gathered so that cost follows what is recorded.
+
+        :param nid: Index of emulated neurons
+        :param v: Membrane voltage of emulated neurons
+        :param list variables: Variables recorded (see REC_VARIABLES)
+        :param dict currents: Currents of emulated neurons at current time step
+        :returns: Values per variable name
+        """
+        state = {
+            "mNa"     : self.mprev_Na,
+            "hNa"     : self.hprev_Na,
+            "mK"      : self.mprev_K,
+            "mM"      : self.mprev_M,
+            "mL"      : self.mprev_L,
+            "hL"      : self.hprev_L,
+            "mT"      : self.mprev_T,
+            "hT"      : self.hprev_T,
+            "r_ampa"  : self.rnew_ampa,
+            "r_nmda"  : self.rnew_nmda,
+            "r_gabaa" : self.rnew_gabaa,
+            "r_gabab" : self.rnew_gabab,
+            "s_gabab" : self.snew_gabab
+        }
+
+        values = {}
+        for var in variables:
+            if var == "v":
+                values[var] = v
+            elif var in state:
+                values[var] = state[var][nid]
+            elif currents.get(var) is not None:
+                values[var] = currents[var]
+        return values
+
+    def __stepSynPre(self, syn_stage:SynStage, nid, v_pre):
+        """Advance receptor states of presynaptic neurons and scatter them to targets
+
+        :param SynStage syn_stage: Synapse stage of emulated neurons
+        :param nid: Index of presynaptic neurons (sources of synapse stage)
+        :param v_pre: Membrane voltage of presynaptic neurons at previous time step
+        :returns: Weighted receptor activation [receptor type, target neuron]
+        """
+        rprev = {
+            "ampa"  : self.rprev_ampa[nid],
+            "nmda"  : self.rprev_nmda[nid],
+            "gabaa" : self.rprev_gabaa[nid],
+            "gabab" : self.rprev_gabab[nid]
+        }
+        [rnew, snew_gabab] = syn_stage.updatePre(v_pre, rprev, self.sprev_gabab[nid])
+
+        self.rnew_ampa[nid]     = rnew["ampa"]
+        self.rnew_nmda[nid]     = rnew["nmda"]
+        self.rnew_gabaa[nid]    = rnew["gabaa"]
+        self.rnew_gabab[nid]    = rnew["gabab"]
+        self.snew_gabab[nid]    = snew_gabab
+
+        self.rprev_ampa[nid]    = rnew["ampa"]
+        self.rprev_nmda[nid]    = rnew["nmda"]
+        self.rprev_gabaa[nid]   = rnew["gabaa"]
+        self.rprev_gabab[nid]   = rnew["gabab"]
+        self.sprev_gabab[nid]   = snew_gabab
+
+        return syn_stage.scatter(rnew, snew_gabab)
+
+    def __getSynPre(self, nid):
+        """Get receptor states of presynaptic neurons advanced at current time step
+
+        :param nid: Index of presynaptic neurons (sources of synapse stage)
+        :returns: [rnew per receptor type, snew of GABAb receptors]
+        """
+        rnew = {
+            "ampa"  : self.rnew_ampa[nid],
+            "nmda"  : self.rnew_nmda[nid],
+            "gabaa" : self.rnew_gabaa[nid],
+            "gabab" : self.rnew_gabab[nid]
+        }
+        return [rnew, self.snew_gabab[nid]]
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# @title      Store spikes of emulation
+# @file       SpikeBuffer.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Growable typed arrays of spikes and export to FPGA raster formats
+#
+# @details
+# Spikes are stored as (time step, neuron id) in typed arrays doubled in size
+# when full. Rasters are exported in the formats saved by the target
+# application, so that emulated and hardware rasters share analysis tools:
+# - csv: "time;neuron_id" with time the index of the raster frame (ms)
+# - bin: frames of uint32 [time stamp, spike mask of neurons 32*k to 32*k+31 for k in registers]
+# The FPGA sends one frame every 32 time steps (1 ms), a neuron spiking more
+# than once in a frame appears once.
+#
+# > **17 Oct 2026** : file creation
+
+import itertools
+import numpy as np
+
+from configuration.utility.settings import _HW_MAX_NB_NEURONS
+
+RASTER_TSTAMP_MS    = 1.0                           # Period of raster frames (ms)
+RASTER_NB_REGS      = _HW_MAX_NB_NEURONS // 32      # Spike registers of 32 neurons per frame
+RASTER_CSV_HEADER   = "time;neuron_id"
+
+class SpikeBuffer:
+    def __init__(self, nb_nrn:int=_HW_MAX_NB_NEURONS, capacity:int=1024) -> None:
+        """Initialize empty buffer of spikes
+
+        :param int nb_nrn: Number of neurons (neuron ids stored on 16 bits if possible)
+        :param int capacity: Initial number of spikes allocated
+        """
+        self.size   = 0
+        self.steps  = np.zeros(capacity, dtype=np.uint32)
+        self.nid    = np.zeros(capacity, dtype=np.uint16 if nb_nrn <= 2**16 else np.uint32)
+
+    def append(self, step:int, nid) -> None:
+        """Add spikes of neurons at a time step
+
+        :param int step: Time step of spikes
+        :param nid: Neurons spiking
+        """
+        nb = len(nid)
+        if nb == 0:
+            return
+        if self.size + nb > len(self.steps):
+            self.__grow(self.size + nb)
+        self.steps[self.size:self.size+nb]  = step
+        self.nid[self.size:self.size+nb]    = nid
+        self.size += nb
+
+    def extend(self, steps, nid) -> None:
+        """Add spikes given as arrays of time steps and neurons
+
+        :param steps: Time steps of spikes
+        :param nid: Neurons of spikes
+        """
+        nb = len(steps)
+        if self.size + nb > len(self.steps):
+            self.__grow(self.size + nb)
+        self.steps[self.size:self.size+nb]  = steps
+        self.nid[self.size:self.size+nb]    = nid
+        self.size += nb
+
+    def __grow(self, size:int) -> None:
+        capacity    = max(size, 2*len(self.steps))
+        self.steps  = np.concatenate((self.steps[:self.size], np.zeros(capacity - self.size, dtype=self.steps.dtype)))
+        self.nid    = np.concatenate((self.nid[:self.size],   np.zeros(capacity - self.size, dtype=self.nid.dtype)))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        """Iterate over spikes as [time step, neuron]"""
+        return ([int(s), int(n)] for (s, n) in zip(self.steps[:self.size], self.nid[:self.size]))
+
+    def getSteps(self):
+        """Get time steps of spikes"""
+        return self.steps[:self.size]
+
+    def getNeurons(self):
+        """Get neurons of spikes"""
+        return self.nid[:self.size]
+
+    def toArray(self):
+        """Get spikes as array [spike, (time step, neuron)]"""
+        return np.stack((self.getSteps().astype(np.int64), self.getNeurons().astype(np.int64)), axis=1)
+
+    def sort(self) -> None:
+        """Sort spikes by time step then neuron"""
+        order = np.lexsort((self.getNeurons(), self.getSteps()))
+        self.steps[:self.size]  = self.getSteps()[order]
+        self.nid[:self.size]    = self.getNeurons()[order]
+
+    def getTstamps(self, dt:float):
+        """Get time stamps of raster frames of spikes
+
+        :param float dt: Time step (ms)
+        """
+        return np.floor(self.getSteps()*dt/RASTER_TSTAMP_MS).astype(np.uint32)
+
+    def writeRasterCsv(self, fpath:str, dt:float) -> None:
+        """Write raster in csv format of target application
+
+        :param str fpath: Path of raster file
+        :param float dt: Time step (ms)
+        """
+        raster = np.unique(np.stack((self.getTstamps(dt).astype(np.int64), self.getNeurons().astype(np.int64)), axis=1), axis=0)
+        np.savetxt(fpath, raster.reshape(-1, 2), fmt="%u", delimiter=";", header=RASTER_CSV_HEADER, comments="")
+
+    def writeRasterBin(self, fpath:str, dt:float, nb_steps:int) -> None:
+        """Write raster in binary format of target application (one frame per time stamp)
+
+        :param str fpath: Path of raster file
+        :param float dt: Time step (ms)
+        :param int nb_steps: Number of time steps of emulation
+        """
+        nid = self.getNeurons().astype(np.int64)
+        if np.any(nid >= 32*RASTER_NB_REGS):
+            raise ValueError("Neuron ids exceed spike registers of raster frames")
+
+        nb_frames       = int(np.floor((nb_steps-1)*dt/RASTER_TSTAMP_MS)) + 1
+        frames          = np.zeros([nb_frames, 1 + RASTER_NB_REGS], dtype=np.uint32)
+        frames[:, 0]    = np.arange(nb_frames)
+        np.bitwise_or.at(frames, (self.getTstamps(dt), 1 + nid//32), np.left_shift(np.uint32(1), (nid % 32).astype(np.uint32)))
+        frames.tofile(fpath)
+
+    @classmethod
+    def fromArray(cls, spikes, nb_nrn:int=_HW_MAX_NB_NEURONS):
+        """Create buffer from spikes as array [spike, (time step, neuron)]"""
+        spikes  = np.asarray(spikes).reshape(-1, 2)
+        buf     = cls(nb_nrn, max(1, len(spikes)))
+        buf.extend(spikes[:, 0], spikes[:, 1])
+        return buf
+
+def unpack_raster_frames(frames):
+    """Get spikes of binary raster frames
+
+    :param frames: Raster frames [frame, 1 + RASTER_NB_REGS] (uint32)
+    :returns: [time stamps, neuron ids] of spikes ordered by time stamp then neuron
+    """
+    bits            = np.unpackbits(frames[:, 1:].astype("<u4").view(np.uint8), axis=1, bitorder="little")
+    [frame, nid]    = np.nonzero(bits)
+    return [frames[frame, 0], nid.astype(np.uint32)]
+
+def read_raster(fpath:str):
+    """Read raster saved by target application (or exported from emulation)
+
+    :param str fpath: Path of raster file (.csv or .bin)
+    :returns: [time stamps, neuron ids] of spikes
+    """
+    if fpath.endswith(".bin"):
+        return unpack_raster_frames(np.fromfile(fpath, dtype=np.uint32).reshape(-1, 1 + RASTER_NB_REGS))
+
+    raster = np.loadtxt(fpath, skiprows=1, delimiter=";", dtype=np.uint32, ndmin=2)
+    return [raster[:, 0], raster[:, 1]]
+
+def iter_raster(fpath:str, chunk_size:int=2**16):
+    """Read raster by chunks (memory bounded by chunk size), spikes ordered by time stamp
+
+    :param str fpath: Path of raster file (.csv or .bin)
+    :param int chunk_size: Number of frames (.bin) or spikes (.csv) per chunk
+    :returns: Generator of [time stamps, neuron ids] of spikes
+    """
+    if fpath.endswith(".bin"):
+        frames = np.memmap(fpath, dtype=np.uint32, mode="r").reshape(-1, 1 + RASTER_NB_REGS)
+        for k in range(0, len(frames), chunk_size):
+            yield unpack_raster_frames(np.asarray(frames[k:k+chunk_size]))
+        return
+
+    with open(fpath, "r") as f:
+        f.readline() # Header
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                return
+            raster = np.loadtxt(lines, delimiter=";", dtype=np.uint32, ndmin=2)
+            yield [raster[:, 0], raster[:, 1]]
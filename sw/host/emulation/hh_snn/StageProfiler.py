@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# @title      Profile stages of emulation
+# @file       StageProfiler.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Wall time and call count per stage of an emulation time step
+#
+# @details
+# Stages are timed as laps: each call to lap() charges the time elapsed since
+# the previous lap to the stage given, so that a time step costs one clock read
+# per stage. Emulators hold a NullProfiler by default whose methods do nothing.
+#
+# > **17 Oct 2026** : file creation
+
+import time
+
+# Stages of a time step
+PROF_STAGES = [
+    "rates",        # Gating variables (rate tables or equations)
+    "ionic",        # Ionic currents
+    "noise",        # Noise current
+    "synapses",     # Presynaptic states and synaptic currents
+    "fixed_point",  # Fixed point conversion of currents and voltage (FPGA equations)
+    "integration",  # Stimulation and membrane voltage
+    "detection",    # Spike detection
+    "recording",    # State update, context storage and recording
+    "exchange",     # Exchange with other emulators, checkpoints
+]
+
+class NullProfiler:
+    """Profiler doing nothing (profiling disabled)"""
+    enabled = False
+
+    def begin(self) -> None:
+        pass
+
+    def lap(self, stage:str) -> None:
+        pass
+
+    def stepDone(self, step:int) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+class StageProfiler(NullProfiler):
+    enabled = True
+
+    def __init__(self, report_interval_s:float=None, callback=None) -> None:
+        """Accumulate wall time and call count per stage of emulation
+
+        :param float report_interval_s: Interval between reports during emulation in wall time (s) (None for final report only)
+        :param callback: Function called with breakdown (see getBreakdown) at each report (None to print)
+        """
+        self.report_interval_s  = report_interval_s
+        self.callback           = callback
+        self.time_s             = {stage: 0.0 for stage in PROF_STAGES}
+        self.calls              = {stage: 0   for stage in PROF_STAGES}
+        self.nb_steps           = 0
+        self.mark               = None
+        self.last_report        = None
+
+    def begin(self) -> None:
+        """Start timing (beginning of emulation loop)"""
+        self.mark           = time.perf_counter()
+        self.last_report    = self.mark
+
+    def lap(self, stage:str) -> None:
+        """Charge time elapsed since previous lap to a stage
+
+        :param str stage: Stage completed (see PROF_STAGES)
+        """
+        now                 = time.perf_counter()
+        self.time_s[stage] += now - self.mark
+        self.calls[stage]  += 1
+        self.mark           = now
+
+    def stepDone(self, step:int) -> None:
+        """Count time step and report if interval elapsed
+
+        :param int step: Time step reached
+        """
+        self.nb_steps += 1
+        if self.report_interval_s is not None and self.mark - self.last_report >= self.report_interval_s:
+            self.report(step)
+            self.mark        = time.perf_counter() # Report not charged to stages
+            self.last_report = self.mark
+
+    def end(self) -> None:
+        """Report breakdown at end of emulation"""
+        self.report()
+
+    def getBreakdown(self) -> dict:
+        """Get breakdown of time per stage
+
+        :returns: Time (s), calls and share of total time per stage, plus "total_s" and "nb_steps"
+        """
+        total_s     = sum(self.time_s.values())
+        breakdown   = {stage: {"time_s": self.time_s[stage], "calls": self.calls[stage],
+                               "share": self.time_s[stage]/total_s if total_s > 0 else 0.0}
+                       for stage in PROF_STAGES}
+        breakdown["total_s"]    = total_s
+        breakdown["nb_steps"]   = self.nb_steps
+        return breakdown
+
+    def report(self, step:int=None) -> None:
+        """Publish breakdown to callback or print it
+
+        :param int step: Time step reached (None at end of emulation)
+        """
+        breakdown = self.getBreakdown()
+        if self.callback is not None:
+            self.callback(breakdown)
+            return
+
+        print("Emulation profile{} ({} steps, {:.3f} s):".format("" if step is None else " at step {}".format(step),
+                                                                 breakdown["nb_steps"], breakdown["total_s"]))
+        for stage in PROF_STAGES:
+            if breakdown[stage]["calls"] > 0:
+                print("  {:<12} {:>10.3f} s {:>6.1f} % {:>10} calls".format(stage, breakdown[stage]["time_s"],
+                                                                           100*breakdown[stage]["share"], breakdown[stage]["calls"]))
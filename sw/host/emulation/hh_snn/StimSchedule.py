@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# @title      Stimulation schedule of emulation
+# @file       StimSchedule.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Stimulation protocols compiled to piecewise constant current vectors
+#
+# @details
+# Protocols are described per neuron as pulses (on/off intervals in ms), pulse
+# trains, or stimulus vectors held until the next vector (e.g. vectors sent to
+# the target application through ZeroMQ, see monitoring/ext_stim). Before a run,
+# the schedule is compiled into the distinct current vectors of all neurons and
+# the index of the vector applied at each time step, so that the emulation loop
+# reads the stimulation current by index.
+#
+# A pulse is applied at time steps strictly inside ]delay, delay+duration[ as
+# the step stimulation of the target application. Amplitudes are given as a
+# scale of i_stim of the neurons or as currents in units of i_stim of the
+# configuration (pre-multiplied by time step of configuration).
+#
+# > **17 Oct 2026** : file creation
+
+import numpy as np
+
+from configuration.file_managers.SwConfigFile import SwConfigFile
+
+class StimSchedule:
+    def __init__(self, nb_nrn:int) -> None:
+        """Initialize empty stimulation schedule
+
+        :param int nb_nrn: Number of neurons
+        """
+        self.nb_nrn     = nb_nrn
+        self.pulses     = [] # [neurons, start (ms), stop (ms), scale of i_stim, current]
+        self.vectors    = [] # [start (ms), current of all neurons]
+
+    def addPulse(self, nid, delay_ms:float, duration_ms:float, scale:float=1.0, current=None) -> None:
+        """Add a pulse of stimulation to neurons
+
+        :param nid: Neurons stimulated
+        :param float delay_ms: Start of pulse (ms)
+        :param float duration_ms: Duration of pulse (ms)
+        :param float scale: Amplitude as a scale of i_stim of neurons (ignored if current given)
+        :param current: Amplitude as current in units of i_stim of configuration (scalar or per neuron of nid)
+        """
+        nid = np.atleast_1d(np.asarray(nid, dtype=int))
+        if current is not None:
+            current = np.broadcast_to(np.asarray(current, dtype=float), nid.shape)
+        self.pulses.append([nid, delay_ms, delay_ms + duration_ms, scale, current])
+
+    def addTrain(self, nid, delay_ms:float, duration_ms:float, period_ms:float, nb_pulses:int, scale:float=1.0, current=None) -> None:
+        """Add a train of periodic pulses of stimulation to neurons
+
+        :param float period_ms: Period of pulses (ms)
+        :param int nb_pulses: Number of pulses
+        """
+        for k in range(nb_pulses):
+            self.addPulse(nid, delay_ms + k*period_ms, duration_ms, scale, current)
+
+    def addVector(self, time_ms:float, current) -> None:
+        """Add a stimulus vector applied from a time until the next vector
+
+        Vectors add to pulses. A vector of zeros ends the previous vector.
+
+        :param float time_ms: Start of vector (ms)
+        :param current: Current of all neurons in units of i_stim of configuration
+        """
+        current = np.asarray(current, dtype=float)
+        if current.shape != (self.nb_nrn,):
+            raise ValueError("Stimulus vector of {} neurons expected, got shape {}".format(self.nb_nrn, current.shape))
+        self.vectors.append([time_ms, current])
+
+    def isEmpty(self) -> bool:
+        return not self.pulses and not self.vectors
+
+    def compile(self, t, dt:float, i_stim, cur_scale:float=1.0):
+        """Compile schedule to current vectors and index of vector per time step
+
+        :param t: Time steps of emulation (see SnnEmulator.t)
+        :param float dt: Time step (ms)
+        :param i_stim: Stimulation current of neurons
+        :param float cur_scale: Scale of currents given in units of configuration (time step of emulation over time step of configuration)
+        :returns: [current vectors [vector, neuron], index of vector per time step]
+        """
+        t       = np.asarray(t)
+        i_stim  = np.asarray(i_stim)
+
+        # Time steps of emulation loop where stimulation changes
+        spans   = [[np.searchsorted(t, start/dt, side="right"), np.searchsorted(t, stop/dt, side="left")]
+                   for [_, start, stop, _, _] in self.pulses]
+        starts  = [np.searchsorted(t, time_ms/dt, side="right") for [time_ms, _] in self.vectors]
+        edges   = np.unique(np.concatenate(([0], np.ravel(spans), starts)).astype(int))
+
+        # Current of each segment between edges
+        vectors = np.zeros([len(edges), self.nb_nrn], dtype=i_stim.dtype)
+        for (pulse, [on, off]) in zip(self.pulses, spans):
+            [nid, _, _, scale, current] = pulse
+            [s0, s1] = np.searchsorted(edges, [on, off])
+            if s1 > s0:
+                vectors[s0:s1, nid] += i_stim[nid]*scale if current is None else current*cur_scale
+        order = np.argsort(starts, kind="stable")
+        for k, i in enumerate(order):
+            s0 = np.searchsorted(edges, starts[i])
+            s1 = np.searchsorted(edges, starts[order[k+1]]) if k+1 < len(order) else len(edges)
+            vectors[s0:s1] += self.vectors[i][1]*cur_scale
+
+        # Distinct vectors and vector of each time step
+        [vectors, inverse] = np.unique(vectors, axis=0, return_inverse=True)
+        index = inverse.ravel()[np.searchsorted(edges, np.arange(len(t)), side="right") - 1].astype(np.int32)
+        return [vectors, index]
+
+    @classmethod
+    def fromSwConfig(cls, swconfig:SwConfigFile, nb_nrn:int):
+        """Create schedule of step stimulation of software configuration (all neurons)"""
+        sched = cls(nb_nrn)
+        if swconfig.parameters["en_stim"]:
+            sched.addPulse(np.arange(nb_nrn), swconfig.parameters["stim_delay_ms"], swconfig.parameters["stim_duration_ms"])
+        return sched
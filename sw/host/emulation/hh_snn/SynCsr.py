@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# @title      Sparse synaptic connectivity
+# @file       SynCsr.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Compressed sparse row (CSR) storage of synapses for emulation
+# 
+# @details
+# > **17 Oct 2026** : file creation
+# > **17 Oct 2026** : build from sparse synapse table (RB)
+
+import numpy as np
+
+SYN_RECEPTORS = ["ampa", "nmda", "gabaa", "gabab"] # Receptor types emulated ("x" is no synapse)
+
+class SynCsr:
+    def __init__(self, tsyn, wsyn, nlist, dtype=np.float64, src=None) -> None:
+        """Build sparse connectivity from synaptic types and weights
+
+        Rows are destination neurons indexed by their position in nlist, columns
+        are source neurons indexed by their position in src. Synapses of type "x"
+        are not stored.
+
+        :param tsyn: Synaptic types [dest, src] ("ampa", "nmda", "gabaa", "gabab", "x"), None for no synapse
+        :param wsyn: Synaptic weights [dest, src]
+        :param list nlist: Neurons emulated
+        :param dtype: Type of synaptic weights
+        :param list src: Source neurons (None for neurons emulated)
+        """
+        self.nlist  = np.asarray(nlist, dtype=int)
+        self.nb_nrn = len(self.nlist)
+        self.src    = self.nlist if src is None else np.asarray(src, dtype=int)
+
+        if tsyn is None:
+            self.setCoo([], [], [], [], dtype)
+        else:
+            tsyn = np.asarray(tsyn)[np.ix_(self.nlist, self.src)]
+            wsyn = np.asarray(wsyn, dtype=dtype)[np.ix_(self.nlist, self.src)]
+
+            [rows, cols] = np.nonzero(np.isin(tsyn, SYN_RECEPTORS))
+            self.setCoo(rows, cols, tsyn[rows, cols], wsyn[rows, cols], dtype)
+
+    @classmethod
+    def fromTable(cls, syn_table, nlist, dtype=np.float64, src=None):
+        """Build sparse connectivity from a synapse table without dense [dest, src] arrays
+
+        :param SynTable syn_table: Synapses of configuration
+        :param list nlist: Neurons emulated
+        :param dtype: Type of synaptic weights
+        :param list src: Source neurons (None for neurons emulated)
+        :returns: Sparse connectivity (rows and columns as in constructor)
+        """
+        csr = cls(None, None, nlist, dtype, src)
+
+        # Position of neurons in nlist and src (-1 if absent)
+        pos_dest = np.full(syn_table.nb_nrn, -1)
+        pos_src  = np.full(syn_table.nb_nrn, -1)
+        pos_dest[csr.nlist] = np.arange(csr.nb_nrn)
+        pos_src[csr.src]    = np.arange(len(csr.src))
+
+        rows    = pos_dest[syn_table.dest]
+        cols    = pos_src[syn_table.src]
+        sel     = (rows >= 0) & (cols >= 0) & np.isin(syn_table.tsyn, SYN_RECEPTORS)
+        csr.setCoo(rows[sel], cols[sel], syn_table.tsyn[sel], syn_table.wsyn[sel], dtype)
+        return csr
+
+    def setCoo(self, rows, cols, types, weights, dtype=np.float64):
+        """Set synapses from coordinates, replacing existing synapses
+
+        :param rows: Destination neurons (position in nlist)
+        :param cols: Source neurons (position in src)
+        :param types: Synaptic types ("ampa", "nmda", "gabaa", "gabab")
+        :param weights: Synaptic weights
+        :param dtype: Type of synaptic weights
+        """
+        rows    = np.asarray(rows,    dtype=int)
+        cols    = np.asarray(cols,    dtype=int)
+        types   = np.asarray(types,   dtype=str)
+        weights = np.asarray(weights, dtype=dtype)
+
+        # All synapses (row-major, i.e. sorted by destination then source)
+        order           = np.lexsort((cols, rows))
+        [rows, cols]    = [rows[order], cols[order]]
+        self.nnz        = len(cols)
+        self.indptr     = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=self.nb_nrn))))
+        self.indices    = cols
+        self.data       = weights[order]
+        self.tsyn       = types[order]
+
+        # Synapses per receptor type (COO expansion of CSR rows for products)
+        self.csc        = {} # Column-major copies built on demand (see dotCols)
+        self.rows       = {}
+        self.cols       = {}
+        self.weights    = {}
+        for syn_type in SYN_RECEPTORS:
+            sel                     = self.tsyn == syn_type
+            self.rows[syn_type]     = rows[sel]
+            self.cols[syn_type]     = cols[sel]
+            self.weights[syn_type]  = self.data[sel]
+
+    def getNnz(self, syn_type:str=""):
+        """Get number of synapses (all receptor types if not specified)"""
+        if syn_type:
+            return len(self.cols[syn_type])
+        else:
+            return self.nnz
+
+    def dot(self, syn_type:str, x):
+        """Sparse matrix-vector product for one receptor type
+
+        :param str syn_type: Receptor type ("ampa", "nmda", "gabaa", "gabab")
+        :param x: Presynaptic values indexed by position in src
+        :returns: Weighted sum of presynaptic values for each destination neuron
+        """
+        y = np.bincount(self.rows[syn_type], weights=self.weights[syn_type]*x[self.cols[syn_type]], minlength=self.nb_nrn)
+        return y.astype(x.dtype, copy=False)
+
+    def dotCols(self, syn_types:list, cols, x):
+        """Sparse matrix-vector products of receptor types restricted to some source neurons
+
+        Only synapses of the sources given are read, so that cost follows the
+        number of their outgoing synapses rather than the number of synapses.
+
+        :param list syn_types: Receptor types ("ampa", "nmda", "gabaa", "gabab")
+        :param cols: Source neurons (position in src)
+        :param x: Presynaptic values [receptor type of syn_types, position in src]
+        :returns: Weighted sum of presynaptic values of sources given [receptor type of syn_types, destination neuron]
+        """
+        key = tuple(syn_types)
+        if key not in self.csc:
+            # Synapses of receptor types sorted by source, rows offset by receptor type
+            rows    = np.concatenate([self.rows[t] + k*self.nb_nrn for k, t in enumerate(syn_types)])
+            srcs    = np.concatenate([self.cols[t]                  for t in syn_types])
+            weights = np.concatenate([self.weights[t]               for t in syn_types])
+            order   = np.argsort(srcs, kind="stable")
+            colptr  = np.concatenate(([0], np.cumsum(np.bincount(srcs, minlength=len(self.src)))))
+            self.csc[key] = [colptr, rows[order], (rows[order] // max(1, self.nb_nrn))*len(self.src) + srcs[order], weights[order]]
+        [colptr, rows, xidx, weights] = self.csc[key]
+
+        # Synapses of sources: concatenation of their column ranges
+        cols    = np.asarray(cols, dtype=int)
+        start   = colptr[cols]
+        count   = colptr[cols + 1] - start
+        nb      = int(count.sum())
+        if nb == 0:
+            return np.zeros([len(syn_types), self.nb_nrn], dtype=x.dtype)
+        idx     = np.repeat(start - np.cumsum(count) + count, count) + np.arange(nb)
+
+        y = np.bincount(rows[idx], weights=weights[idx]*x.ravel()[xidx[idx]], minlength=len(syn_types)*self.nb_nrn)
+        return y.reshape(len(syn_types), self.nb_nrn).astype(x.dtype, copy=False)
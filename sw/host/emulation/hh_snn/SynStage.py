@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+# @title      Synapse stage of emulation
+# @file       SynStage.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Destexhe synapses computed from presynaptic receptor states
+#
+# @details
+# Receptor states r (and s for GABAb) only depend on the presynaptic voltage,
+# they are advanced once per source neuron and time step. The resulting
+# conductances are then scattered to the targets through the sparse weights.
+# FPGA emulation computes the current per synapse on the fixed point encoding of
+# the synaptic pre-multiplication instead (calcISynFxp, calcISynSfi).
+#
+# > **17 Oct 2026** : file creation
+
+import numpy as np
+from fxpmath import Fxp
+
+from configuration.synapses.Synapses import Synapses
+from configuration.utility.Utility   import SFI, sfiQuantize, sfiRequantize
+from emulation.hh_snn.SynCsr         import SynCsr, SYN_RECEPTORS
+
+# Row of receptor types in conductance arrays
+SYN_ROW = {syn_type: i for i, syn_type in enumerate(SYN_RECEPTORS)}
+
+class SynStage:
+    def __init__(self, syn_csr:SynCsr, dt, exp_euler:bool=False) -> None:
+        """Initialize synapse stage
+
+        :param SynCsr syn_csr: Sparse synaptic connectivity among emulated neurons
+        :param float dt: Time step (ms)
+        :param bool exp_euler: Advance receptor states with exponential Euler instead of forward Euler
+        """
+        self.csr        = syn_csr
+        self.dt         = dt
+        self.exp_euler  = exp_euler
+        self.model  = Synapses().destexhe
+
+        psyn        = self.model.psyn
+        pid         = self.model.PID
+        self.k1     = {"ampa": psyn[pid["AMPA_K1"]], "nmda": psyn[pid["NMDA_K1"]], "gabaa": psyn[pid["GABAa_K1"]], "gabab": psyn[pid["GABAb_K1"]]}
+        self.k2     = {"ampa": psyn[pid["AMPA_K2"]], "nmda": psyn[pid["NMDA_K2"]], "gabaa": psyn[pid["GABAa_K2"]], "gabab": psyn[pid["GABAb_K2"]]}
+        self.gsyn   = [psyn[pid["AMPA_Gsyn"]], psyn[pid["NMDA_Gsyn"]], psyn[pid["GABAa_Gsyn"]], psyn[pid["GABAb_Gsyn"]]]
+        self.esyn   = [psyn[pid["AMPA_Esyn"]], psyn[pid["NMDA_Esyn"]], psyn[pid["GABAa_Esyn"]], psyn[pid["GABAb_Esyn"]]]
+        self.k3     = psyn[pid["GABAb_K3"]]
+        self.k4     = psyn[pid["GABAb_K4"]]
+
+    def updatePre(self, v_pre, rprev:dict, sprev_gabab):
+        """Advance receptor states of all presynaptic neurons by one time step
+
+        :param v_pre: Membrane voltage of emulated neurons at previous time step
+        :param dict rprev: Previous r state per receptor type
+        :param sprev_gabab: Previous s state of GABAb receptors
+        :returns: [rnew per receptor type, snew of GABAb receptors]
+        """
+        T_v     = self.model.T_v(v_pre)
+        rnew    = {}
+        if self.exp_euler: # States relax to steady state of inputs held over the time step
+            for syn_type in SYN_RECEPTORS:
+                k       = self.k1[syn_type]*T_v + self.k2[syn_type]
+                rinf    = self.k1[syn_type]*T_v/k
+                rnew[syn_type] = rinf + (rprev[syn_type] - rinf)*np.exp(-k*self.dt)
+            sinf        = self.k3*rprev["gabab"]/self.k4
+            snew_gabab  = sinf + (sprev_gabab - sinf)*np.exp(-self.k4*self.dt)
+            return [rnew, snew_gabab]
+
+        for syn_type in SYN_RECEPTORS:
+            rnew[syn_type] = self.model.rcalc(rprev[syn_type], self.k1[syn_type], self.k2[syn_type], T_v, self.dt)
+        snew_gabab = self.model.scalc(sprev_gabab, rprev["gabab"], self.k3, self.k4, self.dt)
+        return [rnew, snew_gabab]
+
+    def scatter(self, rnew:dict, snew_gabab):
+        """Scatter weighted receptor states to target neurons
+
+        :returns: Weighted receptor activation [receptor type, target neuron]
+        """
+        act = np.zeros([len(SYN_RECEPTORS), self.csr.nb_nrn], dtype=snew_gabab.dtype)
+        act[SYN_ROW["ampa"]]  = self.csr.dot("ampa",  rnew["ampa"])
+        act[SYN_ROW["nmda"]]  = self.csr.dot("nmda",  rnew["nmda"])
+        act[SYN_ROW["gabaa"]] = self.csr.dot("gabaa", rnew["gabaa"])
+        act[SYN_ROW["gabab"]] = self.csr.dot("gabab", self.model.Sn_GABAb(snew_gabab))
+        return act
+
+    def calcISyn(self, v_post, pmul_gsyn, act):
+        """Calculate synaptic current of target neurons
+
+        :param v_post: Membrane voltage of target neuron(s)
+        :param pmul_gsyn: Pre-multiplication of synaptic conductances of target neuron(s)
+        :param act: Weighted receptor activation of target neuron(s) (column(s) of scatter())
+        """
+        return pmul_gsyn * (
+              self.gsyn[0]                         * act[0] * (v_post - self.esyn[0])
+            + self.gsyn[1] * self.model.B_v(v_post) * act[1] * (v_post - self.esyn[1])
+            + self.gsyn[2]                         * act[2] * (v_post - self.esyn[2])
+            + self.gsyn[3]                         * act[3] * (v_post - self.esyn[3])
+        )
+
+    def calcISynFxp(self, row:int, v_post, pmul_gsyn:Fxp, rnew:dict, snew_gabab):
+        """Calculate synaptic current of one target neuron with fixed point arithmetic
+
+        Reference of FPGA emulation: each synapse is weighted by the Fxp pre-multiplication
+        of synaptic conductances, receptor terms are multiplied on its fixed point encoding.
+
+        :param int row: Index of target neuron in synaptic connectivity
+        :param v_post: Membrane voltage of target neuron
+        :param Fxp pmul_gsyn: Pre-multiplication of synaptic conductances of target neuron
+        :param dict rnew: New r state per receptor type of presynaptic neurons (sources of synapse stage)
+        :param snew_gabab: New s state of GABAb receptors of presynaptic neurons
+        :returns: Synaptic current (Fxp, or 0 without synapses)
+        """
+        n       = self.model.psyn_GABAb_n
+        Kd      = self.model.psyn_GABAb_Kd
+        i_syn   = 0
+        for k in range(self.csr.indptr[row], self.csr.indptr[row+1]):
+            pre     = self.csr.indices[k]
+            tsyn    = self.csr.tsyn[k]
+            wsyn    = float(self.csr.data[k])*pmul_gsyn
+            gsyn    = self.gsyn[SYN_ROW[tsyn]]
+            esyn    = self.esyn[SYN_ROW[tsyn]]
+
+            if   tsyn == "nmda":
+                i_syn_it = wsyn * gsyn * self.model.B_v(v_post) * rnew[tsyn][pre] * (v_post - esyn)
+            elif tsyn == "gabab":
+                snew     = snew_gabab[pre]
+                i_syn_it = wsyn * gsyn * (snew**n)/(snew**n + Kd) * (v_post - esyn)
+            else:
+                i_syn_it = wsyn * gsyn * rnew[tsyn][pre] * (v_post - esyn)
+            i_syn += i_syn_it
+        return i_syn
+
+    def calcISynSfi(self, v_post, pmul_gsyn, rnew:dict, snew_gabab):
+        """Calculate synaptic current of target neurons with fixed point integers
+
+        Same operations as calcISynFxp on integers scaled by 2**DEC of the pre-multiplication
+        encoding: operands quantized, products truncated toward zero, quotient floored, saturation
+        after each operation, synapse currents summed exactly.
+
+        :param v_post: Membrane voltage of target neurons
+        :param pmul_gsyn: Quantized pre-multiplication of synaptic conductances of target neurons (see sfiQuantize)
+        :param dict rnew: New r state per receptor type of presynaptic neurons (sources of synapse stage)
+        :param snew_gabab: New s state of GABAb receptors of presynaptic neurons
+        :returns: Synaptic current of target neurons (integers with SFI.PMUL_GSYN.DEC fractional bits)
+        """
+        enc     = SFI.PMUL_GSYN
+        quant   = lambda x: sfiQuantize(x, enc)
+        mul     = lambda qa, qb: sfiRequantize(qa*qb, 2*enc.DEC, enc)
+        n       = self.model.psyn_GABAb_n
+        Kd      = self.model.psyn_GABAb_Kd
+
+        i_syn   = np.zeros(self.csr.nb_nrn, dtype=np.int64)
+        for tsyn in SYN_RECEPTORS:
+            rows = self.csr.rows[tsyn]
+            cols = self.csr.cols[tsyn]
+            if len(rows) == 0:
+                continue
+            v       = v_post[rows]
+            i_syn_it = mul(quant(self.csr.weights[tsyn]), pmul_gsyn[rows])
+            i_syn_it = mul(i_syn_it, quant(self.gsyn[SYN_ROW[tsyn]]))
+
+            if   tsyn == "nmda":
+                i_syn_it = mul(i_syn_it, quant(self.model.B_v(v)))
+                i_syn_it = mul(i_syn_it, quant(rnew[tsyn][cols]))
+            elif tsyn == "gabab":
+                sn       = snew_gabab[cols]**n
+                i_syn_it = mul(i_syn_it, quant(sn))
+                i_syn_it = np.clip((i_syn_it << enc.DEC) // quant(sn + Kd), -2**(enc.WIDTH-1), 2**(enc.WIDTH-1)-1)
+            else:
+                i_syn_it = mul(i_syn_it, quant(rnew[tsyn][cols]))
+            i_syn_it = mul(i_syn_it, quant(v - self.esyn[SYN_ROW[tsyn]]))
+
+            np.add.at(i_syn, rows, i_syn_it)
+        return i_syn
@@ -11,12 +11,14 @@
 # 
 # @details
 # > **23 Oct 2023** : file creation (RB)
+# > **17 Oct 2026** : plot membrane voltage from memory and disk recorders (RB)
 
 import numpy as np
 import matplotlib.pyplot as plt
 from configuration.file_managers.HwConfigFile import *
 from configuration.neurons.Ionrates  import RATE_VMIN, RATE_VMAX, RATE_STEP, RATE_TABLE_SIZE
 from emulation.hh_snn.SnnEmulator import *
+from emulation.hh_snn.Recorder    import CaptureRecorder, DiskRecorder, load_recording
 
 class SnnPlotter:
     def __init__(self, snn_emu:SnnEmulator):
@@ -73,87 +75,108 @@ class SnnPlotter:
         # fig.tight_layout()
         plt.show(block=False)
 
+    def __getTrace(self, var:str, nid:int):
+        """Get time axis and values of a variable for a neuron (stored context or recording)"""
+        rec = self.snn_emu.recorder
+        if rec is None:
+            return [self.snn_emu.t/self.snn_emu.dt*1e-3, getattr(self.snn_emu, var)[nid][:]]
+        if isinstance(rec, CaptureRecorder):
+            trace = rec.getTrace(var, nid)
+        else:
+            data  = load_recording(rec.path) if isinstance(rec, DiskRecorder) else rec.data
+            trace = data[var][list(rec.nid).index(nid)]
+        return [self.snn_emu.t[rec.steps]/self.snn_emu.dt*1e-3, trace]
+
+    def __hasContext(self, variables:list, nid:int) -> bool:
+        """Check if variables of a neuron are available (stored context or recording)"""
+        rec = self.snn_emu.recorder
+        if rec is None:
+            return all(var == "v" or self.snn_emu.STORE_CONTEXT for var in variables)
+        if isinstance(rec, CaptureRecorder):
+            return all(rec.isCaptured(var, nid) for var in variables)
+        return all(var in rec.variables for var in variables) and nid in rec.nid
+
     def plotIonChanStates(self, nid):
-        if not(self.snn_emu.STORE_CONTEXT):
+        if not self.__hasContext(["v", "mNa", "hNa", "mK", "mM", "mL", "hL", "mT", "hT"], nid):
             print("plotIonChanStates() skipped: no emulation context")
         else:
             plt.figure("Ion Channel states N{}".format(nid))
             plt.subplot(911)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.v[nid][:])
+            plt.plot(*self.__getTrace("v", nid))
             plt.ylim([-100, 70])
             plt.title("V_mem")
 
             plt.subplot(912)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.mNa[nid][:])
+            plt.plot(*self.__getTrace("mNa", nid))
             plt.title("mNa")
 
             plt.subplot(913)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.hNa[nid][:])
+            plt.plot(*self.__getTrace("hNa", nid))
             plt.title("hNa")
 
             plt.subplot(914)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.mK[nid][:])
+            plt.plot(*self.__getTrace("mK", nid))
             plt.title("mK")
 
             plt.subplot(915)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.mM[nid][:])
+            plt.plot(*self.__getTrace("mM", nid))
             plt.title("mM")
             
             plt.subplot(916)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.mL[nid][:])
+            plt.plot(*self.__getTrace("mL", nid))
             plt.title("mL")
             
             plt.subplot(917)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.hL[nid][:])
+            plt.plot(*self.__getTrace("hL", nid))
             plt.title("hL")
 
             plt.subplot(918)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.mT[nid][:])
+            plt.plot(*self.__getTrace("mT", nid))
             plt.title("mT")
             
             plt.subplot(919)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.hT[nid][:])
+            plt.plot(*self.__getTrace("hT", nid))
             plt.title("hT")
 
             plt.suptitle("Ion channel states", fontsize=16)
             plt.show(block=False)
 
     def plotCurrents(self, nid):
-        if not(self.snn_emu.STORE_CONTEXT):
+        if not self.__hasContext(["v", "i_Na", "i_K", "i_M", "i_L", "i_T", "i_Leak", "i_noise"], nid):
             print("plotIonCurrents() skipped: no emulation context")
         else:
             plt.figure("Ion currents N{}".format(nid))
             plt.subplot(811)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.v[nid][:])
+            plt.plot(*self.__getTrace("v", nid))
             plt.ylim([-100, 70])
             plt.title("V_mem")
 
             plt.subplot(812)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.i_Na[nid][:])
+            plt.plot(*self.__getTrace("i_Na", nid))
             plt.title("i_Na")
 
             plt.subplot(813)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.i_K[nid][:])
+            plt.plot(*self.__getTrace("i_K", nid))
             plt.title("i_K")
 
             plt.subplot(814)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.i_M[nid][:])
+            plt.plot(*self.__getTrace("i_M", nid))
             plt.title("i_M")
 
             plt.subplot(815)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.i_T[nid][:])
+            plt.plot(*self.__getTrace("i_T", nid))
             plt.title("i_L")
             
             plt.subplot(816)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.i_L[nid][:])
+            plt.plot(*self.__getTrace("i_L", nid))
             plt.title("i_T")
 
             plt.subplot(817)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.i_Leak[nid][:])
+            plt.plot(*self.__getTrace("i_Leak", nid))
             plt.title("i_Leak")
 
             plt.subplot(818)
-            plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.i_noise[nid][:])
+            plt.plot(*self.__getTrace("i_noise", nid))
             plt.title("i_noise")
 
             plt.show(block=False)
@@ -164,15 +187,19 @@ class SnnPlotter:
         plt.xlabel("Time (ms)")
         plt.ylabel("Neuron index")
 
-        for [x, y] in self.snn_emu.spk_tab:
-            plt.scatter(x/self.snn_emu.dt*1e-3, y, color="black", marker= ".", s=10)
+        spk_tab = self.snn_emu.spk_tab
+        plt.scatter(spk_tab.getSteps()/self.snn_emu.dt*1e-3, spk_tab.getNeurons(), color="black", marker= ".", s=10)
         plt.show(block=False)
 
     def plotVmem(self, nlist, plot_type):
+        if not all(self.__hasContext(["v"], nid) for nid in nlist):
+            print("plotVmem() skipped: membrane voltage not recorded")
+            return
+
         if plot_type == "all":
             for nid in nlist:
                 plt.figure("Membrane voltage N{}".format(nid))
-                plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.v[nid][:])
+                plt.plot(*self.__getTrace("v", nid))
                 plt.xlabel("Time (ms)")
                 plt.ylabel("Amplitude (mV)")
                 plt.ylim([-100, 70])
@@ -186,7 +213,7 @@ class SnnPlotter:
             plt.ylim([-100, 70])
 
             for nid in nlist:
-                plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.v[nid][:])
+                plt.plot(*self.__getTrace("v", nid))
             plt.legend(nlist)
             plt.suptitle("Compare membrane voltage", fontsize=16)
             plt.show(block=False)
@@ -205,7 +232,7 @@ class SnnPlotter:
                     ax0 = plt.subplot(len(nlist), 1, nid+1)
                 else:
                     plt.subplot(len(nlist), 1, nid+1, sharex = ax0)
-                plt.plot(self.snn_emu.t/self.snn_emu.dt*1e-3, self.snn_emu.v[nid][:])
+                plt.plot(*self.__getTrace("v", nid))
                 # plt.grid()
 
             plt.legend(nlist)
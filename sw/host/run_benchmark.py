@@ -0,0 +1,26 @@
+import json
+import argparse
+
+from emulation.bench_emulator import *
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of configuration generation and software emulation")
+    parser.add_argument("--nrn",     type=int,   nargs="+", default=BENCH_NB_NRN,   help="Numbers of neurons")
+    parser.add_argument("--model",   type=str,   nargs="+", default=BENCH_MODELS,   help="Network models")
+    parser.add_argument("--engine",  type=str,   nargs="+", default=BENCH_ENGINES,  choices=[ENGINE_SCALAR, ENGINE_VECTOR], help="Emulation engines")
+    parser.add_argument("--eq",      type=str,   nargs="+", default=["exact", "fpga"], choices=["exact", "fpga"], help="Equations emulated")
+    parser.add_argument("--context", type=str,   nargs="+", default=["noctx", "ctx"],  choices=["noctx", "ctx"],  help="Context storage")
+    parser.add_argument("--workers", type=int,   nargs="+", default=BENCH_WORKERS,  help="Numbers of worker processes (partitioned emulation if above 1)")
+    parser.add_argument("--time",    type=float, default=0.1,  help="Emulated duration of each workload (s)")
+    parser.add_argument("--seed",    type=int,   default=0,    help="Seed of configuration generation and noise")
+    parser.add_argument("--out",     type=str,   default=None, help="Path of JSON results")
+    parser.add_argument("--compare", type=str,   default=None, help="Path of JSON results used as baseline")
+    args = parser.parse_args()
+
+    workloads = get_workloads(args.nrn, args.model, [eq == "fpga" for eq in args.eq],
+                              [c == "ctx" for c in args.context], args.engine, args.workers)
+    bench     = run_benchmark(workloads, args.time, args.seed, args.out)
+
+    if args.compare is not None:
+        with open(args.compare, "r") as f:
+            compare_benchmark(bench, json.load(f))
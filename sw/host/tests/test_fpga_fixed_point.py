@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# @title      Reference tests of FPGA fixed point emulation
+# @file       test_fpga_fixed_point.py
+# @author     Romain Beaubois
+# @date       17 Oct 2026
+# @copyright
+# SPDX-FileCopyrightText: © 2026 Romain Beaubois <refbeaubois@yahoo.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# @brief Vector engine (scaled int64) against scalar engine (Fxp objects) on FPGA equations
+#
+# @details
+# Both engines draw the same counter-based noise, membrane voltages must be
+# bit-identical with and without synapses of each receptor type.
+#
+# > **17 Oct 2026** : file creation
+
+import numpy as np
+import pytest
+
+from configuration.gen_config           import gen_config, NetwConfParams
+from configuration.synapses.SynTable    import SynTable
+from emulation.emulate_config           import emulate_config
+from emulation.hh_snn.SnnEmulator       import ENGINE_SCALAR, ENGINE_VECTOR
+
+NB_NRN  = 6
+WSYN    = 1.9
+
+def gen_test_config(path, tsyn):
+    """Generate custom configuration with a chaser of synapses of one type (no synapse if None)"""
+    params                       = NetwConfParams()
+    params.model                 = "custom"
+    params.nb_nrn                = NB_NRN
+    params.emulation_time_s      = 0.01
+    params.en_step_stim          = True
+    params.step_stim_delay_ms    = 1
+    params.step_stim_duration_ms = 8
+    np.random.seed(0)
+    [hwconfig, swconfig] = gen_config("test", params, str(path) + "/")
+
+    if tsyn is not None:
+        src          = np.arange(NB_NRN-1)
+        hwconfig.syn = SynTable(NB_NRN, src+1, src, tsyn, WSYN)
+    return [hwconfig, swconfig]
+
+def emulate_fpga(hwconfig, swconfig, engine):
+    return emulate_config(hwconfig, swconfig, list(range(NB_NRN)), True, False, np.float64, engine, noise_seed=1)
+
+@pytest.mark.parametrize("tsyn", [None, "ampa", "nmda", "gabaa", "gabab", ["ampa", "nmda", "gabaa", "gabab", "ampa"]])
+def test_vector_matches_fxp(tmp_path, tsyn):
+    [hwconfig, swconfig] = gen_test_config(tmp_path, tsyn)
+    ref = emulate_fpga(hwconfig, swconfig, ENGINE_SCALAR)
+    vec = emulate_fpga(hwconfig, swconfig, ENGINE_VECTOR)
+
+    assert len(ref.spk_tab) > 0
+    assert np.array_equal(vec.v, ref.v)